@@ -1,10 +1,27 @@
+import asyncio
 import logging
-import httpx  # Remplacement de requests par httpx
+import re
+from typing import Dict, Optional
+
+from cachetools import TTLCache
 from telegram import Bot
 from telegram.error import TelegramError
 
+from config import config
+from utils.http_pool import http_pool
+
 logger = logging.getLogger(__name__)
 
+TOKEN_PATTERN = re.compile(r"^\d+:[A-Za-z0-9_-]{30,}$")
+VALIDATION_TIMEOUT = 5.0
+VALIDATION_CONCURRENCY = 8
+
+# Résultats de getMe : tokens valides (infos du bot) et tokens refusés
+_valid_tokens = TTLCache(maxsize=1024, ttl=600)
+_invalid_tokens = TTLCache(maxsize=4096, ttl=60)
+_validations: Dict[str, asyncio.Future] = {}  # token -> validation en cours
+_validation_slots = asyncio.Semaphore(VALIDATION_CONCURRENCY)
+
 async def send_to_user_bot(bot_token: str, chat_id: int, message: str) -> bool:
     """
     Envoie un message à un utilisateur via un bot Telegram (version asynchrone)
@@ -18,7 +35,7 @@ async def send_to_user_bot(bot_token: str, chat_id: int, message: str) -> bool:
         bool: True si l'envoi a réussi, False sinon
     """
     try:
-        bot = Bot(token=bot_token)
+        bot = Bot(token=bot_token, base_url=config.BOT_API_BASE_URL, request=http_pool.request())
         await bot.send_message(
             chat_id=chat_id,
             text=message,
@@ -32,6 +49,56 @@ async def send_to_user_bot(bot_token: str, chat_id: int, message: str) -> bool:
         logger.error(f"Erreur inattendue: {e}", exc_info=True)
         return False
 
+async def get_bot_info(token: str) -> Optional[dict]:
+    """
+    Valide un token et retourne les infos du bot (version asynchrone)
+
+    Les résultats sont gardés en cache (refus compris) et les validations
+    simultanées d'un même token partagent un seul appel getMe.
+
+    Args:
+        token: Le token du bot à valider
+
+    Returns:
+        dict: Les infos du bot (getMe), None si le token est invalide
+    """
+    if token in _valid_tokens:
+        return _valid_tokens[token]
+    if token in _invalid_tokens or not TOKEN_PATTERN.match(token):
+        return None
+
+    validation = _validations.get(token)
+    if validation is None:
+        validation = asyncio.ensure_future(_fetch_bot_info(token))
+        _validations[token] = validation
+        validation.add_done_callback(lambda _: _validations.pop(token, None))
+    # Un appelant annulé n'interrompt pas la validation des autres
+    return await asyncio.shield(validation)
+
+async def _fetch_bot_info(token: str) -> Optional[dict]:
+    http_pool.acquire()
+    try:
+        async with _validation_slots:
+            response = await http_pool.client.get(
+                f"{config.BOT_API_BASE_URL}{token}/getMe",
+                timeout=VALIDATION_TIMEOUT
+            )
+        if response.status_code in (401, 404):
+            _invalid_tokens[token] = True
+            return None
+        data = response.json()
+        if response.status_code == 200 and data.get("ok", False):
+            _valid_tokens[token] = data.get("result")
+            return _valid_tokens[token]
+        # Erreur passagère (429, 5xx) : pas de mise en cache
+        logger.warning(f"[get_bot_info] Réponse inattendue: {response.status_code}")
+        return None
+    except Exception as e:
+        logger.error(f"[get_bot_info] Erreur de validation: {e}")
+        return None
+    finally:
+        await http_pool.release()
+
 async def validate_bot_token(token: str) -> bool:
     """
     Valide un token de bot Telegram (version asynchrone)
@@ -42,29 +109,4 @@ async def validate_bot_token(token: str) -> bool:
     Returns:
         bool: True si le token est valide, False sinon
     """
-    try:
-        bot = Bot(token=token)
-        me = await bot.get_me()
-        return me is not None
-    except TelegramError as e:
-        logger.error(f"[validate_bot_token] Token invalide: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"[validate_bot_token] Erreur inattendue: {e}")
-        return False
-
-# Version synchrone modifiée utilisant httpx
-def sync_validate_bot_token(token: str) -> dict:
-    """Valide un token et retourne les infos du bot"""
-    try:
-        url = f"https://api.telegram.org/bot{token}/getMe"
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("ok", False):
-                    return data.get("result")  # Retourne les données du bot
-            return None
-    except Exception as e:
-        logger.error(f"Validation error: {e}")
-        return None
\ No newline at end of file
+    return await get_bot_info(token) is not None
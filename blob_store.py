@@ -0,0 +1,205 @@
+"""
+Stockage adressé par contenu des textes de documents indexés.
+
+Chaque contenu unique est stocké une seule fois, sous son empreinte SHA-256,
+en blocs de taille fixe compressés indépendamment et précédés d'une table
+des offsets : un extrait ne décompresse que le bloc qui le contient. Les
+fiches documents des utilisateurs pointent vers ces blobs ; un compteur de
+références permet de supprimer un blob lorsque plus aucune fiche ne l'utilise.
+"""
+
+import hashlib
+import logging
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .database import get_disk_db
+
+logger = logging.getLogger(__name__)
+
+REFS_COLLECTION = "blob_refs"
+COMPRESSION_LEVEL = 6
+CHUNK_SIZE = 16 * 1024  # Caractères par bloc compressé
+
+# En-tête : signature, taille des blocs, nombre de blocs ; puis offsets (uint64)
+_MAGIC = b"TSB1"
+_HEADER = struct.Struct("<4sII")
+
+
+class BlobStore:
+    """Blobs compressés et compteurs de références"""
+
+    def __init__(self, disk_db, cache_size: int = 32):
+        self.disk_db = disk_db
+        self.path = Path(disk_db.path) / "blobs"
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._tables: "OrderedDict[str, Tuple[int, List[int], int]]" = OrderedDict()
+        self._cache_size = cache_size
+
+    @staticmethod
+    def digest(content: str) -> str:
+        """Empreinte forte d'un contenu texte"""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.path / digest[:2] / f"{digest}.zc"
+
+    def _write_blob(self, digest: str, content: str) -> int:
+        chunks = [
+            zlib.compress(content[i:i + CHUNK_SIZE].encode('utf-8'), COMPRESSION_LEVEL)
+            for i in range(0, len(content), CHUNK_SIZE)
+        ]
+        offsets = [0]
+        for chunk in chunks:
+            offsets.append(offsets[-1] + len(chunk))
+        header = _HEADER.pack(_MAGIC, CHUNK_SIZE, len(chunks)) + struct.pack(f"<{len(offsets)}Q", *offsets)
+
+        blob_path = self._blob_path(digest)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = blob_path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            for chunk in chunks:
+                f.write(chunk)
+        temp_path.replace(blob_path)  # Remplacement atomique
+        return len(header) + offsets[-1]
+
+    def _read_table(self, digest: str, f) -> Tuple[int, List[int], int]:
+        """Table des blocs : (taille des blocs, offsets, début des données)"""
+        with self._lock:
+            table = self._tables.get(digest)
+            if table is not None:
+                self._tables.move_to_end(digest)
+                return table
+
+        magic, chunk_size, chunk_count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"Blob {digest} invalide")
+        offsets = list(struct.unpack(f"<{chunk_count + 1}Q", f.read(8 * (chunk_count + 1))))
+        table = (chunk_size, offsets, _HEADER.size + 8 * (chunk_count + 1))
+
+        with self._lock:
+            self._tables[digest] = table
+            while len(self._tables) > self._cache_size * 8:
+                self._tables.popitem(last=False)
+        return table
+
+    @staticmethod
+    def _read_chunk(f, table: Tuple[int, List[int], int], index: int) -> str:
+        _, offsets, data_start = table
+        f.seek(data_start + offsets[index])
+        return zlib.decompress(f.read(offsets[index + 1] - offsets[index])).decode('utf-8')
+
+    def iter_chunks(self, digest: str, first: int = 0) -> Iterator[Tuple[int, int, str]]:
+        """Produit (index, position du premier caractère, texte) bloc par bloc"""
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                table = self._read_table(digest, f)
+                chunk_size, offsets, _ = table
+                for index in range(first, len(offsets) - 1):
+                    yield index, index * chunk_size, self._read_chunk(f, table, index)
+        except FileNotFoundError:
+            return
+
+    def read_range(self, digest: str, start: int, end: int) -> str:
+        """Lit les caractères [start, end) en ne décompressant que les blocs utiles"""
+        if end <= start:
+            return ""
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                table = self._read_table(digest, f)
+                chunk_size, offsets, _ = table
+                first = max(0, start // chunk_size)
+                last = min(len(offsets) - 2, (end - 1) // chunk_size)
+                text = ''.join(self._read_chunk(f, table, index) for index in range(first, last + 1))
+        except FileNotFoundError:
+            return ""
+        except Exception as e:
+            logger.error(f"Erreur lecture blob {digest}: {e}")
+            return ""
+
+        base = first * chunk_size
+        return text[start - base:end - base]
+
+    def exists(self, digest: str) -> bool:
+        return self.get_metadata(digest) is not None
+
+    def get_metadata(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Métadonnées d'un blob (références, tailles, analyse partagée)"""
+        return self.disk_db.load(REFS_COLLECTION, digest)
+
+    def put(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Stocke un contenu (ou ajoute une référence s'il existe déjà)"""
+        digest = self.digest(content)
+        with self._lock:
+            record = self.get_metadata(digest)
+            if record is None:
+                record = dict(metadata or {})
+                record.update({
+                    "refcount": 0,
+                    "size": len(content),
+                    "compressed_size": self._write_blob(digest, content)
+                })
+            record["refcount"] += 1
+            self.disk_db.save(REFS_COLLECTION, digest, record)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """Retourne le contenu décompressé d'un blob"""
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+
+        if not self._blob_path(digest).exists():
+            return None
+        try:
+            content = ''.join(text for _, _, text in self.iter_chunks(digest))
+        except Exception as e:
+            logger.error(f"Erreur lecture blob {digest}: {e}")
+            return None
+
+        with self._lock:
+            self._cache[digest] = content
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return content
+
+    def release(self, digest: str) -> bool:
+        """Retire une référence ; supprime le blob à la dernière"""
+        with self._lock:
+            record = self.get_metadata(digest)
+            if record is None:
+                return False
+
+            record["refcount"] -= 1
+            if record["refcount"] > 0:
+                self.disk_db.save(REFS_COLLECTION, digest, record)
+                return True
+
+            self._cache.pop(digest, None)
+            self._tables.pop(digest, None)
+            self.disk_db.delete(REFS_COLLECTION, digest)
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+            return True
+
+
+_blob_store_instance = None
+
+
+def get_blob_store() -> BlobStore:
+    """Obtient l'instance partagée du stockage de blobs"""
+    global _blob_store_instance
+    if _blob_store_instance is None:
+        _blob_store_instance = BlobStore(get_disk_db())
+    return _blob_store_instance
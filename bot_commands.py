@@ -0,0 +1,81 @@
+"""
+Commandes affichées dans le menu des bots (set_my_commands).
+
+Une empreinte de la liste est notée par bot : un bot qui redémarre avec la
+même liste n'appelle plus l'API. Les bots qui démarrent ensemble sont servis
+par lots, avec une concurrence bornée, hors de leur chemin de démarrage.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Dict
+
+from telegram import Bot
+from telegram.ext import Application
+
+from utils.memory_full import db
+
+logger = logging.getLogger(__name__)
+
+BOT_COMMANDS = [
+    ("setup", "Ouvrir le menu principal"),
+    ("recover", "Récupérer accès perdu"),
+    ("profile", "Mon profil"),
+    ("me", "Mes informations"),
+    ("shop", "Achat de crédits"),
+    ("buy", "Acheter un produit"),
+    ("credits", "Mes crédits"),
+    ("subscribe", "Abonnements"),
+    ("premium", "Passer en premium"),
+    ("referral", "Parrainage"),
+    ("invite", "Générer un lien de parrainage"),
+    ("filleuls", "Voir mes filleuls"),
+    ("search", "Rechercher dans l'index"),
+    ("index", "Indexer un document"),
+    ("admin", "Panel administrateur"),
+    ("stats", "Statistiques"),
+    ("logs", "Logs système"),
+    ("kick", "Expulser un utilisateur"),
+    ("ban", "Bannir un utilisateur"),
+    ("mute", "Réduire au silence"),
+    ("unmute", "Retirer le silence"),
+    ("warn", "Avertir un utilisateur"),
+    ("start", "Démarrer le bot")
+]
+BOT_COMMANDS_HASH = hashlib.sha256(json.dumps(BOT_COMMANDS, ensure_ascii=False).encode()).hexdigest()
+COMMANDS_BATCH_DELAY = 2.0  # Regroupe les bots qui démarrent ensemble
+COMMANDS_CONCURRENCY = 16
+
+_pending_commands: Dict[str, Bot] = {}  # id du bot -> bot dont les commandes sont à envoyer
+_commands_flush = None
+
+async def configure_bot_commands(application: Application):
+    """Planifie set_my_commands, sauf si ce bot a déjà reçu cette liste de commandes"""
+    global _commands_flush
+    bot_id = application.bot.token.split(':', 1)[0]
+    if db.load_from_disk("bot_commands", bot_id) == BOT_COMMANDS_HASH:
+        return
+    _pending_commands[bot_id] = application.bot
+    if _commands_flush is None or _commands_flush.done():
+        _commands_flush = asyncio.create_task(flush_bot_commands())
+
+async def flush_bot_commands():
+    """Envoie les commandes en attente par lots, hors du chemin de démarrage des bots"""
+    semaphore = asyncio.Semaphore(COMMANDS_CONCURRENCY)
+
+    async def send(bot_id: str, bot: Bot):
+        async with semaphore:
+            try:
+                await bot.set_my_commands(BOT_COMMANDS)
+                db.save_to_disk("bot_commands", bot_id, BOT_COMMANDS_HASH)
+            except Exception as e:
+                logger.error(f"Erreur set_my_commands pour le bot {bot_id}: {e}")
+
+    await asyncio.sleep(COMMANDS_BATCH_DELAY)
+    while _pending_commands:
+        batch = dict(_pending_commands)
+        _pending_commands.clear()
+        await asyncio.gather(*(send(bot_id, bot) for bot_id, bot in batch.items()))
+        logger.info(f"Commandes configurées pour {len(batch)} bots")
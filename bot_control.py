@@ -0,0 +1,84 @@
+"""
+Contrôle à chaud des bots hébergés.
+
+Un bot lié pendant l'exécution démarre en quelques secondes, un bot supprimé
+termine les mises à jour déjà reçues puis s'arrête, et un token régénéré
+remplace l'ancien, sans redémarrer le processus ni toucher aux autres bots.
+
+Les bots sont hébergés par le BotRuntime du processus, ou par les workers du
+BotSupervisor quand il est actif (main.py le déclare dans bot_control).
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from utils.bot_runtime import BotRuntime, bot_runtime
+from utils.bot_workers import bot_key
+
+logger = logging.getLogger(__name__)
+
+
+class BotControl:
+    """Démarre, arrête et recharge un bot sans interrompre les autres"""
+
+    def __init__(self, runtime: BotRuntime, start_timeout: float = 15.0):
+        self.runtime = runtime
+        self.start_timeout = start_timeout
+        self.supervisor = None  # BotSupervisor quand les bots sont répartis sur des workers
+
+    @property
+    def _workers(self) -> bool:
+        return self.supervisor is not None and self.supervisor.running
+
+    def hosted_token(self, token: str) -> Optional[str]:
+        """Token actuellement hébergé pour ce bot (l'ancien si le token a été régénéré)"""
+        hosted = self.supervisor.assignments if self._workers else self.runtime.keys()
+        return next((other for other in hosted if bot_key(other) == bot_key(token)), None)
+
+    async def start_bot(self, token: str, kind: str) -> bool:
+        """Démarre un bot d'un type donné (ou remplace son ancien token) ; vrai s'il tourne ou est planifié"""
+        previous = self.hosted_token(token)
+        if previous == token:
+            return True
+        if previous is not None:
+            logger.info(f"Nouveau token pour le bot {bot_key(token)}, rechargement")
+            await self.stop_bot(previous, delete_webhook=False)
+
+        if self._workers:
+            # Le worker construit lui-même l'Application selon le type (build_bot_application)
+            self.supervisor.add_bot(token, kind)
+            return True
+
+        async def factory():
+            from utils.user_administrator import build_bot_application
+            return await build_bot_application(token, kind)
+
+        self.runtime.startup_times.pop(token, None)
+        self.runtime.add(token, factory)
+        await self.runtime.wait_started([token], self.start_timeout)
+        return token in self.runtime.startup_times
+
+    async def health_table(self) -> List[Dict]:
+        """Santé de chaque bot, qu'il soit hébergé par ce processus ou par un worker"""
+        if self._workers:
+            return await self.supervisor.health_table()
+        return self.runtime.health_table()
+
+    async def stop_bot(self, token: str, delete_webhook: bool = True):
+        """Arrête un bot : plus de nouvelles mises à jour, celles reçues sont traitées"""
+        if self._workers:
+            self.supervisor.remove_bot(token, delete_webhook=delete_webhook)
+        else:
+            await self.runtime.remove(token, delete_webhook=delete_webhook)
+        logger.info(f"Bot arrêté: {bot_key(token)}")
+
+    async def reload_bot(self, token: str, kind: str) -> bool:
+        """Redémarre un bot avec une Application neuve (nouveau token ou configuration)"""
+        previous = self.hosted_token(token)
+        if previous is not None:
+            await self.stop_bot(previous, delete_webhook=False)
+        return await self.start_bot(token, kind)
+
+
+# Contrôle des bots du processus principal
+bot_control = BotControl(bot_runtime)
@@ -4,7 +4,7 @@ from telegram.ext import CallbackContext, MessageHandler, filters
 from utils.memory_full import db
 from utils.security import SecurityManager
 from code import AuthManager
-from .bot_linking import child_bots
+from .bot_linking import stop_child_bot
 
 async def handle_final_delete_with_pin(update: Update, context: CallbackContext):
     user_id = update.message.from_user.id
@@ -32,12 +32,10 @@ async def handle_final_delete_with_pin(update: Update, context: CallbackContext)
     db.mark_bot_for_deletion(user_id, bot_username)
 
     # Libérer la place (vérification de la suppression effective)
-    if bot_username in child_bots:
-        try:
-            child_bots[bot_username][0].stop_polling()
-        except Exception:
-            pass
-        del child_bots[bot_username]
+    try:
+        await stop_child_bot(user_id, bot_username)
+    except Exception:
+        pass
 
     db.remove_user_bot(user_id, bot_username)
     context.user_data.pop("deleting_bot", None)
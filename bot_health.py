@@ -0,0 +1,112 @@
+"""
+Santé des bots hébergés.
+
+Pour chaque bot : état (démarrage, actif, veille, redémarrage, quarantaine),
+dernier getUpdates réussi, appels et erreurs de l'API Bot et exceptions des
+handlers sur une fenêtre glissante, nombre de redémarrages et dernière erreur.
+
+Les appels à l'API passent par le pool partagé, qui les signale au bot
+concerné (http_pool.watch). Les redémarrages suivent un délai exponentiel
+avec gigue pour ne pas relancer en même temps tous les bots tombés ensemble.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+ERROR_WINDOW = 300.0  # Fenêtre des taux d'erreur (secondes)
+MAX_EVENTS = 1000  # Événements gardés par fenêtre et par bot
+
+STARTING = "starting"
+RUNNING = "running"
+SLEEPING = "sleeping"
+BACKOFF = "backoff"
+QUARANTINED = "quarantined"
+
+
+class BotHealth:
+    """État de santé d'un bot"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.name: Optional[str] = None
+        self.state = STARTING
+        self.started_at: Optional[float] = None
+        self.last_poll: Optional[float] = None  # Dernier getUpdates réussi
+        self.restarts = 0
+        self.failures = 0  # Échecs consécutifs
+        self.retry_at: Optional[float] = None
+        self.last_error = ""
+        self._calls: deque = deque(maxlen=MAX_EVENTS)
+        self._api_errors: deque = deque(maxlen=MAX_EVENTS)
+        self._handler_errors: deque = deque(maxlen=MAX_EVENTS)
+
+    def record_call(self, method: str, error: Optional[str] = None):
+        """Appel à l'API Bot terminé (signalé par le pool HTTP), error s'il a échoué"""
+        now = time.monotonic()
+        self._calls.append(now)
+        if error is None:
+            if method == "getUpdates":
+                self.last_poll = now
+        else:
+            self._api_errors.append(now)
+            self.last_error = f"{method}: {error}"
+
+    def record_handler_error(self, error: BaseException):
+        self._handler_errors.append(time.monotonic())
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def started(self, name: Optional[str]):
+        self.name = name
+        self.state = RUNNING
+        self.started_at = time.monotonic()
+        self.retry_at = None
+
+    def quarantine(self, error: str):
+        self.state = QUARANTINED
+        self.last_error = error
+        self.retry_at = None
+
+    def poll_stalled(self, timeout: float) -> bool:
+        """Vrai si aucun getUpdates n'a réussi depuis timeout secondes (depuis le démarrage)"""
+        if self.started_at is None:
+            return False
+        return time.monotonic() - max(self.started_at, self.last_poll or 0) > timeout
+
+    def failed(self, error: str, base_delay: float, max_delay: float, stable_after: float = 300.0) -> float:
+        """Enregistre un échec et retourne le délai avant le redémarrage"""
+        if self.started_at is not None and time.monotonic() - self.started_at > stable_after:
+            self.failures = 0  # Le bot avait tourné normalement : pas d'échecs consécutifs
+        self.failures += 1
+        self.last_error = error or self.last_error
+        delay = min(max_delay, base_delay * 2 ** (self.failures - 1))
+        delay = random.uniform(delay / 2, delay)
+        self.state = BACKOFF
+        self.retry_at = time.monotonic() + delay
+        return delay
+
+    @staticmethod
+    def _count(events: deque, now: float) -> int:
+        while events and now - events[0] > ERROR_WINDOW:
+            events.popleft()
+        return len(events)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Valeurs affichables (âges en secondes, compteurs sur la fenêtre)"""
+        now = time.monotonic()
+        calls = self._count(self._calls, now)
+        api_errors = self._count(self._api_errors, now)
+        return {
+            'key': self.key,
+            'name': self.name,
+            'state': self.state,
+            'last_poll': None if self.last_poll is None else now - self.last_poll,
+            'calls': calls,
+            'api_errors': api_errors,
+            'error_rate': api_errors / calls if calls else 0.0,
+            'handler_errors': self._count(self._handler_errors, now),
+            'restarts': self.restarts,
+            'retry_in': None if self.retry_at is None else max(0.0, self.retry_at - now),
+            'last_error': self.last_error
+        }
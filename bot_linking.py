@@ -1,13 +1,17 @@
+import asyncio
 import logging
 logger = logging.getLogger(__name__)
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CallbackContext, CallbackQueryHandler, CommandHandler, MessageHandler, filters, ApplicationBuilder
 
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 
 from utils.memory_full import db, UserStates
-from utils.api_client import sync_validate_bot_token
+from utils.api_client import get_bot_info
+from utils.http_pool import http_pool
+from utils.bot_control import bot_control
+from utils.bot_workers import CHILD_BOT
 from utils.user_features import get_welcome_message
 from config import config
 from utils.keyboards import KeyboardManager
@@ -17,20 +21,19 @@ from utils.security import SecurityManager
 
 
 PDG_USER_ID = config.PDG_USER_ID
-child_bots: Dict[str, Application] = {}
+child_bots: Dict[str, str] = {}  # nom du bot -> token des bots liés pendant l'exécution
 pending_deletions = {}
 
 def init_child_bot(token: str, bot_username: str):
     """Initialise et démarre un bot fils avec python-telegram-bot"""
     try:
-        application = (
-            ApplicationBuilder()
-            .token(token)
-            .connect_timeout(30)
-            .read_timeout(30)
-            .pool_timeout(30)
-            .build()
-        )
+        builder = ApplicationBuilder().token(token).base_url(config.BOT_API_BASE_URL)
+        application = http_pool.configure(
+            builder,
+            connect_timeout=30,
+            read_timeout=30,
+            pool_timeout=30
+        ).build()
         
         # Les handlers seront enregistrés avant le démarrage du polling
         # La fonction register_user_bot_handlers est asynchrone et sera appelée dans la tâche asyncio
@@ -40,6 +43,31 @@ def init_child_bot(token: str, bot_username: str):
         logger.error(f"Erreur initialisation bot fils: {e}")
         return None
 
+async def build_child_application(token: str) -> Application:
+    """Construit l'application d'un bot fils avec ses handlers (usine du runtime)"""
+    from utils.user_features import setup_user_bot_handlers
+    application = init_child_bot(token, None)
+    if application is None:
+        raise RuntimeError("Initialisation du bot fils impossible")
+    await setup_user_bot_handlers(application)
+    return application
+
+def child_bot_token(user_id: int, bot_username: str) -> Optional[str]:
+    """Token d'un bot fils, lié pendant l'exécution ou enregistré"""
+    if bot_username in child_bots:
+        return child_bots[bot_username]
+    for bot in db.get_user_bots(user_id):
+        if bot.get("bot_username") == bot_username:
+            return bot.get("token")
+    return None
+
+async def stop_child_bot(user_id: int, bot_username: str):
+    """Arrête à chaud un bot fils supprimé (ses mises à jour reçues sont traitées)"""
+    token = child_bot_token(user_id, bot_username)
+    child_bots.pop(bot_username, None)
+    if token:
+        await bot_control.stop_bot(token)
+
 def get_plan_limits(plan: str) -> Dict[str, int]:
     """Retourne les limites selon le plan"""
     limits = {
@@ -511,7 +539,7 @@ class BotLinkingManager:
             lang = db.get_user_language(user_id) or 'fr'
 
             # Validation avec retour des données
-            bot_data = sync_validate_bot_token(token)
+            bot_data = await get_bot_info(token)
             if not bot_data:
                 error_msg = "❌ Token invalide. Veuillez vérifier et réessayer."
                 await update.message.reply_text(error_msg)
@@ -527,22 +555,13 @@ class BotLinkingManager:
             success_text = f"⚙️ <b>Intégration réussie !</b>\n\nVotre bot est maintenant connecté à notre plateforme 🎉\n\nAller dans votre bot utilisez le bouton <b>⚙️ setup</b> pour commencer la configuration."
             await update.message.reply_text(success_text, parse_mode="HTML")
 
-            # Lancement du bot enfant
+            # Lancement du bot enfant (ou rechargement si son token a changé)
             try:
-                child_app = init_child_bot(token, bot_username)
-                if child_app:
-                    # Enregistrer les handlers spécifiques au bot fils
-                    from utils.user_features import setup_user_bot_handlers
-                    await setup_user_bot_handlers(child_app)                    
-                    # Démarrer le polling du bot fils en arrière-plan
-                    import asyncio
-                    await child_app.initialize()
-                    await child_app.start()
-                    asyncio.create_task(child_app.updater.start_polling())
-                    child_bots[bot_username] = child_app
+                child_bots[bot_username] = token
+                if await bot_control.start_bot(token, CHILD_BOT):
                     logger.info(f"Bot fils @{bot_username} démarré avec succès.")
                 else:
-                    logger.error(f"Échec de l'initialisation du bot fils @{bot_username}.")
+                    logger.error(f"Échec du démarrage du bot fils @{bot_username}.")
             except Exception as e:
                 logger.error(f"Erreur lors du démarrage du bot fils @{bot_username}: {e}", exc_info=True)
 
@@ -980,14 +999,10 @@ class BotLinkingManager:
                 return
 
             # Suppression effective
-            if bot_username in child_bots:
-                app = child_bots[bot_username]
-                try:
-                    await app.stop()  # Arrêt asynchrone
-                    await app.shutdown()
-                except Exception as e:
-                    logger.error(f"Erreur arrêt bot: {e}")
-                del child_bots[bot_username]
+            try:
+                await stop_child_bot(user_id, bot_username)
+            except Exception as e:
+                logger.error(f"Erreur arrêt bot: {e}")
 
             db.delete_user_bot(user_id, bot_username)
             
@@ -1023,15 +1038,11 @@ class BotLinkingManager:
         user_id, bot_username, chat_id = job.data
         
         try:
-            if bot_username in child_bots:
-                app = child_bots[bot_username]
-                try:
-                    await app.stop()
-                    await app.shutdown()
-                    logger.info(f"Bot @{bot_username} arrêté avec succès")
-                except Exception as e:
-                    logger.error(f"Erreur lors de l\"arrêt du bot: {e} [ERR_BLM_025]")
-                del child_bots[bot_username]
+            try:
+                await stop_child_bot(user_id, bot_username)
+                logger.info(f"Bot @{bot_username} arrêté avec succès")
+            except Exception as e:
+                logger.error(f"Erreur lors de l\"arrêt du bot: {e} [ERR_BLM_025]")
             
             db.delete_user_bot(user_id, bot_username) # Changed from mark_bot_for_deletion to delete_user_bot
             
@@ -1361,15 +1372,13 @@ class BotLinkingManager:
                 context.user_data["awaiting_pdg_token"] = False
                 return
 
-            if not sync_validate_bot_token(token):
+            bot_info = await get_bot_info(token)
+            if not bot_info:
                 await update.message.reply_text("❌ Token invalide. Veuillez réessayer." if lang == 'fr' else "❌ Invalid token. Please try again.")
                 return
 
-            application = ApplicationBuilder().token(token).build()
-            bot_info = await application.bot.get_me()
-            
-            # PDG_BOT_ID est un entier, bot_info.id est un entier. Ils doivent être égaux.
-            if bot_info.id != config.PDG_BOT_ID:
+            # PDG_BOT_ID est un entier, bot_info["id"] est un entier. Ils doivent être égaux.
+            if bot_info["id"] != config.PDG_BOT_ID:
                 await update.message.reply_text(
                     "❌ Le token fourni ne correspond pas au Bot PDG configuré." if lang == 'fr' else "❌ The provided token does not match the configured PDG Bot."
                 )
@@ -1378,9 +1387,9 @@ class BotLinkingManager:
 
             db.pdg_config = {
                 "token": token,
-                "bot_id": bot_info.id,
+                "bot_id": bot_info["id"],
                 "owner": user_id,
-                "username": bot_info.username,
+                "username": bot_info.get("username"),
                 "is_active": True
             }
             db.save_pdg_config()
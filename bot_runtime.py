@@ -0,0 +1,377 @@
+"""
+Exécution de nombreux bots dans une seule boucle asyncio.
+
+Chaque Application est hébergée par une tâche de la boucle principale au lieu
+d'un thread (et d'une boucle) par bot : le nombre de threads reste constant
+quel que soit le nombre de bots fils. Chaque tâche supervise son bot :
+démarrage, surveillance du polling et redémarrage après un échec. Le nombre
+de démarrages simultanés est borné et chaque étape du démarrage est
+chronométrée (startup_report).
+
+La santé de chaque bot est suivie (voir bot_health) : un polling sans
+getUpdates réussi depuis stall_timeout secondes est redémarré, les
+redémarrages suivent un délai exponentiel avec gigue et un token invalide met
+le bot en quarantaine au lieu de le relancer.
+
+Avec un serveur webhook, les bots ne font plus de polling : leurs mises à jour
+arrivent par ce serveur unique (voir webhook_server).
+
+Un bot sans mise à jour depuis idle_timeout secondes est mis en veille : son
+Application est arrêtée et libérée. Une seule tâche interroge alors getUpdates
+(sans confirmer les mises à jour) pour tous les bots en veille ; en mode
+webhook, le serveur garde la route et signale l'arrivée d'une mise à jour.
+L'Application est reconstruite au réveil et traite les mises à jour en attente.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from telegram import Update, __version_info__ as PTB_VERSION
+from telegram.error import InvalidToken
+from telegram.ext import Application, TypeHandler
+
+from config import config
+from utils.bot_health import BotHealth, QUARANTINED, SLEEPING, STARTING
+from utils.http_pool import http_pool
+
+logger = logging.getLogger(__name__)
+
+# Construit une Application prête à démarrer (handlers enregistrés)
+AppFactory = Callable[[], Awaitable[Application]]
+
+ACTIVITY_GROUP = -100  # Groupe du handler qui horodate l'activité, avant tous les autres
+
+# polling_alive et confirm_updates lisent des attributs privés de l'Updater
+# (_Updater__polling_task, _last_update_id), vérifiés pour cette version majeure
+# de python-telegram-bot ; test_bot_runtime contrôle leur présence.
+PTB_TESTED_MAJOR = 20
+UPDATER_INTERNALS = PTB_VERSION[0] == PTB_TESTED_MAJOR
+
+
+def polling_alive(application: Application) -> bool:
+    """Vrai tant que le polling de l'application tourne"""
+    updater = application.updater
+    if updater is None or not updater.running:
+        return False
+    if not UPDATER_INTERNALS:
+        return True
+    # L'Updater reste "running" si sa tâche de polling meurt (token révoqué)
+    polling_task = updater._Updater__polling_task
+    return polling_task is None or not polling_task.done()
+
+
+async def confirm_updates(application: Application):
+    """Confirme les mises à jour déjà reçues (l'Updater ne le fait qu'au getUpdates suivant)"""
+    if not UPDATER_INTERNALS:
+        return
+    offset = application.updater._last_update_id
+    if not offset:
+        return
+    try:
+        await application.bot.get_updates(offset=offset, limit=1, timeout=0)
+    except Exception as e:
+        logger.debug(f"Confirmation des mises à jour impossible: {e}")
+
+
+async def stop_application(application: Application):
+    """Arrête proprement le polling puis l'application"""
+    try:
+        if application.updater and application.updater.running:
+            await application.updater.stop()
+            await confirm_updates(application)
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+    except Exception as e:
+        logger.error(f"Erreur arrêt bot: {e}")
+
+
+class BotRuntime:
+    """Héberge les Applications des bots comme tâches supervisées d'une même boucle"""
+
+    def __init__(self, restart_delay: float = 5.0, check_interval: float = 10.0, webhook_server=None,
+                 idle_timeout: float = 0, wake_interval: float = 20.0, startup_concurrency: int = 20,
+                 max_restart_delay: float = 300.0, stall_timeout: float = 120.0):
+        self.restart_delay = restart_delay  # Délai du premier redémarrage, doublé à chaque échec
+        self.max_restart_delay = max_restart_delay
+        self.stall_timeout = stall_timeout
+        self.check_interval = check_interval
+        self.webhook_server = webhook_server  # WebhookServer, ou None pour le polling
+        self.idle_timeout = idle_timeout  # Secondes sans mise à jour avant la veille (0 : jamais)
+        if idle_timeout and not UPDATER_INTERNALS:
+            # Sans confirmation à l'arrêt, chaque veille ferait retraiter les dernières mises à jour
+            logger.warning(f"python-telegram-bot {PTB_VERSION[0]}.x non vérifié "
+                           f"(attendu {PTB_TESTED_MAJOR}.x) : mise en veille des bots désactivée")
+            self.idle_timeout = 0
+        self.wake_interval = wake_interval
+        self.startup_concurrency = startup_concurrency
+        self._startup_slots = asyncio.Semaphore(startup_concurrency)  # Démarrages simultanés
+        self.startup_times: Dict[str, Dict[str, float]] = {}  # clé -> durée de chaque étape
+        self.applications: Dict[str, Application] = {}  # clé (token) -> application en cours
+        self.last_activity: Dict[str, float] = {}
+        self.health: Dict[str, BotHealth] = {}  # gardée après l'arrêt d'un bot en quarantaine
+        self._sleeping: Dict[str, asyncio.Event] = {}  # clé -> événement de réveil
+        self._wake_urls: Dict[str, str] = {}  # bots en veille surveillés par getUpdates
+        self._wake_checker: Optional[asyncio.Task] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stop_events: Dict[str, asyncio.Event] = {}
+        self._deleted: Set[str] = set()  # bots supprimés : leur webhook est retiré à l'arrêt
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def keys(self) -> List[str]:
+        return list(self._tasks)
+
+    @property
+    def sleeping(self) -> List[str]:
+        return list(self._sleeping)
+
+    @property
+    def quarantined(self) -> List[str]:
+        return [key for key, health in self.health.items() if health.state == QUARANTINED]
+
+    def health_table(self) -> List[Dict]:
+        """Santé de chaque bot (voir BotHealth.snapshot)"""
+        return [health.snapshot() for health in self.health.values()]
+
+    def add(self, key: str, factory: AppFactory) -> asyncio.Task:
+        """Lance la supervision d'un bot ; sans effet s'il est déjà hébergé"""
+        task = self._tasks.get(key)
+        if task and not task.done():
+            return task
+        stop_event = asyncio.Event()
+        self._stop_events[key] = stop_event
+        self.health[key] = BotHealth(key)
+        task = asyncio.create_task(self._supervise(key, factory, stop_event), name=f"bot:{key[:6]}")
+        self._tasks[key] = task
+        return task
+
+    async def _wait_stop(self, stop_event: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return stop_event.is_set()
+
+    async def _supervise(self, key: str, factory: AppFactory, stop_event: asyncio.Event):
+        """Démarre le bot et le redémarre tant qu'il n'a pas été retiré"""
+        health = self.health[key]
+        try:
+            while not stop_event.is_set():
+                application = None
+                hibernate = False
+                error = ""
+                health.state = STARTING
+                try:
+                    async with self._startup_slots:
+                        application = await self._start(key, factory)
+
+                    while self.webhook_server or polling_alive(application):
+                        if await self._wait_stop(stop_event, self.check_interval):
+                            break
+                        if not self.webhook_server and health.poll_stalled(self.stall_timeout):
+                            error = f"aucun getUpdates réussi depuis {self.stall_timeout:.0f}s"
+                            break
+                        if self._is_idle(key, application):
+                            hibernate = True
+                            break
+                    if not stop_event.is_set() and not hibernate:
+                        error = error or "polling interrompu"
+                        logger.warning(f"Bot {key[:6]}...: {error}, redémarrage")
+                except InvalidToken as e:
+                    health.quarantine(f"Token invalide: {e}")
+                    logger.error(f"Token invalide, bot mis en quarantaine: {key[:6]}...")
+                    break
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    logger.error(f"Erreur bot {key[:6]}...: {e}", exc_info=True)
+                finally:
+                    if hibernate:
+                        self._sleeping[key] = asyncio.Event()
+                        if self.webhook_server:
+                            self.webhook_server.park(key, self._sleeping[key].set)
+                        else:
+                            self._wake_urls[key] = f"{application.bot.base_url}/getUpdates"
+                    elif self.webhook_server:
+                        await self.webhook_server.unregister(key, delete_webhook=key in self._deleted)
+                    application = self.applications.pop(key, None)
+                    if application is not None:
+                        http_pool.unwatch(application.bot.base_url)
+                        await stop_application(application)
+
+                if hibernate:
+                    health.state = SLEEPING
+                    await self._hibernate(key, stop_event)
+                elif not stop_event.is_set():
+                    delay = health.failed(error, self.restart_delay, self.max_restart_delay)
+                    logger.info(f"Redémarrage de {key[:6]}... dans {delay:.0f}s (échec {health.failures})")
+                    if not await self._wait_stop(stop_event, delay):
+                        health.restarts += 1
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+                self._stop_events.pop(key, None)
+                self.last_activity.pop(key, None)
+                self._deleted.discard(key)
+                if stop_event.is_set():
+                    self.health.pop(key, None)
+
+    async def _start(self, key: str, factory: AppFactory) -> Application:
+        """Construit et démarre le bot en chronométrant chaque étape"""
+        timings = {}
+        started = mark = time.perf_counter()
+
+        def lap(step: str):
+            nonlocal mark
+            now = time.perf_counter()
+            timings[step] = now - mark
+            mark = now
+
+        application = await factory()
+        application.add_handler(TypeHandler(Update, self._stamp_activity(key)), group=ACTIVITY_GROUP)
+        application.add_error_handler(self._record_error(key))
+        self.applications[key] = application
+        self.last_activity[key] = time.monotonic()
+        http_pool.watch(application.bot.base_url, self.health[key].record_call)
+        lap('build')
+        await application.initialize()
+        lap('initialize')
+        await application.start()
+        lap('start')
+        if self.webhook_server:
+            await self.webhook_server.register(key, application)
+        else:
+            await application.updater.start_polling()
+        lap('updates')
+        timings['total'] = mark - started
+        self.startup_times[key] = timings
+        self.health[key].started(application.bot.username)
+        logger.info(f"Bot démarré{' (webhook)' if self.webhook_server else ''}: {key[:6]}... "
+                    f"en {timings['total']:.2f}s")
+        return application
+
+    async def wait_started(self, keys: List[str], timeout: float = 300.0):
+        """Attend que chaque bot ait démarré (ou ne soit plus hébergé)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(key in self.startup_times or key not in self._tasks for key in keys):
+                return
+            await asyncio.sleep(0.5)
+
+    def startup_report(self, keys: Optional[List[str]] = None, slowest: int = 10) -> str:
+        """Rapport des temps de démarrage : cumul par étape et bots les plus lents"""
+        keys = [key for key in (keys or self.startup_times) if key in self.startup_times]
+        if not keys:
+            return "Aucun bot démarré"
+        steps = ('build', 'initialize', 'start', 'updates')
+        totals = {step: sum(self.startup_times[key].get(step, 0) for key in keys) for step in steps}
+        lines = [
+            f"Démarrage de {len(keys)} bots (concurrence {self.startup_concurrency})",
+            "Cumul par étape: " + ", ".join(f"{step} {totals[step]:.1f}s" for step in steps)
+        ]
+        ranked = sorted(keys, key=lambda key: self.startup_times[key]['total'], reverse=True)
+        for key in ranked[:slowest]:
+            timings = self.startup_times[key]
+            lines.append(f"  {key[:6]}... {timings['total']:.2f}s (" +
+                         ", ".join(f"{step} {timings[step]:.2f}s" for step in steps) + ")")
+        return "\n".join(lines)
+
+    def _stamp_activity(self, key: str):
+        async def stamp(update: Update, context):
+            self.last_activity[key] = time.monotonic()
+        return stamp
+
+    def _record_error(self, key: str):
+        async def record(update: object, context):
+            health = self.health.get(key)
+            if health is not None:
+                health.record_handler_error(context.error)
+        return record
+
+    def _is_idle(self, key: str, application: Application) -> bool:
+        if not self.idle_timeout:
+            return False
+        if time.monotonic() - self.last_activity.get(key, 0) < self.idle_timeout:
+            return False
+        # Les tâches planifiées (rappels, rapports…) seraient perdues en veille
+        job_queue = application.job_queue
+        return not (job_queue and job_queue.jobs())
+
+    async def _hibernate(self, key: str, stop_event: asyncio.Event):
+        """Attend, sans Application en mémoire, une mise à jour ou l'arrêt du bot"""
+        logger.info(f"Bot en veille: {key[:6]}...")
+        if self._wake_urls and self._wake_checker is None:
+            self._wake_checker = asyncio.create_task(self._check_sleeping(), name="bots:wake")
+        try:
+            await self._sleeping[key].wait()
+        finally:
+            self._sleeping.pop(key, None)
+            self._wake_urls.pop(key, None)
+        if stop_event.is_set():
+            if self.webhook_server:
+                await self.webhook_server.unregister(key, delete_webhook=key in self._deleted)
+        else:
+            logger.info(f"Réveil du bot: {key[:6]}...")
+
+    async def _check_sleeping(self):
+        """Cherche périodiquement, pour tous les bots en veille, des mises à jour en attente"""
+        http_pool.acquire()
+        try:
+            while self._wake_urls:
+                await asyncio.sleep(self.wake_interval)
+                sleeping = list(self._wake_urls.items())
+                results = await asyncio.gather(
+                    *(self._has_updates(url) for _, url in sleeping),
+                    return_exceptions=True
+                )
+                for (key, _), pending in zip(sleeping, results):
+                    if pending is True and key in self._sleeping:
+                        self._sleeping[key].set()
+        finally:
+            self._wake_checker = None
+            await http_pool.release()
+
+    async def _has_updates(self, url: str) -> bool:
+        """getUpdates sans offset ni attente : consulte la file sans la confirmer"""
+        async with http_pool.semaphore:
+            response = await http_pool.client.post(url, json={'limit': 1, 'timeout': 0}, timeout=10.0)
+        if response.status_code in (401, 404):
+            return True  # Token révoqué : le redémarrage le constatera
+        return bool(response.json().get('result'))
+
+    async def remove(self, key: str, delete_webhook: bool = False):
+        """Arrête un bot et attend la fin de sa tâche (mises à jour reçues traitées)"""
+        task = self._tasks.get(key)
+        if task is None:
+            self.health.pop(key, None)  # Bot en quarantaine
+            return
+        if delete_webhook:
+            self._deleted.add(key)
+        self._stop_events[key].set()
+        if key in self._sleeping:
+            self._sleeping[key].set()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def stop_all(self):
+        """Arrête tous les bots hébergés"""
+        for stop_event in self._stop_events.values():
+            stop_event.set()
+        for wake_event in self._sleeping.values():
+            wake_event.set()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+
+# Runtime partagé par le processus principal
+bot_runtime = BotRuntime(
+    idle_timeout=config.BOT_IDLE_TIMEOUT,
+    wake_interval=config.BOT_WAKE_INTERVAL,
+    startup_concurrency=config.BOT_STARTUP_CONCURRENCY,
+    max_restart_delay=config.BOT_RESTART_MAX_DELAY,
+    stall_timeout=config.BOT_STALL_TIMEOUT
+)
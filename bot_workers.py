@@ -0,0 +1,293 @@
+"""
+Répartition des bots fils sur plusieurs processus workers.
+
+Le superviseur lance un nombre fixe de workers (≈ nombre de cœurs). Chaque
+worker héberge ses bots dans une seule boucle asyncio (BotRuntime). Les bots
+sont attribués aux workers par hachage cohérent de l'identifiant du bot :
+quand le nombre de workers change, seuls les bots dont le worker change sont
+déplacés. Les workers démarrent en parallèle et un worker mort est relancé
+avec ses bots.
+
+Les commandes passent par un Pipe par worker : ("add", token, type) où le
+type choisit l'usine de l'Application (bot admin ou bot fils), ("remove",
+token, None), ("delete", token, None) pour un bot supprimé (son webhook est
+retiré), ("health", n° de demande, None) auquel le worker répond par
+("health", n° de demande, santé de ses bots) et ("stop", None, None).
+"""
+
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RING_REPLICAS = 64  # Points virtuels par worker sur l'anneau
+
+# Types de bots hébergés (voir user_administrator.build_bot_application)
+ADMIN_BOT = "admin"
+CHILD_BOT = "child"
+
+
+def bot_key(token: str) -> str:
+    """Identifiant du bot (partie du token avant ':'), stable si le token est régénéré"""
+    return token.split(':', 1)[0]
+
+
+class HashRing:
+    """Anneau de hachage cohérent avec points virtuels"""
+
+    def __init__(self, nodes: Iterable[int] = (), replicas: int = RING_REPLICAS):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, int] = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], 'big')
+
+    def add_node(self, node: int):
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove_node(self, node: int):
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+
+    def node_for(self, key: str) -> int:
+        if not self._points:
+            raise LookupError("Anneau vide")
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+
+def worker_main(index: int, conn, log_level: int = logging.INFO):
+    """Point d'entrée d'un processus worker"""
+    # Ctrl+C est reçu par tout le groupe : c'est le superviseur qui arrête les workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        format=f'%(asctime)s - worker{index} - %(name)s - %(levelname)s - %(message)s',
+        level=log_level
+    )
+    asyncio.run(_serve(index, conn))
+
+
+async def _serve(index: int, conn):
+    from utils.bot_runtime import bot_runtime
+    from utils.http_pool import http_pool
+    from utils.user_administrator import build_bot_application
+
+    loop = asyncio.get_running_loop()
+    commands: asyncio.Queue = asyncio.Queue()
+
+    def on_readable():
+        try:
+            while conn.poll():
+                commands.put_nowait(conn.recv())
+        except (EOFError, OSError):
+            # Superviseur disparu
+            loop.remove_reader(conn.fileno())
+            commands.put_nowait(("stop", None, None))
+
+    loop.add_reader(conn.fileno(), on_readable)
+    logger.info(f"Worker {index} prêt (pid {os.getpid()})")
+
+    def add(token: str, kind: str):
+        bot_runtime.add(token, lambda: build_bot_application(token, kind))
+
+    replies = asyncio.Lock()
+    health_reports = set()
+
+    async def report_health(request: int):
+        async with replies:
+            try:
+                # Envoi hors de la boucle : une grande table ne bloque pas les bots
+                await asyncio.to_thread(conn.send, ("health", request, bot_runtime.health_table()))
+            except (BrokenPipeError, OSError) as e:
+                logger.error(f"Santé non transmise au superviseur: {e}")
+
+    removals: Dict[str, asyncio.Task] = {}  # bot -> arrêt en cours
+    while True:
+        command, token, kind = await commands.get()
+        if command == "add":
+            pending = removals.get(bot_key(token))
+            if pending and not pending.done():
+                # Nouveau token : l'ancien doit avoir arrêté son getUpdates
+                pending.add_done_callback(lambda _, token=token, kind=kind: add(token, kind))
+            else:
+                add(token, kind)
+        elif command in ("remove", "delete"):
+            removals = {bot: task for bot, task in removals.items() if not task.done()}
+            removals[bot_key(token)] = asyncio.create_task(
+                bot_runtime.remove(token, delete_webhook=command == "delete")
+            )
+        elif command == "health":
+            report = asyncio.create_task(report_health(token))
+            health_reports.add(report)
+            report.add_done_callback(health_reports.discard)
+        elif command == "stop":
+            break
+
+    try:
+        loop.remove_reader(conn.fileno())
+    except (OSError, ValueError):
+        pass
+    await bot_runtime.stop_all()
+    await http_pool.close()
+    logger.info(f"Worker {index} arrêté")
+
+
+class BotSupervisor:
+    """Lance les workers et leur attribue les bots par hachage cohérent"""
+
+    def __init__(self, worker_count: Optional[int] = None):
+        self.worker_count = worker_count or os.cpu_count() or 1
+        self.ring = HashRing()
+        self.workers: Dict[int, Tuple[multiprocessing.Process, object]] = {}  # index -> (processus, pipe)
+        self.assignments: Dict[str, int] = {}  # token -> worker
+        self.kinds: Dict[str, str] = {}  # token -> type de bot
+        self._context = multiprocessing.get_context("spawn")
+        self._health_lock = asyncio.Lock()  # Une demande de santé à la fois par pipe
+        self._health_requests = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self.workers)
+
+    def _spawn(self, index: int):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, child_conn, logging.getLogger().level or logging.INFO),
+            name=f"bots-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self.workers[index] = (process, parent_conn)
+
+    def _send(self, index: int, command: str, token: Optional[str] = None, kind: Optional[str] = None):
+        try:
+            self.workers[index][1].send((command, token, kind))
+        except (KeyError, BrokenPipeError, OSError) as e:
+            # Le worker sera relancé par check_workers avec ses bots
+            logger.error(f"Worker {index} injoignable: {e}")
+
+    def start(self, bots: Dict[str, str]):
+        """Démarre tous les workers en parallèle puis leur répartit les bots (token -> type)"""
+        for index in range(self.worker_count):
+            self._spawn(index)
+            self.ring.add_node(index)
+        for token, kind in bots.items():
+            self.add_bot(token, kind)
+        logger.info(f"{len(self.assignments)} bots répartis sur {self.worker_count} workers")
+
+    def add_bot(self, token: str, kind: str) -> int:
+        """Attribue un bot à son worker (ou l'y déplace) et le démarre"""
+        index = self.ring.node_for(bot_key(token))
+        self.kinds[token] = kind
+        previous = self.assignments.get(token)
+        if previous == index:
+            return index
+        if previous is not None:
+            self._send(previous, "remove", token)
+        self.assignments[token] = index
+        self._send(index, "add", token, kind)
+        return index
+
+    def remove_bot(self, token: str, delete_webhook: bool = False):
+        index = self.assignments.pop(token, None)
+        self.kinds.pop(token, None)
+        if index is not None:
+            self._send(index, "delete" if delete_webhook else "remove", token)
+
+    def resize(self, worker_count: int) -> int:
+        """Change le nombre de workers ; retourne le nombre de bots déplacés"""
+        retired = [index for index in self.workers if index >= worker_count]
+        for index in range(self.worker_count, worker_count):
+            self._spawn(index)
+            self.ring.add_node(index)
+        for index in retired:
+            self.ring.remove_node(index)
+        self.worker_count = worker_count
+
+        moved = 0
+        for token, index in list(self.assignments.items()):
+            if self.ring.node_for(bot_key(token)) != index:
+                self.add_bot(token, self.kinds[token])
+                moved += 1
+
+        for index in retired:
+            self._send(index, "stop")
+            self._join_worker(index)
+        logger.info(f"Rééquilibrage: {moved} bots déplacés, {worker_count} workers")
+        return moved
+
+    def check_workers(self) -> int:
+        """Relance les workers morts et leur renvoie leurs bots"""
+        restarted = 0
+        for index, (process, conn) in list(self.workers.items()):
+            if process.is_alive():
+                continue
+            logger.error(f"Worker {index} arrêté (code {process.exitcode}), relance")
+            conn.close()
+            self._spawn(index)
+            for token, owner in self.assignments.items():
+                if owner == index:
+                    self._send(index, "add", token, self.kinds[token])
+            restarted += 1
+        return restarted
+
+    async def health_table(self, timeout: float = 3.0) -> List[Dict[str, Any]]:
+        """Santé de chaque bot, demandée à tous les workers (champ 'worker' ajouté)"""
+        async with self._health_lock:
+            self._health_requests += 1
+            request = self._health_requests
+            for index in list(self.workers):
+                self._send(index, "health", request)
+            return await asyncio.to_thread(self._receive_health, request, timeout)
+
+    def _receive_health(self, request: int, timeout: float) -> List[Dict[str, Any]]:
+        rows = []
+        deadline = time.monotonic() + timeout
+        for index, (_, conn) in list(self.workers.items()):
+            try:
+                while conn.poll(max(0.0, deadline - time.monotonic())):
+                    command, reply_to, table = conn.recv()
+                    # Une réponse arrivée après le délai d'une demande précédente est ignorée
+                    if command == "health" and reply_to == request:
+                        rows.extend(dict(row, worker=index) for row in table)
+                        break
+                else:
+                    logger.warning(f"Worker {index}: santé non reçue en {timeout:.0f}s")
+            except (EOFError, OSError) as e:
+                logger.error(f"Worker {index} injoignable: {e}")
+        return rows
+
+    def distribution(self) -> Dict[int, int]:
+        """Nombre de bots par worker"""
+        return dict(Counter(self.assignments.values()))
+
+    def _join_worker(self, index: int, timeout: float = 30.0):
+        process, conn = self.workers.pop(index)
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+        conn.close()
+
+    def stop(self, timeout: float = 30.0):
+        """Arrête tous les workers (en parallèle) et attend leur fin"""
+        for index in self.workers:
+            self._send(index, "stop")
+        for index in list(self.workers):
+            self._join_worker(index, timeout)
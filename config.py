@@ -25,6 +25,31 @@ class Config:
     VALIDATE_TOKENS = True
     MAX_TOKEN_RETRIES = 3
     
+    # API Bot (remplaçable par un serveur local ou une API factice pour les tests)
+    BOT_API_BASE_URL = os.getenv('BOT_API_BASE_URL', "https://api.telegram.org/bot")
+
+    # Pool HTTP partagé par tous les bots
+    HTTP_MAX_CONCURRENCY = int(os.getenv('HTTP_MAX_CONCURRENCY', "64"))  # Appels simultanés (hors getUpdates)
+    HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', "") == "1"  # Nécessite le paquet h2
+
+    # Processus workers des bots fils (0 : bots hébergés par le processus principal)
+    CHILD_BOT_WORKERS = int(os.getenv('CHILD_BOT_WORKERS', "0"))
+    BOT_STARTUP_CONCURRENCY = int(os.getenv('BOT_STARTUP_CONCURRENCY', "20"))  # Démarrages simultanés
+
+    # Mise en veille des bots inactifs (0 : jamais)
+    BOT_IDLE_TIMEOUT = int(os.getenv('BOT_IDLE_TIMEOUT', "1800"))  # Secondes sans mise à jour
+    BOT_WAKE_INTERVAL = int(os.getenv('BOT_WAKE_INTERVAL', "20"))  # Vérification des bots en veille
+
+    # Supervision des bots : redémarrage avec délai exponentiel, polling bloqué
+    BOT_RESTART_MAX_DELAY = int(os.getenv('BOT_RESTART_MAX_DELAY', "300"))  # Délai maximal entre deux redémarrages
+    BOT_STALL_TIMEOUT = int(os.getenv('BOT_STALL_TIMEOUT', "120"))  # Secondes sans getUpdates réussi
+
+    # Webhooks : mode polling si WEBHOOK_URL est vide
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL', "")  # URL publique, ex: https://bots.example.com
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', "0.0.0.0")
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', "8443"))
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', "")  # Chemins stables entre redémarrages si défini
+
     # Debug
     DEBUG_MODE = True
     LOG_LEVEL = "DEBUG"
@@ -1,9 +1,13 @@
 import json
 import logging
 import os
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 
+from .popular_searches import search_trends, GLOBAL_SCOPE
+from .search_cache import search_cache, user_scope
+
 logger = logging.getLogger(__name__)
 
 # Solution pour éviter les imports circulaires
@@ -144,6 +148,71 @@ class DatabaseManager:
         user_data['pin'] = pin
         self.save_user(user_data)
 
+    # Documents indexés : fiches par utilisateur, contenu dans le BlobStore
+    def create_indexed_document(self, doc_data: Dict[str, Any]) -> str:
+        """Enregistre la fiche d'un document indexé et retourne son ID"""
+        user_id = str(doc_data['user_id'])
+        doc_id = f"{user_id}-{doc_data['content_hash'][:16]}"
+        self.db.save('documents', doc_id, dict(doc_data, id=doc_id))
+
+        user_index = self.db.load('user_documents', user_id) or {}
+        user_index[doc_data['content_hash']] = doc_id
+        self.db.save('user_documents', user_id, user_index)
+        return doc_id
+
+    def get_indexed_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self.db.load('documents', doc_id)
+
+    def get_document_by_hash(self, user_id: int, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Retourne la fiche d'un utilisateur pointant vers ce contenu"""
+        user_index = self.db.load('user_documents', str(user_id)) or {}
+        doc_id = user_index.get(content_hash)
+        return self.get_indexed_document(doc_id) if doc_id else None
+
+    def get_user_documents(self, user_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Documents d'un utilisateur, du plus récent au plus ancien"""
+        user_index = self.db.load('user_documents', str(user_id)) or {}
+        documents = [doc for doc in map(self.get_indexed_document, user_index.values()) if doc]
+        documents.sort(key=lambda doc: str(doc.get('indexed_at', '')), reverse=True)
+        return documents[:limit] if limit else documents
+
+    def search_documents(self, user_id: int, search_terms: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        """Documents candidats d'une recherche (le score est calculé par l'appelant)"""
+        return self.get_user_documents(user_id)
+
+    def delete_indexed_document(self, user_id: int, doc_id: str) -> bool:
+        """Supprime la fiche d'un document (le blob est libéré par l'appelant)"""
+        document = self.get_indexed_document(doc_id)
+        if not document or str(document.get('user_id')) != str(user_id):
+            return False
+
+        user_index = self.db.load('user_documents', str(user_id)) or {}
+        user_index.pop(document['content_hash'], None)
+        self.db.save('user_documents', str(user_id), user_index)
+        deleted = self.db.delete('documents', doc_id)
+        search_cache.bump(user_scope(user_id))
+        return deleted
+
+    # Statistiques de recherche (résumés Space-Saving par fenêtre jour/mois)
+    # La limite quotidienne utilise un compteur exact par utilisateur, écrit à chaque recherche
+    def log_search(self, user_id: int, query: str, results_count: int) -> None:
+        today = datetime.now().strftime("%Y-%m-%d")
+        counter = self.db.load('search_counts', str(user_id)) or {}
+        count = counter.get('count', 0) if counter.get('day') == today else 0
+        self.db.save('search_counts', str(user_id), {'day': today, 'count': count + 1})
+        search_trends.record(query, user_id=user_id)
+
+    def get_daily_search_count(self, user_id: int) -> int:
+        counter = self.db.load('search_counts', str(user_id)) or {}
+        return counter.get('count', 0) if counter.get('day') == datetime.now().strftime("%Y-%m-%d") else 0
+
+    def get_monthly_search_count(self) -> int:
+        return search_trends.total(GLOBAL_SCOPE, "month")
+
+    def get_popular_searches(self, user_id: Optional[int] = None, window: str = "month", limit: int = 5) -> List[Dict[str, Any]]:
+        scope = user_scope(user_id) if user_id is not None else GLOBAL_SCOPE
+        return search_trends.top(scope, window, limit)
+
 # Initialisation différée pour éviter les erreurs au chargement
 _disk_db_instance = None
 
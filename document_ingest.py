@@ -0,0 +1,59 @@
+"""
+Téléchargement des documents à indexer sans passer par le disque.
+
+Les fichiers sous le seuil sont téléchargés dans un tampon mémoire ; au-delà,
+un fichier temporaire est utilisé puis supprimé quoi qu'il arrive. Le nombre
+d'ingestions simultanées est limité pour borner la mémoire consommée.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import tempfile
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+MEMORY_THRESHOLD = 8 * 1024 * 1024   # 8MB téléchargés en mémoire au maximum
+MAX_CONCURRENT_INGESTS = 4
+
+# Un sémaphore par boucle asyncio (les bots peuvent tourner dans des boucles distinctes)
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_INGESTS)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+@asynccontextmanager
+async def downloaded_document(file, file_size: Optional[int], suffix: str = "") -> AsyncIterator[Union[bytes, str]]:
+    """Télécharge un fichier Telegram et fournit une source pour l'extracteur.
+
+    La source est le contenu binaire (petits fichiers) ou le chemin d'un
+    fichier temporaire supprimé à la sortie du bloc.
+    """
+    async with _get_semaphore():
+        if file_size is not None and file_size <= MEMORY_THRESHOLD:
+            buffer = io.BytesIO()
+            await file.download_to_memory(out=buffer)
+            yield buffer.getvalue()
+            return
+
+        fd, temp_path = tempfile.mkstemp(prefix="ingest_", suffix=suffix)
+        os.close(fd)
+        try:
+            await file.download_to_drive(temp_path)
+            yield temp_path
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError as e:
+                logger.warning(f"Fichier temporaire non supprimé {temp_path}: {e}")
@@ -0,0 +1,672 @@
+"""
+Index des fichiers des groupes de recherche, partitionné par groupe.
+
+Chaque groupe possède son propre shard (fiches, postings, statistiques) et
+son propre répertoire de persistance. Les shards sont chargés à la première
+requête et retirés de la mémoire lorsqu'ils sont inactifs.
+
+Les facettes (type, auteur, mois d'envoi) sont tenues à jour à l'indexation
+sous forme d'ensembles d'identifiants : les filtres s'appliquent par
+intersection et les compteurs se calculent sans relire les fiches.
+
+Persistance d'un shard :
+  - les derniers ajouts vivent en mémoire (MemTable) et sont journalisés
+    ligne par ligne dans log_<n>.jsonl ;
+  - au-delà de FLUSH_THRESHOLD fiches, la MemTable devient un segment
+    binaire immuable (voir index_segments), lu par mmap au chargement ;
+  - les suppressions de fiches déjà écrites sont des tombes numérotées ;
+  - au-delà de MERGE_THRESHOLD segments, ils sont fusionnés en arrière-plan ;
+  - manifest.json décrit l'état courant et est remplacé atomiquement.
+
+Le groupe de chaque file_id est noté dans des compartiments JSON
+(FileLocator) : une recherche de fiche sans groupe (liens download_) charge
+le shard concerné même s'il a été retiré de la mémoire.
+
+Déduplication Telegram : le file_unique_id d'une fiche est un terme de ses
+segments (retrouvé dans le groupe sans table annexe), et une table globale
+compacte (KnownFiles, mêmes compartiments) garde le titre et la légende de
+chaque fichier déjà indexé dans un groupe.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .index_segments import Segment, facet_term, write_segment
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+FACETS = ("file_type", "uploader", "month")
+UNIQUE_KEY = "unique"  # Terme de segment du file_unique_id Telegram
+
+FLUSH_THRESHOLD = 512  # Fiches en mémoire avant écriture d'un segment
+MERGE_THRESHOLD = 4    # Segments avant fusion en arrière-plan
+LOCATOR_BUCKETS = 4096  # Compartiments du répertoire file_id -> groupes
+
+
+def tokenize(text: str) -> Set[str]:
+    """Termes indexables d'un titre ou d'une description"""
+    return {term for term in _TOKEN.findall((text or "").lower()) if len(term) > 1}
+
+
+def file_terms(file_data: Dict[str, Any]) -> Set[str]:
+    return tokenize(f"{file_data.get('title') or ''} {file_data.get('description') or ''}")
+
+
+def facet_values(record: Dict[str, Any]) -> Dict[str, str]:
+    """Valeur de chaque facette pour une fiche (mois au format AAAA-MM)"""
+    values = {"file_type": record.get('file_type', 'document')}
+    if record.get('user_id') is not None:
+        values["uploader"] = str(record['user_id'])
+    if record.get('timestamp'):
+        values["month"] = str(record['timestamp'])[:7]
+    return values
+
+
+def segment_facets(record: Dict[str, Any]) -> Dict[str, str]:
+    """Facettes écrites dans un segment, plus le file_unique_id de la fiche"""
+    values = facet_values(record)
+    if record.get('file_unique_id'):
+        values[UNIQUE_KEY] = record['file_unique_id']
+    return values
+
+
+class MemTable:
+    """Fiches, postings et facettes des ajouts pas encore écrits en segment"""
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.facets: Dict[str, Dict[str, Set[str]]] = {facet: {} for facet in FACETS}
+        self.unique_ids: Dict[str, str] = {}  # file_unique_id -> file_id
+
+    def add(self, record: Dict[str, Any]):
+        file_id = record['file_id']
+        if file_id in self.files:
+            self.remove(file_id)
+        self.files[file_id] = record
+        if record.get('file_unique_id'):
+            self.unique_ids[record['file_unique_id']] = file_id
+
+        for term in file_terms(record):
+            self.postings.setdefault(term, set()).add(file_id)
+        for facet, value in facet_values(record).items():
+            self.facets[facet].setdefault(value, set()).add(file_id)
+
+    def remove(self, file_id: str) -> bool:
+        record = self.files.pop(file_id, None)
+        if record is None:
+            return False
+        if self.unique_ids.get(record.get('file_unique_id')) == file_id:
+            del self.unique_ids[record['file_unique_id']]
+
+        for term in file_terms(record):
+            file_ids = self.postings.get(term)
+            if file_ids:
+                file_ids.discard(file_id)
+                if not file_ids:
+                    del self.postings[term]
+        for facet, value in facet_values(record).items():
+            file_ids = self.facets[facet].get(value)
+            if file_ids:
+                file_ids.discard(file_id)
+                if not file_ids:
+                    del self.facets[facet][value]
+        return True
+
+
+class GroupShard:
+    """Fiches, postings et statistiques des fichiers d'un groupe"""
+
+    def __init__(self, group_id: int, path: Path):
+        self.group_id = group_id
+        self.path = path
+        self.memtable = MemTable()
+        self.segments: List[Segment] = []   # Du plus ancien au plus récent
+        self.deleted: Dict[str, int] = {}   # file_id -> segments antérieurs masqués
+        self.next_seq = 0
+        self.log_name = "log_000000.jsonl"
+        self.last_access = time.monotonic()
+        self.merging = False
+        self._log = None
+        self._lock = threading.RLock()
+
+    # --- Lecture ---
+
+    def _hidden(self, file_id: str, segment: Segment) -> bool:
+        return self.deleted.get(file_id, -1) > segment.seq
+
+    def _segment_ids(self, segment: Segment, numbers: List[int]) -> Iterator[Tuple[str, int]]:
+        """file_id vivants parmi des numéros de fiches d'un segment"""
+        for number in numbers:
+            file_id = segment.key(number)
+            if not self._hidden(file_id, segment):
+                yield file_id, number
+
+    def _locate(self, file_id: str) -> Optional[Tuple[Segment, int]]:
+        for segment in reversed(self.segments):
+            number = segment.doc_number(file_id)
+            if number is not None and not self._hidden(file_id, segment):
+                return segment, number
+        return None
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self.memtable.files.get(file_id)
+            if record is not None:
+                return record
+            location = self._locate(file_id)
+            return location[0].record(location[1]) if location else None
+
+    def find_unique(self, file_unique_id: str) -> Optional[Dict[str, Any]]:
+        """Fiche vivante d'un fichier Telegram (file_unique_id) dans ce groupe"""
+        with self._lock:
+            file_id = self.memtable.unique_ids.get(file_unique_id)
+            if file_id is not None:
+                return self.memtable.files[file_id]
+            for segment in reversed(self.segments):
+                numbers = segment.postings(facet_term(UNIQUE_KEY, file_unique_id))
+                for file_id, number in self._segment_ids(segment, numbers):
+                    if file_id not in self.memtable.files:
+                        return segment.record(number)
+            return None
+
+    def file_ids(self) -> Iterator[str]:
+        """Identifiants de toutes les fiches vivantes du shard"""
+        with self._lock:
+            yield from list(self.memtable.files)
+            for segment in self.segments:
+                for number in range(segment.doc_count):
+                    file_id = segment.key(number)
+                    if file_id not in self.memtable.files and not self._hidden(file_id, segment):
+                        yield file_id
+
+    def filter_ids(self, filters: Optional[Dict[str, str]]) -> Optional[Set[str]]:
+        """Intersection des ensembles des facettes filtrées (None sans filtre)"""
+        selected = None
+        for facet, value in (filters or {}).items():
+            file_ids = set(self.memtable.facets.get(facet, {}).get(value, ()))
+            for segment in self.segments:
+                numbers = segment.postings(facet_term(facet, value))
+                file_ids.update(file_id for file_id, _ in self._segment_ids(segment, numbers))
+            selected = file_ids if selected is None else selected & file_ids
+        return selected
+
+    def facet_counts(self, file_ids: Optional[Set[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Compteurs par valeur de facette, sur tout le groupe ou sur des fichiers donnés"""
+        with self._lock:
+            counts = {}
+            for facet in FACETS:
+                values: Dict[str, int] = {}
+                for value, ids in self.memtable.facets[facet].items():
+                    count = len(ids) if file_ids is None else len(ids & file_ids)
+                    if count:
+                        values[value] = count
+                for segment in self.segments:
+                    for value, numbers in segment.facet_values(facet):
+                        if file_ids is None and not self.deleted:
+                            count = len(numbers)
+                        else:
+                            count = sum(
+                                1 for file_id, _ in self._segment_ids(segment, numbers)
+                                if file_ids is None or file_id in file_ids
+                            )
+                        if count:
+                            values[value] = values.get(value, 0) + count
+                counts[facet] = values
+            return counts
+
+    def _match(self, query: str, filters: Optional[Dict[str, str]] = None):
+        allowed = self.filter_ids(filters)
+        scores: Dict[str, int] = {}
+        locations: Dict[str, Tuple[Segment, int]] = {}
+        for term in tokenize(query):
+            for file_id in self.memtable.postings.get(term, ()):
+                if allowed is None or file_id in allowed:
+                    scores[file_id] = scores.get(file_id, 0) + 1
+            for segment in self.segments:
+                for file_id, number in self._segment_ids(segment, segment.postings(term)):
+                    if allowed is None or file_id in allowed:
+                        scores[file_id] = scores.get(file_id, 0) + 1
+                        locations[file_id] = (segment, number)
+        return scores, locations
+
+    def match(self, query: str, filters: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+        """Score (termes trouvés) de chaque fichier correspondant à la requête"""
+        with self._lock:
+            return self._match(query, filters)[0]
+
+    def _rank(self, scores, locations, limit: int) -> List[Dict[str, Any]]:
+        records = {
+            file_id: self.memtable.files.get(file_id) or locations[file_id][0].record(locations[file_id][1])
+            for file_id in scores
+        }
+        ranked = sorted(
+            scores,
+            key=lambda file_id: (scores[file_id], records[file_id].get('timestamp') or ''),
+            reverse=True
+        )
+        return [records[file_id] for file_id in ranked[:limit]]
+
+    def search(self, query: str, limit: int = 200, filters: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Fichiers contenant au moins un terme, les plus pertinents d'abord"""
+        with self._lock:
+            scores, locations = self._match(query, filters)
+            return self._rank(scores, locations, limit)
+
+    def search_faceted(self, query: str, limit: int = 200, filters: Optional[Dict[str, str]] = None):
+        with self._lock:
+            scores, locations = self._match(query, filters)
+            return self._rank(scores, locations, limit), self.facet_counts(set(scores))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            facets = self.facet_counts()
+            return {
+                "files": sum(facets["file_type"].values()),
+                "by_type": facets["file_type"],
+                "terms": len(self.memtable.postings) + sum(segment.text_term_count() for segment in self.segments),
+                "segments": len(self.segments),
+                "facets": facets
+            }
+
+    # --- Écriture ---
+
+    def _append_log(self, *entries: Dict[str, Any]):
+        if self._log is None:
+            self._log = open(self.path / self.log_name, 'a')
+        self._log.write("".join(json.dumps(entry, default=str) + "\n" for entry in entries))
+        self._log.flush()
+
+    def add(self, file_data: Dict[str, Any]) -> bool:
+        """Ajoute ou remplace la fiche d'un fichier"""
+        return self.add_many([file_data]) == 1
+
+    def add_many(self, files: List[Dict[str, Any]]) -> int:
+        """Ajoute des fiches avec une seule écriture dans le journal"""
+        with self._lock:
+            entries = []
+            for file_data in files:
+                record = dict(file_data)
+                if record.get('timestamp') is not None:
+                    record['timestamp'] = str(record['timestamp'])
+                file_id = record['file_id']
+
+                if file_id not in self.memtable.files and self._locate(file_id):
+                    self.deleted[file_id] = self.next_seq
+                    entries.append({"op": "del", "file_id": file_id, "v": self.next_seq})
+                entries.append({"op": "add", "file": record})
+                self.memtable.add(record)
+
+            self._append_log(*entries)
+            if len(self.memtable.files) >= FLUSH_THRESHOLD:
+                self.flush()
+            return len(files)
+
+    def remove(self, file_id: str) -> bool:
+        with self._lock:
+            removed = self.memtable.remove(file_id)
+            version = None
+            if self._locate(file_id):
+                version = self.deleted[file_id] = self.next_seq
+                removed = True
+            if removed:
+                self._append_log({"op": "del", "file_id": file_id, "v": version})
+            return removed
+
+    def _write_manifest(self):
+        temp_path = self.path / "manifest.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({
+                "group_id": self.group_id,
+                "next_seq": self.next_seq,
+                "segments": [{"seq": segment.seq, "file": segment.path.name} for segment in self.segments],
+                "deleted": self.deleted,
+                "log": self.log_name
+            }, f)
+        temp_path.replace(self.path / "manifest.json")  # Remplacement atomique
+
+    def flush(self):
+        """Écrit la MemTable dans un nouveau segment et repart d'un journal vide"""
+        with self._lock:
+            if not self.memtable.files:
+                return
+            seq = self.next_seq
+            segment_path = self.path / f"seg_{seq:06d}.tsg"
+            write_segment(segment_path, self.memtable.files, file_terms, segment_facets)
+            self.segments.append(Segment(segment_path, seq))
+
+            old_log = self.path / self.log_name
+            if self._log:
+                self._log.close()
+                self._log = None
+            self.next_seq = seq + 1
+            self.log_name = f"log_{self.next_seq:06d}.jsonl"
+            self.memtable = MemTable()
+            self._write_manifest()
+            old_log.unlink(missing_ok=True)
+
+            if len(self.segments) >= MERGE_THRESHOLD and not self.merging:
+                self.merging = True
+                threading.Thread(target=self._merge, args=(list(self.segments),), daemon=True).start()
+
+    def _merge(self, snapshot: List[Segment]):
+        """Fusionne des segments en un seul, hors du verrou sauf pour l'échange final"""
+        try:
+            with self._lock:
+                deleted = dict(self.deleted)
+            records = {}
+            for segment in snapshot:
+                for number in range(segment.doc_count):
+                    file_id = segment.key(number)
+                    if deleted.get(file_id, -1) <= segment.seq:
+                        records[file_id] = segment.record(number)
+
+            seq = max(segment.seq for segment in snapshot)
+            merged_path = self.path / f"seg_{seq:06d}_m{time.time_ns()}.tsg"
+            write_segment(merged_path, records, file_terms, segment_facets)
+
+            with self._lock:
+                self.segments = [Segment(merged_path, seq)] + [
+                    segment for segment in self.segments if segment not in snapshot
+                ]
+                oldest = min(segment.seq for segment in self.segments)
+                self.deleted = {file_id: version for file_id, version in self.deleted.items() if version > oldest}
+                self._write_manifest()
+            for segment in snapshot:
+                segment.path.unlink(missing_ok=True)
+            logger.info(f"Shard {self.group_id}: {len(snapshot)} segments fusionnés ({len(records)} fichiers)")
+        except Exception as e:
+            logger.error(f"Erreur fusion des segments du shard {self.group_id}: {e}")
+        finally:
+            self.merging = False
+
+    def close(self):
+        with self._lock:
+            if self._log:
+                self._log.close()
+                self._log = None
+
+    # --- Chargement ---
+
+    def load(self):
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            manifest_path = self.path / "manifest.json"
+            if manifest_path.exists():
+                with open(manifest_path, 'r') as f:
+                    manifest = json.load(f)
+                self.next_seq = manifest.get("next_seq", 0)
+                self.deleted = manifest.get("deleted", {})
+                self.log_name = manifest.get("log", self.log_name)
+                self.segments = [
+                    Segment(self.path / entry["file"], entry["seq"]) for entry in manifest.get("segments", [])
+                ]
+
+            # Fichiers orphelins d'une écriture ou d'une fusion interrompue
+            known = {segment.path.name for segment in self.segments} | {self.log_name}
+            for stray in self.path.iterdir():
+                if stray.name not in known and stray.suffix in (".tsg", ".tmp", ".jsonl"):
+                    stray.unlink(missing_ok=True)
+
+            self._replay_log()
+        except Exception as e:
+            logger.error(f"Erreur chargement shard {self.group_id}: {e}")
+
+    def _replay_log(self):
+        log_path = self.path / self.log_name
+        if not log_path.exists():
+            return
+        with open(log_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Dernière ligne incomplète après un arrêt brutal
+                if entry["op"] == "add":
+                    self.memtable.add(entry["file"])
+                else:
+                    self.memtable.remove(entry["file_id"])
+                    if entry.get("v") is not None:
+                        self.deleted[entry["file_id"]] = entry["v"]
+
+
+class BucketTable:
+    """Table clé -> valeur en compartiments JSON chargés à la demande (LRU)"""
+
+    def __init__(self, path: Path, cache_size: int = 64):
+        self.path = path
+        self.cache_size = cache_size
+        self._buckets: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @staticmethod
+    def _bucket_name(key: str) -> str:
+        number = int(hashlib.md5(key.encode()).hexdigest()[:8], 16) % LOCATOR_BUCKETS
+        return f"{number:04x}"
+
+    def _bucket(self, name: str) -> Dict[str, Any]:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            try:
+                with open(self.path / f"{name}.json", 'r') as f:
+                    bucket = json.load(f)
+            except FileNotFoundError:
+                bucket = {}
+            except ValueError:
+                logger.error(f"Compartiment {name} de {self.path.name} illisible")
+                bucket = {}
+            self._buckets[name] = bucket
+            while len(self._buckets) > self.cache_size:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(name)
+        return bucket
+
+    def _save(self, name: str):
+        self.path.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path / f"{name}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._buckets[name], f)
+        temp_path.replace(self.path / f"{name}.json")
+
+
+class FileLocator(BucketTable):
+    """Groupes de chaque file_id, en compartiments JSON chargés à la demande"""
+
+    def groups(self, file_id: str) -> List[int]:
+        return list(self._bucket(self._bucket_name(file_id)).get(file_id, ()))
+
+    def add(self, pairs: List[Tuple[str, int]]):
+        """Note le groupe de chaque (file_id, groupe) ; une écriture par compartiment modifié"""
+        changed = set()
+        for file_id, group_id in pairs:
+            name = self._bucket_name(file_id)
+            groups = self._bucket(name).setdefault(file_id, [])
+            if group_id not in groups:
+                groups.append(group_id)
+                changed.add(name)
+        for name in changed:
+            self._bucket(name)
+            self._save(name)
+
+    def remove(self, file_id: str, group_id: int):
+        name = self._bucket_name(file_id)
+        bucket = self._bucket(name)
+        groups = bucket.get(file_id)
+        if groups and group_id in groups:
+            groups.remove(group_id)
+            if not groups:
+                del bucket[file_id]
+            self._save(name)
+
+
+class KnownFiles(BucketTable):
+    """Titre et légende de chaque file_unique_id déjà indexé dans un groupe.
+
+    Une entrée n'est pas retirée quand la fiche est supprimée : le fichier a
+    déjà été récompensé et ne doit pas l'être à nouveau ailleurs.
+    """
+
+    def get(self, file_unique_id: str) -> Optional[Dict[str, str]]:
+        entry = self._bucket(self._bucket_name(file_unique_id)).get(file_unique_id)
+        if entry is None:
+            return None
+        return {'title': entry[0], 'description': entry[1]}
+
+    def remember(self, file_unique_id: str, title: str, description: str):
+        name = self._bucket_name(file_unique_id)
+        bucket = self._bucket(name)
+        entry = [title or "", description or ""]
+        if file_unique_id not in bucket or (any(entry) and bucket[file_unique_id] != entry):
+            bucket[file_unique_id] = entry
+            self._save(name)
+
+
+class ShardedFileIndex:
+    """Ensemble des shards de groupes, chargés à la demande"""
+
+    def __init__(self, path, max_resident: int = 64, idle_ttl: int = 1800):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_resident = max_resident  # Shards conservés en mémoire au maximum
+        self.idle_ttl = idle_ttl          # Secondes d'inactivité avant éviction
+        self._shards: "OrderedDict[int, GroupShard]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.locator = FileLocator(self.path / "locator")
+        self.known_files = KnownFiles(self.path / "known")
+        if not self.locator.exists:
+            self._build_locator()
+
+    def _stored_groups(self) -> List[int]:
+        """Groupes ayant un shard sur disque"""
+        groups = set()
+        for entry in self.path.glob("group_*"):
+            if not entry.is_dir():
+                continue
+            try:
+                groups.add(int(entry.name[len("group_"):].replace('m', '-')))
+            except ValueError:
+                continue
+        return sorted(groups)
+
+    def _build_locator(self):
+        """Construit le répertoire des fichiers des shards existants (une seule fois)"""
+        groups = self._stored_groups()
+        for group_id in groups:
+            with self._lock:
+                shard = self._shards.get(group_id)
+                resident = shard is not None
+                if not resident:
+                    shard = GroupShard(group_id, self._shard_path(group_id))
+                    shard.load()
+                self.locator.add([(file_id, group_id) for file_id in shard.file_ids()])
+                if not resident:
+                    shard.close()
+        self.locator.path.mkdir(parents=True, exist_ok=True)
+        if groups:
+            logger.info(f"Répertoire des fichiers construit pour {len(groups)} groupes")
+
+    def _shard_path(self, group_id: int) -> Path:
+        return self.path / f"group_{str(group_id).replace('-', 'm')}"
+
+    def shard(self, group_id: int) -> GroupShard:
+        """Retourne le shard d'un groupe en le chargeant si nécessaire"""
+        with self._lock:
+            shard = self._shards.get(group_id)
+            if shard is None:
+                shard = GroupShard(group_id, self._shard_path(group_id))
+                shard.load()
+                self._shards[group_id] = shard
+            self._shards.move_to_end(group_id)
+            shard.last_access = time.monotonic()
+            self.evict_idle()
+            return shard
+
+    def evict_idle(self):
+        """Retire de la mémoire les shards inactifs ou en surnombre"""
+        with self._lock:
+            now = time.monotonic()
+            for group_id in list(self._shards):
+                if len(self._shards) <= 1:
+                    break
+                shard = self._shards[group_id]
+                if shard.merging:
+                    continue  # La fusion en cours doit se terminer sur ce shard
+                if len(self._shards) > self.max_resident or now - shard.last_access > self.idle_ttl:
+                    shard.close()  # La MemTable reste rejouable depuis le journal
+                    del self._shards[group_id]
+                else:
+                    break  # Ordre LRU : les suivants sont plus récents
+
+    def resident_groups(self) -> List[int]:
+        return list(self._shards)
+
+    def index_file(self, file_data: Dict[str, Any]) -> bool:
+        with self._lock:
+            added = self.shard(file_data['group_id']).add(file_data)
+            self.locator.add([(file_data['file_id'], file_data['group_id'])])
+            return added
+
+    def index_files(self, files: List[Dict[str, Any]]) -> int:
+        """Indexe un lot de fiches, regroupées par groupe"""
+        by_group: Dict[int, List[Dict[str, Any]]] = {}
+        for file_data in files:
+            by_group.setdefault(file_data['group_id'], []).append(file_data)
+        with self._lock:
+            added = sum(self.shard(group_id).add_many(batch) for group_id, batch in by_group.items())
+            self.locator.add([(file_data['file_id'], file_data['group_id']) for file_data in files])
+            return added
+
+    def remove_file(self, group_id: int, file_id: str) -> bool:
+        with self._lock:
+            removed = self.shard(group_id).remove(file_id)
+            self.locator.remove(file_id, group_id)
+            return removed
+
+    def search(self, query: str, group_id: int, limit: int = 200,
+               filters: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self.shard(group_id).search(query, limit, filters)
+
+    def search_faceted(self, query: str, group_id: int, limit: int = 200,
+                       filters: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, int]]]:
+        """Résultats et compteurs de facettes de l'ensemble des correspondances"""
+        with self._lock:
+            return self.shard(group_id).search_faceted(query, limit, filters)
+
+    def get_file(self, file_id: str, group_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Retrouve une fiche dans le groupe indiqué ou, sans groupe, via le répertoire des fichiers"""
+        with self._lock:
+            if group_id is not None:
+                return self.shard(group_id).get(file_id)
+            for group in self.locator.groups(file_id):
+                record = self.shard(group).get(file_id)
+                if record is not None:
+                    return record
+            return None
+
+    def find_unique(self, file_unique_id: str, group_id: int) -> Optional[Dict[str, Any]]:
+        """Fiche d'un fichier Telegram déjà indexé dans ce groupe (seul son shard est chargé)"""
+        with self._lock:
+            return self.shard(group_id).find_unique(file_unique_id)
+
+    def stats(self, group_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return self.shard(group_id).stats()
+
+    def flush(self):
+        """Écrit en segments les MemTables des shards en mémoire"""
+        with self._lock:
+            for shard in self._shards.values():
+                shard.flush()
@@ -1,7 +1,13 @@
+import asyncio
+import io
 import logging
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import CallbackContext, MessageHandler, CallbackQueryHandler, filters
+from telegram.ext import CallbackContext, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 from utils.memory_full import db
+from utils.search_cache import search_cache, group_scope
+from utils import document_ingest
+from utils.history_backfill import TelegramExport, backfill_group
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +19,42 @@ class FileIndexer:
         'audio': {'emoji': '🎧', 'reward': 5}
     }
 
+    @staticmethod
+    def index_known_file(file_data) -> bool:
+        """Traite sans invitation ni récompense un fichier déjà indexé dans ce groupe.
+
+        Seule la légende est fusionnée dans la fiche existante. Retourne False
+        pour un fichier absent du groupe (même s'il est connu d'un autre groupe).
+        """
+        group_id = file_data['group_id']
+        existing = db.find_file_by_unique_id(file_data['file_unique_id'], group_id)
+        if existing:
+            if db.merge_file_caption(existing, file_data['description']):
+                search_cache.bump(group_scope(group_id))
+            logger.debug(f"Fichier {file_data['file_unique_id']} déjà indexé dans {group_id}")
+            return True
+        return False
+
+    @staticmethod
+    def reuse_known_metadata(file_data) -> bool:
+        """Complète le titre et la légende d'un fichier déjà indexé dans un autre groupe.
+
+        Retourne True si le fichier est connu : il a déjà été récompensé.
+        """
+        known = db.known_file_metadata(file_data['file_unique_id'])
+        if known is None:
+            return False
+        file_data['title'] = file_data['title'] or known.get('title') or ""
+        file_data['description'] = file_data['description'] or known.get('description') or ""
+        return True
+
+    @staticmethod
+    def reward_for(file_data) -> int:
+        """Crédits d'un fichier accepté : aucun s'il est déjà indexé dans un groupe"""
+        if db.known_file_metadata(file_data.get('file_unique_id')) is not None:
+            return 0
+        return FileIndexer.FILE_TYPES.get(file_data['file_type'], {'reward': 5})['reward']
+
     @staticmethod
     def register(application):
         async def handle_file(update: Update, context: CallbackContext):
@@ -46,32 +88,38 @@ class FileIndexer:
             }
 
             if file_type == 'document':
-                file_data['file_id'] = message.document.file_id
+                media = message.document
                 file_data['title'] = message.document.file_name
             elif file_type == 'photo':
-                file_data['file_id'] = message.photo[-1].file_id
+                media = message.photo[-1]
             elif file_type == 'video':
-                file_data['file_id'] = message.video.file_id
+                media = message.video
                 file_data['title'] = message.video.file_name or "Vidéo sans titre"
             elif file_type == 'audio':
-                file_data['file_id'] = message.audio.file_id
+                media = message.audio
                 file_data['title'] = message.audio.title or "Audio sans titre"
+            file_data['file_id'] = media.file_id
+            file_data['file_unique_id'] = media.file_unique_id
+
+            if FileIndexer.index_known_file(file_data):
+                return
+            already_rewarded = FileIndexer.reuse_known_metadata(file_data)
 
             db.set_temp_file_data(message.message_id, file_data)
 
+            if already_rewarded:
+                accept_label = "🤝 Indexer sans crédits"
+                prompt = "📥 Fichier déjà indexé dans un autre groupe. Voulez-vous l'ajouter à ce groupe (sans crédits)?"
+            else:
+                accept_label = f"🤝 Accepter {file_meta['reward']} crédits"
+                prompt = f"📥 Fichier détecté! Voulez-vous l'indexer pour {file_meta['reward']} crédits?"
             keyboard = [[
-                InlineKeyboardButton(
-                    f"🤝 Accepter {file_meta['reward']} crédits",
-                    callback_data=f"accept_{message.message_id}"
-                ),
+                InlineKeyboardButton(accept_label, callback_data=f"accept_{message.message_id}"),
                 InlineKeyboardButton("🖐🏼 Refuser", callback_data="decline")
             ]]
             reply_markup = InlineKeyboardMarkup(keyboard)
 
-            await message.reply_text(
-                f"📥 Fichier détecté! Voulez-vous l'indexer pour {file_meta['reward']} crédits?",
-                reply_markup=reply_markup
-            )
+            await message.reply_text(prompt, reply_markup=reply_markup)
 
         async def handle_accept(update: Update, context: CallbackContext):
             query = update.callback_query
@@ -86,12 +134,19 @@ class FileIndexer:
                     await query.answer("🚫 Groupe non autorisé.", show_alert=True)
                     return
 
-                db.index_file(file_data)
-                file_type = file_data['file_type']
-                reward = FileIndexer.FILE_TYPES[file_type]['reward']
-                db.add_credits(file_data['user_id'], reward)
-
-                await query.answer(f"✅ Fichier indexé! +{reward} crédits ajoutés.", show_alert=True)
+                # Un doublon a pu être indexé entre l'invitation et l'acceptation
+                if file_data.get('file_unique_id') and FileIndexer.index_known_file(file_data):
+                    await query.answer("♻️ Fichier déjà indexé, aucun crédit ajouté.", show_alert=True)
+                else:
+                    # Calculé avant l'indexation, qui rend le fichier connu
+                    reward = FileIndexer.reward_for(file_data)
+                    db.index_file(file_data)
+                    search_cache.bump(group_scope(file_data['group_id']))
+                    if reward:
+                        db.add_credits(file_data['user_id'], reward)
+                        await query.answer(f"✅ Fichier indexé! +{reward} crédits ajoutés.", show_alert=True)
+                    else:
+                        await query.answer("✅ Fichier indexé (déjà récompensé dans un autre groupe).", show_alert=True)
             except Exception as e:
                 logger.error(f"Error accepting file: {e}")
                 await query.answer("❌ Erreur lors de l'indexation", show_alert=True)
@@ -100,8 +155,70 @@ class FileIndexer:
             except Exception:
                 pass
 
+        async def handle_import_history(update: Update, context: CallbackContext):
+            """/importhistory en réponse au result.json d'un export Telegram Desktop"""
+            message = update.message
+            group_id = message.chat.id
+            if not db.is_search_group(group_id):
+                return
+            member = await context.bot.get_chat_member(group_id, message.from_user.id)
+            if member.status not in ("administrator", "creator"):
+                await message.reply_text("❌ Droits administrateur requis")
+                return
+
+            export_file = message.reply_to_message.document if message.reply_to_message else None
+            if not export_file or not (export_file.file_name or "").endswith(".json"):
+                await message.reply_text("ℹ️ Répondez au fichier result.json de l'export avec /importhistory")
+                return
+
+            progress_msg = await message.reply_text("📥 Import de l'historique en cours...")
+            stats = {}
+            try:
+                telegram_file = await export_file.get_file()
+                async with document_ingest.downloaded_document(telegram_file, export_file.file_size, ".json") as source:
+                    if isinstance(source, bytes):
+                        stream = io.StringIO(source.decode('utf-8'))
+                    else:
+                        stream = open(source, 'r', encoding='utf-8')
+                    with stream:
+                        # Lecture et écriture par lots hors de la boucle d'événements
+                        batches = backfill_group(TelegramExport(stream).messages(), group_id, db)
+                        last_report = time.monotonic()
+                        while True:
+                            batch_stats = await asyncio.to_thread(next, batches, None)
+                            if batch_stats is None:
+                                break
+                            stats = batch_stats
+                            if time.monotonic() - last_report >= 3:
+                                last_report = time.monotonic()
+                                try:
+                                    await progress_msg.edit_text(
+                                        f"📥 Import en cours : {stats['messages']} messages lus, "
+                                        f"{stats['indexed']} fichiers indexés"
+                                    )
+                                except Exception as e:
+                                    logger.debug(f"Mise à jour de progression ignorée: {e}")
+            except Exception as e:
+                logger.error(f"Error importing history for {group_id}: {e}")
+                # Les lots déjà écrits restent indexés
+                search_cache.bump(group_scope(group_id))
+                await progress_msg.edit_text(
+                    f"❌ Erreur lors de l'import de l'historique\n\n"
+                    f"📁 Fichiers indexés avant l'erreur: {stats.get('indexed', 0)}"
+                )
+                return
+
+            search_cache.bump(group_scope(group_id))
+            await progress_msg.edit_text(
+                f"✅ Import terminé\n\n"
+                f"📨 Messages lus: {stats.get('messages', 0)}\n"
+                f"📁 Fichiers indexés: {stats.get('indexed', 0)}\n"
+                f"♻️ Doublons ignorés: {stats.get('duplicates', 0)}"
+            )
+
         application.add_handler(MessageHandler(
             filters.Document.ALL | filters.PHOTO | filters.VIDEO | filters.AUDIO,
             handle_file
         ))
+        application.add_handler(CommandHandler('importhistory', handle_import_history))
         application.add_handler(CallbackQueryHandler(handle_accept, pattern='^accept_'))
\ No newline at end of file
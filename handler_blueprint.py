@@ -0,0 +1,119 @@
+"""
+Graphe de handlers partagé entre les Applications des bots fils.
+
+Les fonctions d'enregistrement (setup(application), register_xxx(application))
+sont exécutées une seule fois contre une application d'enregistrement qui note
+les appels à add_handler et à job_queue.run_*. Chaque bot fils reçoit ensuite
+les mêmes objets handlers (et leurs filtres) par référence.
+
+Les ConversationHandler gardent l'état des conversations dans le handler : ils
+sont recopiés sans état pour chaque bot, sinon un même utilisateur verrait
+ses conversations mélangées entre deux bots.
+"""
+
+import logging
+import warnings
+from typing import Any, Callable, Dict, List, Tuple
+
+from telegram.ext import Application, BaseHandler, ConversationHandler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP = 0
+
+
+def fresh_conversation(handler: ConversationHandler) -> ConversationHandler:
+    """Copie sans état d'une conversation (et des conversations imbriquées)"""
+    def fresh(handlers: List[BaseHandler]) -> List[BaseHandler]:
+        return [fresh_conversation(h) if isinstance(h, ConversationHandler) else h for h in handlers]
+
+    # Les avertissements de configuration ont déjà été émis à la construction d'origine
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ConversationHandler(
+            entry_points=fresh(handler.entry_points),
+            states={state: fresh(handlers) for state, handlers in handler.states.items()},
+            fallbacks=fresh(handler.fallbacks),
+            allow_reentry=handler.allow_reentry,
+            per_chat=handler.per_chat,
+            per_user=handler.per_user,
+            per_message=handler.per_message,
+            conversation_timeout=handler.conversation_timeout,
+            name=handler.name,
+            persistent=handler.persistent,
+            map_to_parent=handler.map_to_parent,
+            block=handler.block
+        )
+
+
+class _RecordingJobQueue:
+    """Note les appels job_queue.run_* pour les rejouer sur chaque bot"""
+
+    def __init__(self, calls: List[Tuple[str, tuple, Dict[str, Any]]]):
+        self._calls = calls
+
+    def __getattr__(self, method: str):
+        if not method.startswith("run_"):
+            raise AttributeError(method)
+
+        def record(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+        return record
+
+
+class _RecordingApplication:
+    """Application d'enregistrement : seuls les handlers et les tâches planifiées sont acceptés"""
+
+    def __init__(self):
+        self.handlers: List[Tuple[BaseHandler, int]] = []
+        self.jobs: List[Tuple[str, tuple, Dict[str, Any]]] = []
+        self.job_queue = _RecordingJobQueue(self.jobs)
+
+    def add_handler(self, handler: BaseHandler, group: int = DEFAULT_GROUP):
+        self.handlers.append((handler, group))
+
+    def add_handlers(self, handlers, group: int = DEFAULT_GROUP):
+        if isinstance(handlers, dict):
+            for handler_group, group_handlers in handlers.items():
+                for handler in group_handlers:
+                    self.add_handler(handler, handler_group)
+        else:
+            for handler in handlers:
+                self.add_handler(handler, group)
+
+
+class HandlerBlueprint:
+    """Handlers et tâches planifiées enregistrés une fois, attachés à chaque Application"""
+
+    def __init__(self, handlers: List[Tuple[BaseHandler, int]], jobs: List[Tuple[str, tuple, Dict[str, Any]]]):
+        self.handlers = tuple(handlers)
+        self.jobs = tuple(jobs)
+
+    def __len__(self) -> int:
+        return len(self.handlers)
+
+    @classmethod
+    def record(cls, *registrations: Callable[[Any], None]) -> "HandlerBlueprint":
+        """Exécute les fonctions d'enregistrement et garde ce qu'elles ont ajouté"""
+        recorder = _RecordingApplication()
+        for register in registrations:
+            try:
+                register(recorder)
+            except Exception as e:
+                logger.error(f"Erreur d'enregistrement des handlers ({register.__name__}): {e}", exc_info=True)
+        return cls(recorder.handlers, recorder.jobs)
+
+    def attach(self, application: Application):
+        """Ajoute les handlers partagés (et les tâches planifiées) à une Application"""
+        for handler, group in self.handlers:
+            if isinstance(handler, ConversationHandler):
+                handler = fresh_conversation(handler)
+            application.add_handler(handler, group)
+
+        if self.jobs:
+            job_queue = application.job_queue
+            if job_queue is None:
+                logger.warning(f"{len(self.jobs)} tâches planifiées ignorées: JobQueue indisponible")
+                return
+            for method, args, kwargs in self.jobs:
+                getattr(job_queue, method)(*args, **kwargs)
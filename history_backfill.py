@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Indexation en masse de l'historique d'un groupe depuis un export Telegram Desktop
+
+L'export JSON (result.json) est lu en flux : seuls le message en cours et un
+tampon de lecture sont en mémoire, quelle que soit la taille de l'historique.
+Les fiches sont écrites par lots dans l'index du groupe, les messages déjà
+importés sont ignorés et l'avancement est rapporté après chaque lot.
+
+Les exports ne contiennent pas de file_id : les fiches importées gardent le
+message_id d'origine et le téléchargement passe par copy_message.
+
+Usage (bot arrêté, l'index est partagé avec lui) :
+    python history_backfill.py result.json
+    python history_backfill.py result.json --group-id -1001234567890 --batch-size 1000
+"""
+
+import argparse
+import json
+import logging
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 1 << 20  # Taille des lectures du flux (caractères)
+BATCH_SIZE = 500      # Fiches par écriture dans l'index
+
+_MESSAGES_START = re.compile(r'"messages"\s*:\s*\[')
+_HEADER_FIELD = re.compile(r'"(id|type|name)"\s*:\s*("(?:[^"\\]|\\.)*"|-?\d+)')
+
+# Types de médias de l'export -> types de FileIndexer.FILE_TYPES
+MEDIA_TYPES = {
+    'video_file': 'video',
+    'audio_file': 'audio'
+}
+
+SUPERGROUP_TYPES = ('private_supergroup', 'public_supergroup', 'private_channel', 'public_channel')
+
+
+class TelegramExport:
+    """Lecture en flux d'un export JSON de discussion Telegram Desktop"""
+
+    def __init__(self, stream: TextIO, chunk_size: int = READ_CHUNK):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.header: Dict[str, Any] = {}
+        self._buffer = ""
+
+    @property
+    def chat_id(self) -> Optional[int]:
+        """Identifiant Bot API de la discussion exportée (-100… pour les supergroupes)"""
+        raw_id = self.header.get('id')
+        if raw_id is None:
+            return None
+        if self.header.get('type') in SUPERGROUP_TYPES:
+            return int(f"-100{raw_id}")
+        return -abs(int(raw_id))
+
+    def _read(self) -> bool:
+        chunk = self.stream.read(self.chunk_size)
+        self._buffer += chunk
+        return bool(chunk)
+
+    def _seek_messages(self) -> bool:
+        """Avance jusqu'au tableau "messages" en relevant l'en-tête"""
+        while True:
+            match = _MESSAGES_START.search(self._buffer)
+            if match:
+                for key, value in _HEADER_FIELD.findall(self._buffer[:match.start()]):
+                    self.header.setdefault(key, json.loads(value))
+                self._buffer = self._buffer[match.end():]
+                return True
+            if not self._read():
+                return False
+
+    def messages(self) -> Iterator[Dict[str, Any]]:
+        if not self._seek_messages():
+            return
+        decoder = json.JSONDecoder()
+        position = 0
+        while True:
+            while position < len(self._buffer) and self._buffer[position] in ' \t\r\n,':
+                position += 1
+            if position >= len(self._buffer):
+                self._buffer, position = "", 0
+                if not self._read():
+                    return
+                continue
+            if self._buffer[position] == ']':
+                return
+            try:
+                message, position = decoder.raw_decode(self._buffer, position)
+            except json.JSONDecodeError:
+                # Message coupé par la fin du tampon : compléter la lecture
+                self._buffer, position = self._buffer[position:], 0
+                if not self._read():
+                    raise
+                continue
+            yield message
+            if position > self.chunk_size:
+                self._buffer, position = self._buffer[position:], 0
+
+
+def exported_file(message: Dict[str, Any]) -> Optional[str]:
+    """Chemin du fichier dans l'export, None s'il n'a pas été téléchargé"""
+    path = message.get('file')
+    if not isinstance(path, str) or path.startswith('('):
+        return None  # "(File not included. Change data exporting settings to download.)"
+    return path
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    """Texte brut d'un message (chaîne ou liste d'entités dans l'export)"""
+    text = message.get('text', '')
+    if isinstance(text, list):
+        text = ''.join(part if isinstance(part, str) else part.get('text', '') for part in text)
+    return text
+
+
+def export_record(message: Dict[str, Any], group_id: int) -> Optional[Dict[str, Any]]:
+    """Fiche d'index d'un message de l'export, ou None s'il ne contient pas de fichier"""
+    if message.get('type') != 'message':
+        return None
+
+    if 'photo' in message:
+        file_type = 'photo'
+    elif 'file' in message:
+        media_type = message.get('media_type')
+        if media_type is None:
+            file_type = 'document'
+        elif media_type in MEDIA_TYPES:
+            file_type = MEDIA_TYPES[media_type]
+        else:
+            return None  # Autocollants, animations, messages vocaux…
+    else:
+        return None
+
+    if file_type == 'document':
+        path = exported_file(message)
+        title = message.get('file_name') or (Path(path).name if path else "Document sans titre")
+    elif file_type == 'video':
+        title = message.get('file_name') or "Vidéo sans titre"
+    elif file_type == 'audio':
+        title = message.get('title') or message.get('file_name') or "Audio sans titre"
+    else:
+        title = ""
+
+    from_id = str(message.get('from_id') or '')
+    try:
+        timestamp = str(datetime.fromisoformat(message['date']))
+    except (KeyError, ValueError):
+        timestamp = None
+
+    return {
+        'file_id': f"msg:{group_id}:{message['id']}",
+        'message_id': message['id'],
+        'file_type': file_type,
+        'title': title,
+        'description': message_text(message),
+        'group_id': group_id,
+        'user_id': int(from_id[4:]) if from_id.startswith('user') and from_id[4:].isdigit() else None,
+        'timestamp': timestamp,
+        'file_size': message.get('file_size'),
+        'source': 'export'
+    }
+
+
+def backfill_group(messages: Iterator[Dict[str, Any]], group_id: int, db, batch_size: int = BATCH_SIZE):
+    """Indexe les fichiers d'un historique par lots ; produit les statistiques après chaque lot.
+
+    Une fiche est identifiée par son message d'origine : réimporter le même
+    export (ou un export plus récent) n'ajoute que les nouveaux messages.
+    """
+    stats = {'messages': 0, 'indexed': 0, 'duplicates': 0}
+    batch = []
+
+    for message in messages:
+        stats['messages'] += 1
+        record = export_record(message, group_id)
+        if record is None:
+            continue
+
+        if db.get_file_by_id(record['file_id'], group_id):
+            stats['duplicates'] += 1
+            continue
+
+        batch.append(record)
+        if len(batch) >= batch_size:
+            stats['indexed'] += db.index_files(batch)
+            batch = []
+            yield dict(stats)
+
+    if batch:
+        stats['indexed'] += db.index_files(batch)
+    yield dict(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexe l'historique d'un groupe depuis un export Telegram Desktop")
+    parser.add_argument("export", help="Fichier result.json de l'export")
+    parser.add_argument("--group-id", type=int, help="ID Bot API du groupe (déduit de l'export par défaut)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Fiches par écriture dans l'index")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path(__file__).parent.resolve()))
+    from utils.memory_full import db
+
+    with open(args.export, 'r', encoding='utf-8') as stream:
+        export = TelegramExport(stream)
+        messages = export.messages()
+        first = next(messages, None)
+        group_id = args.group_id or export.chat_id
+        if group_id is None:
+            parser.error("Identifiant du groupe introuvable dans l'export, utilisez --group-id")
+
+        def all_messages():
+            if first is not None:
+                yield first
+            yield from messages
+
+        print(f"📥 Import de '{export.header.get('name', args.export)}' dans le groupe {group_id}")
+        stats = {}
+        for stats in backfill_group(all_messages(), group_id, db, args.batch_size):
+            print(f"  {stats['messages']} messages lus, {stats['indexed']} fichiers indexés, "
+                  f"{stats['duplicates']} doublons ignorés", flush=True)
+
+    db.file_index.flush()
+    print(f"✅ Import terminé : {stats.get('indexed', 0)} fichiers indexés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Pool de connexions HTTP partagé par tous les bots.
+
+Toutes les instances Bot (bot principal, bot PDG, bots fils, envois ponctuels
+de api_client) visent le même hôte : elles passent par un seul client httpx
+dont les connexions keep-alive sont réutilisées, au lieu d'un client (et de
+ses poignées de main TLS) par bot. HTTP/2 est utilisé si le paquet h2 est
+installé et activé dans la configuration.
+
+Le client est compté par références : il est ouvert par la première requête
+initialisée et fermé quand la dernière est arrêtée. Les appels de méthodes
+(hors getUpdates, qui reste en attente longue) sont limités par un sémaphore.
+Le résultat de chaque appel peut être signalé au bot concerné (watch).
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+from telegram.error import TimedOut
+from telegram.request import BaseRequest, HTTPXRequest, RequestData
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class SharedHTTPPool:
+    """Client httpx unique, métriques et limite de concurrence des appels à l'API Bot"""
+
+    def __init__(self, max_connections: Optional[int] = None, max_keepalive_connections: int = 100,
+                 max_concurrency: int = 64, http2: bool = False, keepalive_expiry: float = 60.0):
+        # max_connections=None : chaque bot en polling HTTP/1.1 garde une connexion ouverte
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_concurrency = max_concurrency
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._refs = 0
+        self._watchers: Dict[str, Callable[[str, Optional[str]], None]] = {}  # URL du bot -> suivi
+        self.metrics = {
+            'requests': 0,
+            'polls': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'in_flight': 0,
+            'peak_in_flight': 0,
+            'clients_opened': 0
+        }
+
+    def _build_client(self) -> httpx.AsyncClient:
+        kwargs = dict(limits=self.limits, timeout=httpx.Timeout(5.0, pool=1.0))
+        if self.http2:
+            try:
+                client = httpx.AsyncClient(http2=True, **kwargs)
+            except ImportError:
+                logger.warning("HTTP/2 indisponible (paquet h2 absent), utilisation de HTTP/1.1")
+                self.http2 = False
+                client = httpx.AsyncClient(**kwargs)
+        else:
+            client = httpx.AsyncClient(**kwargs)
+        self.metrics['clients_opened'] += 1
+        return client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def acquire(self):
+        self._refs += 1
+
+    async def release(self):
+        self._refs = max(0, self._refs - 1)
+        if self._refs == 0 and self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
+    def request(self, **timeouts) -> "SharedRequest":
+        """Adaptateur de requêtes PTB branché sur le pool (délais par défaut en paramètres)"""
+        return SharedRequest(self, **timeouts)
+
+    def configure(self, builder, **timeouts):
+        """Branche les deux requêtes d'un ApplicationBuilder (appels et getUpdates) sur le pool"""
+        return builder.request(self.request(**timeouts)).get_updates_request(self.request(**timeouts))
+
+    def watch(self, bot_url: str, callback: Callable[[str, Optional[str]], None]):
+        """Signale chaque appel du bot (bot.base_url) : callback(méthode, erreur ou None)"""
+        self._watchers[bot_url] = callback
+
+    def unwatch(self, bot_url: str):
+        self._watchers.pop(bot_url, None)
+
+    def connection_count(self) -> int:
+        """Connexions ouvertes dans le pool (0 si l'information n'est pas accessible)"""
+        pool = getattr(getattr(self._client, '_transport', None), '_pool', None)
+        return len(getattr(pool, 'connections', ()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            'references': self._refs,
+            'connections': self.connection_count(),
+            'http2': self.http2
+        }
+
+    async def close(self):
+        """Ferme les clients quel que soit le nombre de références"""
+        self._refs = 0
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class SharedRequest(HTTPXRequest):
+    """HTTPXRequest qui utilise le client du pool partagé au lieu du sien"""
+
+    __slots__ = ("_pool", "_timeout", "_acquired")
+
+    def __init__(self, pool: SharedHTTPPool, connect_timeout: Optional[float] = 5.0,
+                 read_timeout: Optional[float] = 5.0, write_timeout: Optional[float] = 5.0,
+                 pool_timeout: Optional[float] = 1.0):
+        self._pool = pool
+        self._timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout,
+                                      write=write_timeout, pool=pool_timeout)
+        self._acquired = False
+        super().__init__(read_timeout=read_timeout, write_timeout=write_timeout,
+                         connect_timeout=connect_timeout, pool_timeout=pool_timeout,
+                         http_version="2" if pool.http2 else "1.1")
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return self._pool.client
+
+    async def initialize(self) -> None:
+        if not self._acquired:
+            self._acquired = True
+            self._pool.acquire()
+
+    async def shutdown(self) -> None:
+        if self._acquired:
+            self._acquired = False
+            await self._pool.release()
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: RequestData = None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> Tuple[int, bytes]:
+        # Délais par défaut de cette requête, pas ceux du client partagé
+        default = type(BaseRequest.DEFAULT_NONE)
+        timeouts = dict(
+            read_timeout=self._timeout.read if isinstance(read_timeout, default) else read_timeout,
+            write_timeout=self._timeout.write if isinstance(write_timeout, default) else write_timeout,
+            connect_timeout=self._timeout.connect if isinstance(connect_timeout, default) else connect_timeout,
+            pool_timeout=self._timeout.pool if isinstance(pool_timeout, default) else pool_timeout
+        )
+
+        metrics = self._pool.metrics
+        polling = url.endswith('/getUpdates')
+        metrics['polls' if polling else 'requests'] += 1
+        metrics['in_flight'] += 1
+        metrics['peak_in_flight'] = max(metrics['peak_in_flight'], metrics['in_flight'])
+        try:
+            if polling:
+                result = await self._send(url, method, request_data, timeouts)
+            else:
+                async with self._pool.semaphore:
+                    result = await self._send(url, method, request_data, timeouts)
+        except TimedOut:
+            metrics['timeouts'] += 1
+            self._notify(url, "délai dépassé")
+            raise
+        except Exception as e:
+            metrics['errors'] += 1
+            self._notify(url, type(e).__name__)
+            raise
+        finally:
+            metrics['in_flight'] -= 1
+        self._notify(url, None if 200 <= result[0] < 300 else f"HTTP {result[0]}")
+        return result
+
+    def _notify(self, url: str, error: Optional[str]):
+        bot_url, _, endpoint = url.rpartition('/')
+        watcher = self._pool._watchers.get(bot_url)
+        if watcher is not None:
+            watcher(endpoint, error)
+
+    async def _send(self, url: str, method: str, request_data: Optional[RequestData],
+                    timeouts: Dict[str, Optional[float]]) -> Tuple[int, bytes]:
+        self._client = self._pool.client
+        return await super().do_request(url, method, request_data, **timeouts)
+
+
+# Pool partagé par tous les bots du processus
+http_pool = SharedHTTPPool(max_concurrency=config.HTTP_MAX_CONCURRENCY, http2=config.HTTP2_ENABLED)
@@ -0,0 +1,36 @@
+"""
+Alias des paquets du dépôt pour l'exécuter depuis une copie à plat.
+
+Les modules s'importent entre eux comme `utils.xxx` et
+`extensions.handlers.xxx`. Quand ces paquets ne sont pas installés (copie
+du dépôt, tests, banc d'essai), le dossier du dépôt est déclaré sous ces
+noms ; s'ils existent, rien n'est modifié.
+"""
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+ALIASES = ("utils", "extensions", "extensions.handlers")
+
+
+def install(root) -> None:
+    """Déclare `root` comme paquets utils / extensions.handlers s'ils sont introuvables"""
+    root = str(Path(root).resolve())
+    if root not in sys.path:
+        sys.path.insert(0, root)  # from config import config
+
+    for name in ALIASES:
+        if name in sys.modules:
+            continue
+        parent = name.rpartition('.')[0]
+        if not parent and importlib.util.find_spec(name) is not None:
+            continue
+        if parent and getattr(sys.modules.get(parent), "__path__", None) != [root]:
+            continue  # Paquet parent réel : ses sous-paquets le sont aussi
+        package = types.ModuleType(name)
+        package.__path__ = [root]
+        sys.modules[name] = package
+        if parent:
+            setattr(sys.modules[parent], name.rpartition('.')[2], package)
@@ -0,0 +1,189 @@
+"""
+Segments immuables de l'index des fichiers, lus par projection mémoire (mmap).
+
+Format d'un segment (little-endian, sections alignées sur 8 octets) :
+    en-tête      : magic "TSG1", nombre de fiches, nombre de termes,
+                   puis la position des 8 sections ci-dessous
+    clés         : offsets uint64 + file_id UTF-8 triés (n° de fiche = rang)
+    fiches       : offsets uint64 + fiches JSON
+    dictionnaire : offsets uint64 + termes UTF-8 triés
+    postings     : offsets uint64 + numéros de fiches (deltas en varint)
+
+Les facettes sont rangées dans le dictionnaire comme des termes préfixés par
+"\\x00" ("\\x00file_type=video"), leurs postings sont donc les ensembles de
+fichiers de chaque valeur.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TSG1"
+HEADER = struct.Struct("<4sII8Q")
+FACET_PREFIX = "\x00"
+
+
+def facet_term(facet: str, value: str) -> str:
+    return f"{FACET_PREFIX}{facet}={value}"
+
+
+def encode_postings(doc_numbers: Iterable[int]) -> bytes:
+    """Encode des numéros croissants en deltas varint"""
+    out = bytearray()
+    previous = 0
+    for number in doc_numbers:
+        delta = number - previous
+        previous = number
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_postings(data) -> List[int]:
+    numbers = []
+    value = shift = previous = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        numbers.append(previous)
+        value = shift = 0
+    return numbers
+
+
+def _pad(buffer: bytearray):
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+
+def _table(buffer: bytearray, items: List[bytes]) -> Tuple[int, int]:
+    """Ajoute une table (offsets + données) et retourne la position de chaque partie"""
+    _pad(buffer)
+    offsets_at = len(buffer)
+    position = 0
+    offsets = [0]
+    for item in items:
+        position += len(item)
+        offsets.append(position)
+    buffer.extend(struct.pack(f"<{len(offsets)}Q", *offsets))
+    data_at = len(buffer)
+    buffer.extend(b"".join(items))
+    return offsets_at, data_at
+
+
+def write_segment(path: Path, records: Dict[str, Dict[str, Any]],
+                  terms_of, facets_of) -> int:
+    """Écrit atomiquement un segment pour les fiches données (file_id -> fiche)"""
+    keys = sorted(records, key=lambda file_id: file_id.encode())
+    postings: Dict[str, List[int]] = {}
+    for number, file_id in enumerate(keys):
+        record = records[file_id]
+        for term in terms_of(record):
+            postings.setdefault(term, []).append(number)
+        for facet, value in facets_of(record).items():
+            postings.setdefault(facet_term(facet, value), []).append(number)
+
+    terms = sorted(postings, key=lambda term: term.encode())
+    buffer = bytearray(HEADER.size)
+    sections = []
+    sections += _table(buffer, [file_id.encode() for file_id in keys])
+    sections += _table(buffer, [json.dumps(records[file_id], default=str).encode() for file_id in keys])
+    sections += _table(buffer, [term.encode() for term in terms])
+    sections += _table(buffer, [encode_postings(postings[term]) for term in terms])
+    buffer[:HEADER.size] = HEADER.pack(MAGIC, len(keys), len(terms), *sections)
+
+    temp_path = path.with_suffix('.tmp')
+    with open(temp_path, 'wb') as f:
+        f.write(buffer)
+        f.flush()
+        os.fsync(f.fileno())
+    temp_path.replace(path)  # Remplacement atomique
+    return len(keys)
+
+
+class _Table:
+    """Vue sur une table (offsets + données) d'un segment projeté en mémoire"""
+
+    def __init__(self, view: memoryview, count: int, offsets_at: int, data_at: int):
+        self.view = view
+        self.offsets = view[offsets_at:offsets_at + 8 * (count + 1)].cast('Q')
+        self.data_at = data_at
+
+    def __getitem__(self, index: int) -> bytes:
+        return bytes(self.view[self.data_at + self.offsets[index]:self.data_at + self.offsets[index + 1]])
+
+
+class Segment:
+    """Segment en lecture seule : recherche binaire dans les clés et le dictionnaire"""
+
+    def __init__(self, path: Path, seq: int):
+        self.path = Path(path)
+        self.seq = seq
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, self.doc_count, self.term_count, *sections = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"Segment invalide: {self.path}")
+        self.keys = _Table(view, self.doc_count, sections[0], sections[1])
+        self.records = _Table(view, self.doc_count, sections[2], sections[3])
+        self.terms = _Table(view, self.term_count, sections[4], sections[5])
+        self.postings_table = _Table(view, self.term_count, sections[6], sections[7])
+
+    @staticmethod
+    def _lower_bound(table: _Table, count: int, key: bytes) -> int:
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if table[middle] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def doc_number(self, file_id: str) -> Optional[int]:
+        key = file_id.encode()
+        number = self._lower_bound(self.keys, self.doc_count, key)
+        if number < self.doc_count and self.keys[number] == key:
+            return number
+        return None
+
+    def key(self, number: int) -> str:
+        return self.keys[number].decode()
+
+    def record(self, number: int) -> Dict[str, Any]:
+        return json.loads(self.records[number])
+
+    def postings(self, term: str) -> List[int]:
+        key = term.encode()
+        index = self._lower_bound(self.terms, self.term_count, key)
+        if index < self.term_count and self.terms[index] == key:
+            return decode_postings(self.postings_table[index])
+        return []
+
+    def facet_values(self, facet: str) -> Iterator[Tuple[str, List[int]]]:
+        """Valeurs d'une facette et leurs numéros de fiches"""
+        prefix = facet_term(facet, "").encode()
+        index = self._lower_bound(self.terms, self.term_count, prefix)
+        while index < self.term_count:
+            term = self.terms[index]
+            if not term.startswith(prefix):
+                break
+            yield term[len(prefix):].decode(), decode_postings(self.postings_table[index])
+            index += 1
+
+    def text_term_count(self) -> int:
+        return self.term_count - self._lower_bound(self.terms, self.term_count, b"\x01")
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for number in range(self.doc_count):
+            yield self.key(number), self.record(number)
@@ -34,12 +34,12 @@ if sys.version_info >= (3, 12):
 
 from telegram import BotCommand, Update
 from telegram.ext import Application, CallbackContext
-from telegram.request import HTTPXRequest
 from telegram.error import TimedOut
 
 # Import des modules personnalisés
 from utils.user_administrator import (
     init_and_start_all_admin_bots_polling,
+    get_hosted_bots,
     error_handler as admin_error_handler
 )
 from handlers import bot_linking, commands, language, terms_accept, pdg_dashboard
@@ -50,6 +50,11 @@ from handlers.bot_deletion_pin import setup_deletion_pin_handler
 from schedulers.daily_log_report import setup_daily_report
 from config import config as app_config
 from utils.memory_full import db
+from utils.bot_runtime import bot_runtime
+from utils.bot_control import bot_control
+from utils.webhook_server import WebhookServer
+from utils.http_pool import http_pool
+from utils.bot_workers import BotSupervisor
 
 # Configuration du logger
 logging.basicConfig(
@@ -147,6 +152,27 @@ async def start_bot_polling(application):
         logger.error(f"Erreur démarrage polling: {e}")
         raise
 
+async def start_bot_webhook(application, webhook_server):
+    """Démarre un bot dont les mises à jour arrivent par le serveur webhook"""
+    try:
+        logger.info("Initialisation du bot...")
+        await application.initialize()
+        await application.start()
+        await webhook_server.register("main_bot", application)
+        logger.info("Webhook enregistré avec succès")
+    except Exception as e:
+        logger.error(f"Erreur démarrage webhook: {e}")
+        raise
+
+async def watch_workers(supervisor, interval: float = 10.0):
+    """Relance périodiquement les workers de bots arrêtés"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            supervisor.check_workers()
+        except Exception as e:
+            logger.error(f"Erreur surveillance workers: {e}")
+
 async def stop_bot_polling(application):
     """Arrête le polling d'un bot proprement"""
     try:
@@ -192,23 +218,21 @@ async def main_async():
         })
         logger.info("Configuration PDG initialisée")
 
-    # Configuration des timeouts HTTP
-    request = HTTPXRequest(
-        connect_timeout=20.0,
-        read_timeout=30.0,
-        write_timeout=30.0,
-        pool_timeout=30.0
-    )
-
-    # Création de l'application principale
-    application = (
+    # Création de l'application principale (requêtes via le pool HTTP partagé)
+    builder = (
         Application.builder()
         .token(BOT_TOKEN)
-        .request(request)
+        .base_url(app_config.BOT_API_BASE_URL)
         .concurrent_updates(True)  # Active la JobQueue
         .post_init(setup_bot_commands)
-        .build()
     )
+    application = http_pool.configure(
+        builder,
+        connect_timeout=20.0,
+        read_timeout=30.0,
+        write_timeout=30.0,
+        pool_timeout=30.0
+    ).build()
 
     # Ajout des gestionnaires d'erreurs
     application.add_error_handler(global_error_handler)
@@ -228,12 +252,35 @@ async def main_async():
     # Configurer le rapport journalier
     setup_daily_report(application)
 
-    # Lancement des bots administrateurs
-    await init_and_start_all_admin_bots_polling()
+    # Mode webhook : un seul serveur reçoit les mises à jour de tous les bots
+    webhook_server = None
+    if app_config.WEBHOOK_URL:
+        webhook_server = WebhookServer(
+            app_config.WEBHOOK_URL,
+            host=app_config.WEBHOOK_HOST,
+            port=app_config.WEBHOOK_PORT,
+            secret=app_config.WEBHOOK_SECRET or None
+        )
+        await webhook_server.start()
+        bot_runtime.webhook_server = webhook_server
+
+    # Lancement des bots administrateurs (dans cette boucle ou sur des workers)
+    supervisor = None
+    workers_task = None
+    if app_config.CHILD_BOT_WORKERS > 0:
+        supervisor = BotSupervisor(app_config.CHILD_BOT_WORKERS)
+        supervisor.start(get_hosted_bots())
+        bot_control.supervisor = supervisor
+        workers_task = asyncio.create_task(watch_workers(supervisor))
+    else:
+        await init_and_start_all_admin_bots_polling()
 
     # Démarrer le bot principal
     logger.info("Démarrage du bot principal...")
-    main_bot_task = asyncio.create_task(start_bot_polling(application))
+    if webhook_server:
+        main_bot_task = asyncio.create_task(start_bot_webhook(application, webhook_server))
+    else:
+        main_bot_task = asyncio.create_task(start_bot_polling(application))
 
     # Démarrer le bot PDG si configuré
     pdg_task = None
@@ -273,6 +320,15 @@ async def main_async():
         pass
     await stop_bot_polling(application)
 
+    # Arrêt des bots administrateurs
+    logger.info("Arrêt des bots administrateurs...")
+    await bot_runtime.stop_all()
+    if supervisor:
+        workers_task.cancel()
+        await asyncio.to_thread(supervisor.stop)
+    if webhook_server:
+        await webhook_server.stop()
+
     # Arrêt du bot PDG
     if pdg_task:
         logger.info("Arrêt du bot PDG...")
@@ -284,6 +340,7 @@ async def main_async():
         except asyncio.CancelledError:
             pass
 
+    await http_pool.close()
     logger.info("Arrêt complet réussi")
 
 def main():
@@ -4,6 +4,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Dict, List, Optional, Any
 from .database import get_disk_db
+from .file_index import ShardedFileIndex
+from .popular_searches import search_trends
+from .search_cache import search_cache, group_scope
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +46,13 @@ class DB:
         self.user_plans: Dict[int, str] = {}
         self.pending_deletions: Dict[tuple, Dict] = {}
 
+        # Index des fichiers des groupes de recherche (un shard par groupe)
+        self.file_index = ShardedFileIndex(self.disk_db.path / "file_index")
+
+        # Recherches populaires (résumés à mémoire fixe, sauvegardés périodiquement)
+        search_trends.load_dict(self.load_from_disk("search_trends", "all"))
+        self._unsaved_searches = 0
+
         self.load_pdg_config()
 
     def save_to_disk(self, collection, key, data):
@@ -69,6 +79,82 @@ class DB:
             return getattr(self, key)
         return default
 
+    # Méthodes pour l'index des fichiers des groupes de recherche
+    def index_file(self, file_data: Dict) -> bool:
+        indexed = self.file_index.index_file(file_data)
+        if indexed and file_data.get('file_unique_id'):
+            # Titre et légende repris quand le fichier est partagé dans un autre groupe
+            self.file_index.known_files.remember(
+                file_data['file_unique_id'], file_data.get('title'), file_data.get('description')
+            )
+        return indexed
+
+    def index_files(self, files: List[Dict]) -> int:
+        """Indexation par lots (import d'historique), sans récompense ni déduplication Telegram"""
+        return self.file_index.index_files(files)
+
+    def search_files(self, query: str, group_id: int, filters: Optional[Dict[str, str]] = None) -> List[Dict]:
+        return self.file_index.search(query, group_id, filters=filters)
+
+    def search_files_faceted(self, query: str, group_id: int, filters: Optional[Dict[str, str]] = None):
+        """Retourne (résultats, compteurs par facette) pour la recherche d'un groupe"""
+        return self.file_index.search_faceted(query, group_id, filters=filters)
+
+    def delete_indexed_file(self, group_id: int, file_id: str) -> bool:
+        removed = self.file_index.remove_file(group_id, file_id)
+        if removed:
+            search_cache.bump(group_scope(group_id))
+        return removed
+
+    def get_file_by_id(self, file_id: str, group_id: Optional[int] = None) -> Optional[Dict]:
+        return self.file_index.get_file(file_id, group_id)
+
+    # Déduplication par file_unique_id (identique pour un fichier quel que soit le bot ou le message)
+    def find_file_by_unique_id(self, file_unique_id: str, group_id: int) -> Optional[Dict]:
+        """Fiche déjà indexée dans ce groupe (seul son shard est chargé)"""
+        if not file_unique_id:
+            return None
+        return self.file_index.find_unique(file_unique_id, group_id)
+
+    def known_file_metadata(self, file_unique_id: str) -> Optional[Dict]:
+        """Titre et légende d'un fichier déjà indexé dans un groupe, sans charger son shard"""
+        if not file_unique_id:
+            return None
+        return self.file_index.known_files.get(file_unique_id)
+
+    def merge_file_caption(self, record: Dict, caption: str) -> bool:
+        """Ajoute une nouvelle légende à la description d'une fiche existante"""
+        caption = (caption or "").strip()
+        description = record.get('description') or ""
+        if not caption or caption in description:
+            return False
+        self.file_index.index_file(dict(record, description=f"{description}\n{caption}".strip()))
+        return True
+
+    # Méthodes pour l'historique et les tendances de recherche
+    def save_search_history(self, user_id: int, chat_id: int, query: str, source: str = "search"):
+        history = self.search_history.setdefault(user_id, [])
+        history.append({
+            "query": query,
+            "chat_id": chat_id,
+            "source": source,
+            "date": datetime.now().isoformat()
+        })
+        del history[:-50]  # Conserver les 50 dernières recherches
+
+        # Les identifiants de groupes Telegram sont négatifs
+        search_trends.record(query, user_id=user_id, group_id=chat_id if chat_id < 0 else None)
+        self._unsaved_searches += 1
+        if self._unsaved_searches >= 100:
+            self.save_search_trends()
+
+    def save_search_trends(self):
+        self._unsaved_searches = 0
+        self.save_to_disk("search_trends", "all", search_trends.to_dict())
+
+    def get_popular_searches(self, scope=None, window: str = "month", limit: int = 5) -> List[Dict]:
+        return search_trends.top(scope or ("global", 0), window, limit)
+
     # Méthodes pour la gestion des bots utilisateur
     def save_user_bot(self, user_id: int, token: str, bot_username: str, bot_name: str, creation_time: str):
         if user_id not in self.user_bots:
@@ -102,6 +188,16 @@ class DB:
         self.user_bots[user_id] = user_bots
         return user_bots
 
+    def get_all_child_bot_tokens(self) -> List[str]:
+        """Tokens de tous les bots fils enregistrés (disque et mémoire), sans doublon"""
+        all_bots = []
+        for key, bots in self.get_all_from_disk("user_bots").items():
+            if isinstance(bots, list):  # "user_bots_all" (full_backup) est un dict
+                all_bots.extend(bots)
+        for bots in self.user_bots.values():
+            all_bots.extend(bots)
+        return list(dict.fromkeys(bot["token"] for bot in all_bots if bot.get("token")))
+
     def delete_user_bot(self, user_id: int, bot_username: str):
         if user_id not in self.user_bots:
             return False
@@ -283,6 +379,8 @@ class DB:
         
         self.save_to_disk("user_bots", "all", self.user_bots)
         self.save_to_disk("user_plans", "all", self.user_plans)
+        self.save_search_trends()
+        self.file_index.flush()
 
     def is_token_used(self, token: str, current_user_id: int) -> bool:
         """Vérifie si un token est déjà utilisé par un bot d'un utilisateur, y compris l'utilisateur actuel."""
@@ -6,6 +6,7 @@ from config import config as app_config
 from schedulers.daily_log_report import setup_daily_report
 from handlers.pdg_dashboard import setup as setup_pdg_dashboard
 from utils.memory_full import db
+from utils.http_pool import http_pool
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +23,13 @@ async def start_pdg_bot():
         logger.info("Démarrage du bot PDG...")
         
         # Configuration de l'application PDG
-        pdg_application = (
+        builder = (
             Application.builder()
             .token(db.pdg_config["token"])
+            .base_url(app_config.BOT_API_BASE_URL)
             .concurrent_updates(True)
-            .build()
         )
+        pdg_application = http_pool.configure(builder).build()
         
         # Configuration des handlers
         setup_pdg_dashboard(pdg_application)
@@ -1,11 +1,24 @@
 """Tableau de bord du PDG"""
+import html
 import logging
+from collections import Counter
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext, CommandHandler, CallbackQueryHandler
 from utils.memory_full import db
+from utils.bot_control import bot_control
+from utils.bot_health import BACKOFF, QUARANTINED, RUNNING, SLEEPING, STARTING
 
 logger = logging.getLogger(__name__)
 
+# Icône et ordre d'affichage (bots à problème en premier)
+HEALTH_STATES = {
+    QUARANTINED: ("⛔", 0),
+    BACKOFF: ("🔁", 1),
+    STARTING: ("⏳", 2),
+    RUNNING: ("🟢", 3),
+    SLEEPING: ("💤", 4)
+}
+
 async def show_pdg_dashboard(update: Update, context: CallbackContext):
     """Affiche le tableau de bord principal"""
     try:
@@ -37,7 +50,8 @@ async def show_pdg_dashboard(update: Update, context: CallbackContext):
         [InlineKeyboardButton("📜 Liste bots", callback_data="pdg_bots_list"), 
          InlineKeyboardButton("👤 Admins", callback_data="pdg_admins_list")],
         [InlineKeyboardButton("🧾 Abonnements", callback_data="pdg_subscriptions")],
-        [InlineKeyboardButton("📋 Logs activité", callback_data="pdg_logs")]
+        [InlineKeyboardButton("📋 Logs activité", callback_data="pdg_logs"),
+         InlineKeyboardButton("🩺 Santé bots", callback_data="pdg_health")]
     ]
     
     await update.effective_message.reply_text(
@@ -75,11 +89,55 @@ async def handle_pdg_callback(update: Update, context: CallbackContext):
     elif data == "pdg_logs":
         logs = db.get("recent_logs", [])
         msg = "📋 <b>Activité récente :</b>\n" + "\n".join(logs[:15])
+    elif data == "pdg_health":
+        msg = format_health_table(await bot_control.health_table(), bot_control.supervisor)
     else:
         msg = "❌ Action inconnue"
     
     await query.message.reply_text(msg, parse_mode="HTML")
 
+def format_worker_lines(supervisor, rows) -> str:
+    """Bots attribués, bots ayant répondu et état de chaque worker"""
+    distribution = supervisor.distribution()
+    reported = Counter(row['worker'] for row in rows)
+    return "\n".join(
+        f"• Worker {index} : {reported.get(index, 0)}/{distribution.get(index, 0)} bots "
+        f"({'🟢' if process.is_alive() else '🔴'})"
+        for index, (process, _) in sorted(supervisor.workers.items())
+    )
+
+def format_health_table(rows, supervisor=None, limit: int = 25) -> str:
+    """Tableau de santé des bots hébergés, bots à problème en premier"""
+    workers = ""
+    if supervisor is not None and supervisor.running:
+        workers = "\n⚙️ <b>Workers :</b>\n" + format_worker_lines(supervisor, rows)
+    if not rows:
+        return "🩺 <b>Santé des bots :</b>\nAucun bot hébergé" + workers
+
+    counts = Counter(row['state'] for row in rows)
+    rows.sort(key=lambda row: (HEALTH_STATES[row['state']][1], -(row['api_errors'] + row['handler_errors'])))
+    table = ["   bot             poll  err/5m  exc  redém."]
+    for row in rows[:limit]:
+        name = (f"@{row['name']}" if row['name'] else row['key'].split(':', 1)[0])[:15]
+        poll = "-" if row['last_poll'] is None else f"{row['last_poll']:.0f}s"
+        errors = f"{row['api_errors']}/{row['calls']}"
+        table.append(f"{HEALTH_STATES[row['state']][0]} {name:<15} {poll:>5} {errors:>7} "
+                     f"{row['handler_errors']:>4} {row['restarts']:>6}")
+
+    problems = [
+        f"{HEALTH_STATES[row['state']][0]} {row['name'] or row['key'].split(':', 1)[0]} : "
+        f"{row['last_error'][:80]}"
+        + (f" (relance dans {row['retry_in']:.0f}s)" if row['state'] == BACKOFF and row['retry_in'] is not None else "")
+        for row in rows[:limit] if row['state'] in (QUARANTINED, BACKOFF)
+    ]
+    summary = " · ".join(f"{HEALTH_STATES[state][0]} {count}" for state, count in
+                         sorted(counts.items(), key=lambda item: HEALTH_STATES[item[0]][1]))
+    table = html.escape("\n".join(table))
+    msg = f"🩺 <b>Santé des bots ({len(rows)}) :</b> {summary}\n<pre>{table}</pre>"
+    if problems:
+        msg += "\n" + html.escape("\n".join(problems))
+    return msg + workers
+
 def setup(application):
     """Configure les handlers du tableau de bord"""
     application.add_handler(CommandHandler("start", show_pdg_dashboard))
@@ -0,0 +1,220 @@
+"""
+Suivi en continu des recherches populaires à mémoire fixe.
+
+Chaque portée (utilisateur, groupe, global) conserve un résumé Space-Saving
+par fenêtre de temps (jour, mois) : les k requêtes les plus fréquentes sont
+connues sans jamais parcourir l'historique complet.
+"""
+
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .search_cache import SearchResultCache, group_scope, user_scope
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = ("global", 0)
+
+WINDOW_FORMATS = {
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m"
+}
+
+
+class SpaceSaving:
+    """Top-k approché (algorithme Space-Saving) sur au plus `capacity` compteurs.
+
+    Le plus petit compteur est trouvé par un tas à suppression paresseuse :
+    chaque incrément y ajoute une entrée, les entrées périmées sont ignorées
+    à l'éviction et le tas est reconstruit lorsqu'elles deviennent trop
+    nombreuses (O(log k) amorti par ajout).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+        self._heap: List[Tuple[int, str]] = []
+
+    def _push(self, item: str):
+        heapq.heappush(self._heap, (self.counts[item], item))
+        if len(self._heap) > 4 * self.capacity + 16:
+            self._heap = [(count, item) for item, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, int]:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item, count
+
+    def add(self, item: str, count: int = 1):
+        self.total += count
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            # Le nouvel élément hérite du plus petit compteur (borne d'erreur)
+            victim, floor = self._pop_min()
+            del self.counts[victim]
+            self.errors.pop(victim, None)
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        self._push(item)
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(n, self.counts.items(), key=lambda entry: entry[1])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "counts": self.counts, "errors": self.errors, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SpaceSaving":
+        summary = cls(data.get("capacity", 32))
+        summary.counts = dict(data.get("counts", {}))
+        summary.errors = dict(data.get("errors", {}))
+        summary.total = data.get("total", 0)
+        summary._heap = [(count, item) for item, count in summary.counts.items()]
+        heapq.heapify(summary._heap)
+        return summary
+
+
+class WindowedTopK:
+    """Résumé Space-Saving remis à zéro à chaque nouvelle fenêtre (jour/mois)"""
+
+    def __init__(self, window: str, capacity: int):
+        self.window = window
+        self.capacity = capacity
+        self.key = self._current_key()
+        self.current = SpaceSaving(capacity)
+        self.previous: Optional[SpaceSaving] = None
+
+    def _current_key(self) -> str:
+        return datetime.now().strftime(WINDOW_FORMATS[self.window])
+
+    def _rollover(self):
+        key = self._current_key()
+        if key != self.key:
+            self.previous = self.current
+            self.current = SpaceSaving(self.capacity)
+            self.key = key
+
+    def add(self, item: str):
+        self._rollover()
+        self.current.add(item)
+
+    def summary(self) -> SpaceSaving:
+        self._rollover()
+        return self.current
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window": self.window,
+            "key": self.key,
+            "current": self.current.to_dict(),
+            "previous": self.previous.to_dict() if self.previous else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], capacity: int) -> "WindowedTopK":
+        windowed = cls(data["window"], capacity)
+        windowed.key = data.get("key", windowed.key)
+        windowed.current = SpaceSaving.from_dict(data.get("current", {}))
+        if data.get("previous"):
+            windowed.previous = SpaceSaving.from_dict(data["previous"])
+        windowed._rollover()
+        return windowed
+
+
+class SearchTrends:
+    """Recherches populaires par utilisateur, par groupe et globales"""
+
+    def __init__(self, scope_capacity: int = 16, global_capacity: int = 256, max_scopes: int = 10000):
+        self.scope_capacity = scope_capacity      # Compteurs par utilisateur/groupe
+        self.global_capacity = global_capacity    # Compteurs pour la portée globale
+        self.max_scopes = max_scopes              # Portées suivies au maximum (LRU)
+        self._scopes: "OrderedDict[Hashable, Dict[str, WindowedTopK]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _capacity(self, scope: Hashable) -> int:
+        return self.global_capacity if scope == GLOBAL_SCOPE else self.scope_capacity
+
+    def _windows(self, scope: Hashable) -> Dict[str, WindowedTopK]:
+        windows = self._scopes.get(scope)
+        if windows is None:
+            capacity = self._capacity(scope)
+            windows = {window: WindowedTopK(window, capacity) for window in WINDOW_FORMATS}
+            self._scopes[scope] = windows
+            while len(self._scopes) > self.max_scopes:
+                oldest = next(iter(self._scopes))
+                if oldest == GLOBAL_SCOPE:
+                    self._scopes.move_to_end(oldest)
+                    continue
+                del self._scopes[oldest]
+        self._scopes.move_to_end(scope)
+        return windows
+
+    def record(self, query: str, user_id: Optional[int] = None, group_id: Optional[int] = None):
+        """Comptabilise une recherche pour l'utilisateur, le groupe et le global"""
+        query = SearchResultCache.normalize_query(query)
+        if not query:
+            return
+
+        scopes = [GLOBAL_SCOPE]
+        if user_id is not None:
+            scopes.append(user_scope(user_id))
+        if group_id is not None:
+            scopes.append(group_scope(group_id))
+
+        with self._lock:
+            for scope in scopes:
+                for windowed in self._windows(scope).values():
+                    windowed.add(query)
+
+    def top(self, scope: Hashable = GLOBAL_SCOPE, window: str = "month", n: int = 5) -> List[Dict[str, Any]]:
+        """Requêtes les plus fréquentes, au format attendu par format_popular_searches"""
+        with self._lock:
+            if scope not in self._scopes:
+                return []
+            summary = self._windows(scope)[window].summary()
+            return [{"query": query, "count": count} for query, count in summary.top(n)]
+
+    def total(self, scope: Hashable = GLOBAL_SCOPE, window: str = "month") -> int:
+        """Nombre de recherches de la portée dans la fenêtre courante"""
+        with self._lock:
+            if scope not in self._scopes:
+                return 0
+            return self._windows(scope)[window].summary().total
+
+    # --- Persistance ---
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "scopes": [
+                    [list(scope), {window: windowed.to_dict() for window, windowed in windows.items()}]
+                    for scope, windows in self._scopes.items()
+                ]
+            }
+
+    def load_dict(self, data: Optional[Dict[str, Any]]):
+        if not data:
+            return
+        with self._lock:
+            for scope, windows in data.get("scopes", []):
+                scope = tuple(scope)
+                capacity = self._capacity(scope)
+                self._scopes[scope] = {
+                    window: WindowedTopK.from_dict(windowed, capacity) for window, windowed in windows.items()
+                }
+
+
+# Instance partagée alimentée par log_search / save_search_history
+search_trends = SearchTrends()
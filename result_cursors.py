@@ -0,0 +1,80 @@
+"""
+Curseurs de résultats de recherche pour la pagination par boutons.
+
+Les résultats d'une recherche sont conservés côté serveur sous un identifiant
+court, ce qui permet de paginer sans relancer la requête ni débiter de
+nouveaux crédits, tout en gardant les callback_data sous la limite de
+64 octets de Telegram (ex: "more_results:Ab3_x9Qz:12").
+"""
+
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCursorStore:
+    """Résultats paginables avec durée de vie et plafond mémoire"""
+
+    def __init__(self, ttl: int = 900, max_cursors: int = 1000, max_results: int = 200):
+        self.ttl = ttl                    # Secondes avant expiration d'un curseur
+        self.max_cursors = max_cursors    # Curseurs conservés au maximum (LRU)
+        self.max_results = max_results    # Résultats conservés par curseur
+        self._cursors: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge_expired(self, now: float):
+        while self._cursors:
+            cursor_id, cursor = next(iter(self._cursors.items()))
+            if now - cursor["created_at"] < self.ttl:
+                break
+            del self._cursors[cursor_id]
+
+    def create(self, results: list, **meta) -> str:
+        """Enregistre des résultats et retourne l'identifiant du curseur"""
+        cursor_id = secrets.token_urlsafe(6)  # 8 caractères
+        now = time.monotonic()
+        with self._lock:
+            self._purge_expired(now)
+            self._cursors[cursor_id] = {
+                "results": list(results[:self.max_results]),
+                "total": min(len(results), self.max_results),
+                "created_at": now,
+                **meta
+            }
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+        return cursor_id
+
+    def get(self, cursor_id: str) -> Optional[Dict[str, Any]]:
+        """Retourne un curseur encore valide"""
+        with self._lock:
+            cursor = self._cursors.get(cursor_id)
+            if cursor is None:
+                return None
+            if time.monotonic() - cursor["created_at"] >= self.ttl:
+                del self._cursors[cursor_id]
+                return None
+            return cursor
+
+    def page(self, cursor_id: str, page: int, page_size: int) -> Optional[Tuple[List[Any], int]]:
+        """Retourne (résultats de la page, nombre total de résultats)"""
+        cursor = self.get(cursor_id)
+        if cursor is None or page < 0:
+            return None
+        start = page * page_size
+        return cursor["results"][start:start + page_size], cursor["total"]
+
+    def get_result(self, cursor_id: str, index: int) -> Optional[Any]:
+        cursor = self.get(cursor_id)
+        if cursor is None or not 0 <= index < cursor["total"]:
+            return None
+        return cursor["results"][index]
+
+
+# Instance partagée par les gestionnaires de recherche
+result_cursors = ResultCursorStore()
@@ -4,12 +4,22 @@ logger = logging.getLogger(__name__)
 Gestionnaire des fonctions de recherche et d'indexation
 """
 
+import asyncio
 import logging
 import os
-import hashlib
+import re
+import time
+from collections import Counter
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+from utils.search_cache import search_cache, user_scope
+from utils import text_extraction, document_ingest
+from utils.text_extraction import ExtractionBudgetExceeded
+from utils.blob_store import get_blob_store
+from utils.text_analysis import NON_ALNUM as _NON_ALNUM, tokenize, top_keywords, analysis_cache
+from utils.similar_documents import similar_documents
+from utils.result_cursors import result_cursors
 
 class SearchHandler:
     """Gestionnaire des fonctions de recherche"""
@@ -18,8 +28,9 @@ class SearchHandler:
         self.db = db
         self.translations = translations
         self.logger = logging.getLogger(__name__)
-        self.supported_formats = ['.pdf', '.docx', '.txt', '.md', '.doc']
+        self.supported_formats = list(text_extraction.SUPPORTED_EXTENSIONS)
         self.max_file_size = 50 * 1024 * 1024  # 50MB
+        self.progress_interval = 3  # secondes entre deux mises à jour de progression
     
     async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Commande /search - Recherche dans les documents indexés"""
@@ -83,7 +94,7 @@ class SearchHandler:
 
 🔍 **Formats supportés:**
 • PDF (.pdf)
-• Word (.docx, .doc)
+• Word (.docx)
 • Texte (.txt, .md)
 
 📊 **Vos statistiques:**
@@ -162,39 +173,37 @@ class SearchHandler:
                 "⏳ Téléchargement et analyse..."
             )
             
-            # Télécharger le fichier
+            # Télécharger le fichier en mémoire (ou fichier temporaire si volumineux)
             file = await context.bot.get_file(document.file_id)
-            file_path = f"uploads/{user_id}_{document.file_id}_{document.file_name}"
             
-            # Créer le dossier uploads s'il n'existe pas
-            os.makedirs("uploads", exist_ok=True)
-            
-            await file.download_to_drive(file_path)
-            
-            # Extraire le texte selon le format
-            extracted_text = await self.extract_text_from_file(file_path, file_extension)
-            
-            if not extracted_text:
-                await processing_msg.edit_text(
-                    "❌ **Erreur d'extraction**\n\n"
-                    "Impossible d'extraire le texte de ce document.\n"
-                    "Le fichier pourrait être corrompu ou protégé."
+            async with document_ingest.downloaded_document(file, document.file_size, file_extension) as source:
+                # Extraire le texte page par page selon le format
+                extracted_text, truncated = await self.extract_text_with_progress(
+                    source, file_extension, processing_msg, document.file_name
                 )
-                return
+                
+                if not extracted_text:
+                    await processing_msg.edit_text(
+                        "❌ **Erreur d'extraction**\n\n"
+                        "Impossible d'extraire le texte de ce document.\n"
+                        "Le fichier pourrait être corrompu ou protégé."
+                    )
+                    return
             
             # Indexer le document
             doc_id = await self.index_document(
                 user_id=user_id,
                 file_name=document.file_name,
                 file_size=document.file_size,
-                file_path=file_path,
+                file_path=None,
                 content=extracted_text,
                 file_type=file_extension
             )
             
-            # Analyser le contenu
-            word_count = len(extracted_text.split())
-            keywords = self.extract_keywords(extracted_text)
+            # Analyse déjà calculée par l'indexation (cache par empreinte)
+            analysis = self.analyze_document(extracted_text)
+            word_count = analysis['word_count']
+            keywords = analysis['keywords']
             
             await processing_msg.edit_text(
                 f"✅ **Document indexé avec succès!**\n\n"
@@ -202,15 +211,10 @@ class SearchHandler:
                 f"🔤 Mots extraits: {word_count:,}\n"
                 f"🏷️ Mots-clés: {', '.join(keywords[:5])}\n"
                 f"🆔 ID: `{doc_id}`\n\n"
-                f"🔍 Utilisez `/search` pour rechercher dans ce document!",
+                + ("⚠️ Document volumineux: seules les premières pages ont été indexées.\n\n" if truncated else "")
+                + f"🔍 Utilisez `/search` pour rechercher dans ce document!",
                 parse_mode='Markdown'
             )
-            
-            # Nettoyer le fichier temporaire
-            try:
-                os.remove(file_path)
-            except:
-                pass
                 
         except Exception as e:
             self.logger.error(f"Erreur lors de l'indexation: {e}")
@@ -222,88 +226,119 @@ class SearchHandler:
     
     async def extract_text_from_file(self, file_path, file_extension):
         """Extrait le texte d'un fichier selon son format"""
+        text, _ = await self.extract_text_with_progress(file_path, file_extension)
+        return text
+
+    async def extract_text_with_progress(self, source, file_extension, processing_msg=None, file_name=""):
+        """Extrait le texte page par page dans le pool de processus.
+
+        Retourne (texte, tronqué). La progression est affichée en éditant
+        processing_msg ; si le budget du document est dépassé, les pages
+        déjà extraites sont conservées.
+        """
+        pages = []
+        truncated = False
+        last_progress = time.monotonic()
+
         try:
-            if file_extension in ['.txt', '.md']:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            
-            elif file_extension == '.pdf':
-                # Simulation d'extraction PDF (nécessiterait PyPDF2 ou pdfplumber)
-                return f"Contenu simulé du PDF: {os.path.basename(file_path)}\n" + \
-                       "Ceci est un contenu d'exemple pour la démonstration.\n" + \
-                       "Dans un environnement réel, le contenu serait extrait du PDF."
-            
-            elif file_extension in ['.docx', '.doc']:
-                # Simulation d'extraction Word (nécessiterait python-docx)
-                return f"Contenu simulé du document Word: {os.path.basename(file_path)}\n" + \
-                       "Texte d'exemple extrait du document Word.\n" + \
-                       "En production, le vrai contenu serait analysé."
-            
-            else:
-                return None
-                
+            async for page_number, total_pages, page_text in text_extraction.iter_pages(source, file_extension):
+                pages.append(page_text)
+
+                now = time.monotonic()
+                if processing_msg and total_pages > 1 and now - last_progress >= self.progress_interval:
+                    last_progress = now
+                    await self.report_extraction_progress(processing_msg, file_name, page_number, total_pages)
+        except ExtractionBudgetExceeded as e:
+            self.logger.warning(f"Extraction interrompue ({file_name}): {e}")
+            truncated = True
         except Exception as e:
             self.logger.error(f"Erreur extraction texte: {e}")
-            return None
+            return None, False
+
+        text = "\n".join(pages).strip()
+        return (text or None), truncated
+
+    async def report_extraction_progress(self, processing_msg, file_name, page_number, total_pages):
+        """Met à jour le message de traitement avec l'avancement de l'extraction"""
+        percent = int(100 * page_number / total_pages)
+        try:
+            await processing_msg.edit_text(
+                "🔄 **Traitement en cours...**\n\n"
+                f"📄 Fichier: {file_name}\n"
+                f"📑 Pages analysées: {page_number}/{total_pages} ({percent}%)\n\n"
+                "⏳ Extraction du texte..."
+            )
+        except Exception as e:
+            self.logger.debug(f"Mise à jour de progression ignorée: {e}")
     
     async def index_document(self, user_id, file_name, file_size, file_path, content, file_type):
         """Indexe un document dans la base de données"""
-        # Générer un hash unique pour le document
-        content_hash = hashlib.md5(content.encode()).hexdigest()
+        # Le contenu est stocké une seule fois, sous son empreinte SHA-256
+        blob_store = get_blob_store()
+        content_hash = blob_store.digest(content)
         
-        # Vérifier si le document existe déjà
+        # Vérifier si le document existe déjà pour cet utilisateur
         existing_doc = self.db.get_document_by_hash(user_id, content_hash)
         if existing_doc:
             return existing_doc['id']
         
-        # Créer l'entrée dans la base de données
+        # Un seul parcours du texte, partagé avec la réponse et les recommandations
+        analysis = self.analyze_document(content, content_hash)
+        blob_store.put(content, {
+            'keywords': ','.join(analysis['keywords']),
+            'word_count': analysis['word_count'],
+            'positions': analysis['positions']
+        })
+        
+        # Créer la fiche de l'utilisateur (sans le contenu)
         doc_data = {
             'user_id': user_id,
             'file_name': file_name,
             'file_size': file_size,
             'file_type': file_type,
-            'content': content,
             'content_hash': content_hash,
-            'keywords': ','.join(self.extract_keywords(content)),
+            'keywords': ','.join(analysis['keywords']),
             'indexed_at': datetime.now(),
-            'word_count': len(content.split())
+            'word_count': analysis['word_count']
         }
         
-        return self.db.create_indexed_document(doc_data)
+        doc_id = self.db.create_indexed_document(doc_data)
+        await asyncio.to_thread(similar_documents.add, doc_id, user_id, term_counts=analysis['term_counts'])
+        search_cache.bump(user_scope(user_id))
+        return doc_id
+
+    async def delete_document(self, user_id, doc_id):
+        """Supprime un document indexé et invalide les recherches en cache"""
+        document = self.db.get_indexed_document(doc_id)
+        deleted = self.db.delete_indexed_document(user_id, doc_id)
+        if deleted:
+            get_blob_store().release(document['content_hash'])
+            await asyncio.to_thread(similar_documents.remove, doc_id, user_id)
+        return deleted
+
+    def get_document_content(self, document):
+        """Retourne le texte d'un document depuis le stockage de blobs"""
+        if 'content' in document:
+            return document['content'] or ''
+        return get_blob_store().get(document.get('content_hash', '')) or ''
     
+    def analyze_document(self, content, content_hash=None):
+        """Analyse d'un document (mots, termes, mots-clés, positions), calculée une fois par contenu"""
+        digest = content_hash or get_blob_store().digest(content)
+        return analysis_cache.get(digest, content)
+
     def extract_keywords(self, text):
         """Extrait les mots-clés d'un texte"""
-        # Liste de mots vides en français et anglais
-        stop_words = {
-            'le', 'la', 'les', 'un', 'une', 'des', 'du', 'de', 'et', 'ou', 'mais',
-            'donc', 'car', 'que', 'qui', 'quoi', 'dont', 'où', 'ce', 'cette',
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been'
-        }
-        
-        # Nettoyer et diviser le texte
-        words = text.lower().split()
-        cleaned_words = []
-        
-        for word in words:
-            # Enlever la ponctuation
-            word = ''.join(char for char in word if char.isalnum())
-            
-            # Filtrer les mots courts et les mots vides
-            if len(word) > 3 and word not in stop_words:
-                cleaned_words.append(word)
-        
-        # Compter les occurrences
-        word_count = {}
-        for word in cleaned_words:
-            word_count[word] = word_count.get(word, 0) + 1
-        
-        # Retourner les mots les plus fréquents
-        sorted_words = sorted(word_count.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, count in sorted_words[:20]]
+        return top_keywords(Counter(tokenize(text)))
     
     async def perform_search(self, query, user_id):
         """Effectue une recherche dans les documents indexés"""
+        # Requête déjà calculée pour cet index ?
+        scope = user_scope(user_id)
+        cached = search_cache.get(scope, query)
+        if cached is not None:
+            return cached
+
         # Analyser la requête
         search_terms = self.parse_search_query(query)
         
@@ -319,7 +354,9 @@ class SearchHandler:
         # Trier par score décroissant
         scored_results.sort(key=lambda x: x[0], reverse=True)
         
-        return [result for score, result in scored_results[:20]]  # Top 20 résultats
+        top_results = [result for score, result in scored_results[:20]]  # Top 20 résultats
+        search_cache.put(scope, query, top_results)
+        return top_results
     
     def parse_search_query(self, query):
         """Analyse une requête de recherche"""
@@ -361,7 +398,7 @@ class SearchHandler:
     def calculate_relevance_score(self, document, search_terms):
         """Calcule un score de pertinence pour un document"""
         score = 0
-        content = document.get('content', '').lower()
+        content = self.get_document_content(document).lower()
         title = document.get('file_name', '').lower()
         keywords = document.get('keywords', '').lower()
         
@@ -400,9 +437,8 @@ class SearchHandler:
         text += f"Résultats: {len(results)} document(s)\n\n"
         
         for i, result in enumerate(results[:10], 1):
-            # Créer un extrait du contenu
-            content = result.get('content', '')
-            extract = self.create_excerpt(content, query)
+            # Créer un extrait du contenu (seul le bloc concerné est décompressé)
+            extract = self.create_document_excerpt(result, query)
             
             text += f"**{i}. {result['file_name']}**\n"
             text += f"   📄 Type: {result['file_type']}\n"
@@ -414,9 +450,13 @@ class SearchHandler:
         
         text += "💡 Utilisez `/search \"phrase exacte\"` pour une recherche plus précise"
         
+        # La requête reste côté serveur : les callback_data sont limitées à 64 octets
+        cursor_id = result_cursors.create(results, query=query, user_id=update.effective_user.id)
         keyboard = [
-            [InlineKeyboardButton("📊 Filtrer résultats", callback_data=f"search_filter_{query}")],
-            [InlineKeyboardButton("💾 Exporter résultats", callback_data=f"search_export_{query}")],
+            [InlineKeyboardButton(f"📎 Similaires à {i}", callback_data=f"search_similar_{result['id']}")
+             for i, result in enumerate(results[:3], 1) if result.get('id')],
+            [InlineKeyboardButton("📊 Filtrer résultats", callback_data=f"search_filter:{cursor_id}")],
+            [InlineKeyboardButton("💾 Exporter résultats", callback_data=f"search_export:{cursor_id}")],
             [InlineKeyboardButton("🔍 Nouvelle recherche", callback_data="search_new")]
         ]
         
@@ -462,11 +502,61 @@ class SearchHandler:
         
         return excerpt.strip()
     
+    def create_document_excerpt(self, document, query, max_length=100):
+        """Crée un extrait d'un document stocké sans le décompresser en entier"""
+        digest = document.get('content_hash')
+        if 'content' in document or not digest:
+            return self.create_excerpt(self.get_document_content(document), query, max_length)
+        
+        blob_store = get_blob_store()
+        metadata = blob_store.get_metadata(digest) or {}
+        size = metadata.get('size', 0)
+        if not size:
+            return "Aucun contenu disponible"
+        
+        # Positions mémorisées à l'indexation, sinon parcours bloc par bloc
+        query_words = [word for word in (_NON_ALNUM.sub('', w) for w in query.lower().split()) if word]
+        positions = metadata.get('positions', {})
+        best_position = next((positions[word] for word in query_words if word in positions), None)
+        if best_position is None:
+            best_position = self.find_term_position(digest, query_words)
+        
+        start = max(0, best_position - max_length // 2)
+        end = min(size, start + max_length)
+        excerpt = blob_store.read_range(digest, start, end)
+        
+        if start > 0:
+            excerpt = "..." + excerpt
+        if end < size:
+            excerpt = excerpt + "..."
+        
+        return excerpt.strip()
+    
+    def find_term_position(self, digest, words):
+        """Cherche la première occurrence d'un terme en décompressant bloc par bloc"""
+        if not words:
+            return 0
+        for _, offset, text in get_blob_store().iter_chunks(digest):
+            text_lower = text.lower()
+            for word in words:
+                pos = text_lower.find(word)
+                if pos != -1:
+                    return offset + pos
+        return 0
+    
     async def handle_callback(self, update, context):
         """Gestionnaire des callbacks de recherche"""
         query = update.callback_query
         data = query.data
         
+        cursor = None
+        if data.startswith(("search_filter:", "search_ftype:", "search_export:")):
+            cursor_id = data.split(":")[1]
+            cursor = result_cursors.get(cursor_id)
+            if cursor is None or cursor.get('user_id') != query.from_user.id:
+                await query.answer("⌛ Résultats expirés. Relancez la recherche.", show_alert=True)
+                return
+        
         await query.answer()
         
         if data == "search_my_docs":
@@ -475,15 +565,94 @@ class SearchHandler:
             await self.show_delete_options(query)
         elif data == "search_stats":
             await self.show_search_statistics(query)
-        elif data.startswith("search_filter_"):
-            query_text = data.replace("search_filter_", "")
-            await self.show_filter_options(query, query_text)
-        elif data.startswith("search_export_"):
-            query_text = data.replace("search_export_", "")
-            await self.export_search_results(query, query_text)
+        elif data.startswith("search_filter:"):
+            await self.show_filter_options(query, cursor_id, cursor)
+        elif data.startswith("search_ftype:"):
+            await self.show_filtered_results(query, cursor_id, cursor, int(data.split(":")[2]))
+        elif data.startswith("search_export:"):
+            await self.export_search_results(query, cursor['query'])
+        elif data.startswith("search_similar_"):
+            doc_id = data.replace("search_similar_", "")
+            await self.show_similar_documents(query, doc_id)
         elif data == "search_new":
             await self.prompt_new_search(query)
     
+    @staticmethod
+    def count_file_types(results):
+        """(type, nombre) des résultats d'un curseur, dans un ordre stable"""
+        return Counter(result['file_type'] for result in results).most_common()
+    
+    async def show_filter_options(self, query, cursor_id, cursor):
+        """Propose un filtre par type avec le nombre de résultats de chacun"""
+        type_counts = self.count_file_types(cursor['results'])
+        
+        if not type_counts:
+            await query.edit_message_text("🔍 Aucun résultat à filtrer.")
+            return
+        
+        # Le type est désigné par sa position : un type MIME dépasserait les 64 octets
+        keyboard = [
+            [InlineKeyboardButton(f"{file_type} ({count})", callback_data=f"search_ftype:{cursor_id}:{position}")]
+            for position, (file_type, count) in enumerate(type_counts)
+        ]
+        keyboard.append([InlineKeyboardButton("🔍 Nouvelle recherche", callback_data="search_new")])
+        
+        await query.edit_message_text(
+            f"📊 **Filtrer les résultats**\n\nRequête: `{cursor['query']}`\nChoisissez un type de document :",
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode='Markdown'
+        )
+    
+    async def show_filtered_results(self, query, cursor_id, cursor, position):
+        """Affiche les résultats d'un seul type de document"""
+        type_counts = self.count_file_types(cursor['results'])
+        if not 0 <= position < len(type_counts):
+            await query.edit_message_text("🔍 Aucun résultat à filtrer.")
+            return
+        file_type, query_text = type_counts[position][0], cursor['query']
+        results = [result for result in cursor['results'] if result['file_type'] == file_type]
+        
+        text = f"🔍 **Résultats {file_type}**\n\nRequête: `{query_text}`\nRésultats: {len(results)} document(s)\n\n"
+        for i, result in enumerate(results[:10], 1):
+            text += f"**{i}. {result['file_name']}**\n"
+            text += f"   📝 Extrait: _{self.create_document_excerpt(result, query_text)}_\n\n"
+        
+        keyboard = [[InlineKeyboardButton("📊 Autres filtres", callback_data=f"search_filter:{cursor_id}")]]
+        await query.edit_message_text(text[:4000], reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+    
+    async def show_similar_documents(self, query, doc_id, limit=5):
+        """Affiche les documents de l'utilisateur les plus proches d'un document"""
+        user_id = query.from_user.id
+        document = self.db.get_indexed_document(doc_id)
+        if not document or str(document.get('user_id')) != str(user_id):
+            await query.message.reply_text("❌ Document introuvable.")
+            return
+        
+        neighbours = await asyncio.to_thread(
+            self.find_similar_documents, user_id, doc_id, document, self.db.get_user_documents(user_id), limit
+        )
+        text = f"📎 **Documents similaires à** {document['file_name']}\n\n"
+        if not neighbours:
+            text += "Aucun document suffisamment proche."
+        for i, (similar_id, score) in enumerate(neighbours, 1):
+            similar_doc = self.db.get_indexed_document(similar_id)
+            if similar_doc:
+                text += f"**{i}. {similar_doc['file_name']}** — {round(score * 100)}%\n"
+        
+        await query.message.reply_text(text, parse_mode='Markdown')
+    
+    def find_similar_documents(self, user_id, doc_id, document, user_documents, limit):
+        """Voisins d'un document (bloquant : exécuté hors de la boucle d'événements)"""
+        # Après un redémarrage, les vecteurs de l'utilisateur sont reconstruits une fois
+        similar_documents.ensure_owner_loaded(user_id, (
+            (doc['id'], self.analyze_document(self.get_document_content(doc), doc['content_hash'])['term_counts'])
+            for doc in user_documents if doc['id'] not in similar_documents
+        ))
+        if doc_id not in similar_documents:
+            content = self.get_document_content(document)
+            similar_documents.add(doc_id, user_id, term_counts=self.analyze_document(content)['term_counts'])
+        return similar_documents.similar(doc_id, k=limit, owner_id=user_id)
+    
     async def show_user_documents(self, query):
         """Affiche les documents de l'utilisateur"""
         user_id = query.from_user.id
@@ -512,6 +681,7 @@ class SearchHandler:
         """Affiche les statistiques de recherche"""
         user_id = query.from_user.id
         stats = self.db.get_user_search_stats(user_id)
+        stats['popular_searches'] = self.db.get_popular_searches(user_id)
         
         text = f"""📊 **Statistiques de Recherche**
 
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Banc d'essai des performances de recherche sur un corpus synthétique
+
+Génère un corpus reproductible (documents et fichiers de groupes en français
+et en anglais), construit les index puis mesure les latences p50/p95/p99,
+le débit, le temps de construction et la mémoire de :
+  - SearchHandler.perform_search / parse_search_query / extract_keywords
+  - la recherche des fichiers de groupes (db.search_files)
+
+Usage:
+    python search_benchmark.py --docs 500 --files 5000 --groups 20 --queries 300
+    python search_benchmark.py --json resultats.json
+    python search_benchmark.py --baseline resultats.json --max-regression 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+sys.path.insert(0, str(PROJECT_ROOT))
+from import_aliases import install  # noqa: E402
+
+install(PROJECT_ROOT)  # utils.* / extensions.handlers.* depuis une copie du dépôt
+
+# La base doit pointer vers un répertoire jetable avant l'import des modules
+os.environ["DB_PATH"] = tempfile.mkdtemp(prefix="telesuche_bench_")
+
+from utils.memory_full import db  # noqa: E402
+from utils.database import DatabaseManager  # noqa: E402
+from utils.search_cache import search_cache  # noqa: E402
+from extensions.handlers.search import SearchHandler  # noqa: E402
+from extensions.handlers.file_indexer import FileIndexer  # noqa: E402
+
+FRENCH_WORDS = (
+    "contrat facture rapport réunion projet budget client fournisseur livraison "
+    "commande paiement banque compte relevé impôt déclaration salaire employé "
+    "formation cours examen université étudiant professeur chapitre leçon exercice "
+    "mathématiques physique chimie histoire géographie littérature philosophie "
+    "économie droit médecine santé hôpital assurance voiture maison location "
+    "vacances voyage billet hôtel réservation musique film série épisode saison "
+    "recette cuisine marché produit prix promotion boutique vente achat garantie "
+    "document fichier archive version brouillon final important urgent confidentiel"
+).split()
+
+ENGLISH_WORDS = (
+    "contract invoice report meeting project budget customer supplier delivery "
+    "order payment bank account statement tax return salary employee training "
+    "course exam university student teacher chapter lesson exercise mathematics "
+    "physics chemistry history geography literature philosophy economics law "
+    "medicine health hospital insurance car house rental holiday travel ticket "
+    "hotel booking music movie series episode season recipe cooking market product "
+    "price discount shop sale purchase warranty document file archive version "
+    "draft final important urgent confidential"
+).split()
+
+STOP_WORDS = "le la les un une des du de et ou the a an and or of to in for with".split()
+
+DOCUMENT_EXTENSIONS = ['.pdf', '.docx', '.txt', '.md']
+
+
+class SyntheticCorpus:
+    """Corpus reproductible à distribution de Zipf"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.vocabulary = FRENCH_WORDS + ENGLISH_WORDS
+        self.rng.shuffle(self.vocabulary)
+        self.weights = [1.0 / rank for rank in range(1, len(self.vocabulary) + 1)]
+
+    def words(self, count: int):
+        words = self.rng.choices(self.vocabulary, weights=self.weights, k=count)
+        for index in range(0, count, 7):
+            words[index] = self.rng.choice(STOP_WORDS)
+        return words
+
+    def sentence(self, count: int) -> str:
+        return " ".join(self.words(count)).capitalize() + "."
+
+    def document(self, user_id: int, doc_number: int, word_count: int) -> dict:
+        sentences = [self.sentence(self.rng.randint(8, 20)) for _ in range(max(1, word_count // 14))]
+        return {
+            'user_id': user_id,
+            'file_name': f"{'_'.join(self.words(3))}_{doc_number}{self.rng.choice(DOCUMENT_EXTENSIONS)}",
+            'content': " ".join(sentences),
+            'file_type': self.rng.choice(DOCUMENT_EXTENSIONS)
+        }
+
+    def group_file(self, group_id: int, file_number: int, start: datetime) -> dict:
+        file_type = self.rng.choices(list(FileIndexer.FILE_TYPES), weights=[6, 2, 3, 1])[0]
+        return {
+            'file_id': f"BQACAgQAAxkBAAI{group_id}_{file_number:08d}",
+            'file_type': file_type,
+            'title': " ".join(self.words(self.rng.randint(2, 6))).title(),
+            'description': self.sentence(self.rng.randint(0, 12)) if self.rng.random() < 0.6 else "",
+            'group_id': group_id,
+            'user_id': self.rng.randint(1, 500),
+            'timestamp': start + timedelta(minutes=file_number)
+        }
+
+    def query(self) -> str:
+        kind = self.rng.random()
+        words = self.words(self.rng.randint(1, 3))
+        if kind < 0.15:
+            return f'"{" ".join(self.words(2))}"'
+        if kind < 0.25:
+            return f"{words[0]} -{self.rng.choice(self.vocabulary)}"
+        if kind < 0.30:
+            return f"tag:{words[0]} {' '.join(words[1:])}"
+        return " ".join(words)
+
+
+def percentiles(samples):
+    """p50/p95/p99 en millisecondes"""
+    ordered = sorted(samples)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))] * 1000
+
+    return {"p50_ms": round(pick(0.50), 3), "p95_ms": round(pick(0.95), 3), "p99_ms": round(pick(0.99), 3)}
+
+
+def summarize(samples):
+    total = sum(samples)
+    return dict(percentiles(samples), count=len(samples), ops_per_s=round(len(samples) / total, 1) if total else 0.0)
+
+
+def max_rss_mb():
+    """Pic de mémoire résidente du processus (None si le système ne le fournit pas)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+async def run_benchmark(args) -> dict:
+    corpus = SyntheticCorpus(args.seed)
+    handler = SearchHandler(DatabaseManager(), None)
+    results = {"parameters": vars(args).copy()}
+    results["parameters"].pop("baseline", None)
+    results["parameters"].pop("json", None)
+
+    tracemalloc.start()
+
+    # Construction de l'index des documents
+    documents = [corpus.document(1 + i % args.users, i, args.doc_words) for i in range(args.docs)]
+    started = time.perf_counter()
+    for doc in documents:
+        await handler.index_document(
+            user_id=doc['user_id'], file_name=doc['file_name'], file_size=len(doc['content']),
+            file_path=None, content=doc['content'], file_type=doc['file_type']
+        )
+    results["document_index_build_s"] = round(time.perf_counter() - started, 3)
+
+    # Construction de l'index des fichiers de groupes
+    start_date = datetime(2025, 1, 1)
+    group_ids = [-1001000000000 - i for i in range(args.groups)]
+    started = time.perf_counter()
+    for number in range(args.files):
+        db.index_file(corpus.group_file(group_ids[number % len(group_ids)], number, start_date))
+    results["file_index_build_s"] = round(time.perf_counter() - started, 3)
+
+    current, peak = tracemalloc.get_traced_memory()
+    results["memory"] = {"python_current_mb": round(current / 2**20, 2), "python_peak_mb": round(peak / 2**20, 2)}
+
+    queries = [corpus.query() for _ in range(args.queries)]
+
+    def timed(func, items):
+        samples = []
+        for item in items:
+            began = time.perf_counter()
+            func(item)
+            samples.append(time.perf_counter() - began)
+        return summarize(samples)
+
+    results["parse_search_query"] = timed(handler.parse_search_query, queries)
+    results["extract_keywords"] = timed(handler.extract_keywords, [doc['content'] for doc in documents[:args.queries]])
+
+    async def timed_search(cold: bool):
+        samples = []
+        for number, query in enumerate(queries):
+            user_id = 1 + number % args.users
+            if cold:
+                search_cache.clear()
+            else:
+                await handler.perform_search(query, user_id)
+            began = time.perf_counter()
+            await handler.perform_search(query, user_id)
+            samples.append(time.perf_counter() - began)
+        return summarize(samples)
+
+    results["perform_search_cold"] = await timed_search(cold=True)
+    results["perform_search_hot"] = await timed_search(cold=False)
+    results["search_files"] = timed(
+        lambda item: db.search_files(item[1], group_id=item[0]),
+        [(group_ids[n % len(group_ids)], query) for n, query in enumerate(queries)]
+    )
+
+    tracemalloc.stop()
+    results["memory"]["max_rss_mb"] = max_rss_mb()
+    return results
+
+
+def print_report(results: dict):
+    params = results["parameters"]
+    print(f"\n📊 Banc d'essai recherche — {params['docs']} documents, {params['files']} fichiers, "
+          f"{params['groups']} groupes, {params['queries']} requêtes (seed {params['seed']})\n")
+    print(f"Construction index documents : {results['document_index_build_s']} s")
+    print(f"Construction index fichiers  : {results['file_index_build_s']} s")
+    memory = results["memory"]
+    print(f"Mémoire Python (courante/pic): {memory['python_current_mb']} / {memory['python_peak_mb']} MB, "
+          f"RSS max: {memory['max_rss_mb']} MB\n")
+    print(f"{'Opération':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}")
+    for name in ("parse_search_query", "extract_keywords", "perform_search_cold", "perform_search_hot", "search_files"):
+        stats = results[name]
+        print(f"{name:<24}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['ops_per_s']:>12}")
+
+
+def compare_with_baseline(results: dict, baseline_path: str, max_regression: float) -> list:
+    """Liste des mesures ayant régressé au-delà du seuil"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if not isinstance(stats, dict) or not isinstance(reference, dict) or "p95_ms" not in stats:
+            continue
+        if reference["p95_ms"] and stats["p95_ms"] > reference["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {reference['p95_ms']} → {stats['p95_ms']} ms")
+    for name in ("document_index_build_s", "file_index_build_s"):
+        if baseline.get(name) and results[name] > baseline[name] * (1 + max_regression):
+            regressions.append(f"{name}: {baseline[name]} → {results[name]} s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai des performances de recherche")
+    parser.add_argument("--docs", type=int, default=500, help="Nombre de documents indexés")
+    parser.add_argument("--doc-words", type=int, default=400, help="Mots par document")
+    parser.add_argument("--users", type=int, default=10, help="Utilisateurs se partageant les documents")
+    parser.add_argument("--files", type=int, default=5000, help="Nombre de fichiers de groupes")
+    parser.add_argument("--groups", type=int, default=20, help="Nombre de groupes de recherche")
+    parser.add_argument("--queries", type=int, default=300, help="Requêtes par mesure")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du corpus")
+    parser.add_argument("--json", help="Écrit les résultats dans ce fichier JSON")
+    parser.add_argument("--baseline", help="Résultats JSON de référence à comparer")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Régression p95 tolérée (0.25 = +25%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.max_regression)
+        if regressions:
+            print("\n❌ Régressions détectées:\n" + "\n".join(f"  • {line}" for line in regressions))
+            sys.exit(1)
+        print("\n✅ Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
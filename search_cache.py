@@ -0,0 +1,116 @@
+"""
+Cache LRU des résultats de recherche, invalidé par génération d'index
+"""
+
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def user_scope(user_id: int) -> Tuple[str, int]:
+    """Portée des documents personnels d'un utilisateur"""
+    return ("user", user_id)
+
+
+def group_scope(group_id: int) -> Tuple[str, int]:
+    """Portée des fichiers indexés d'un groupe de recherche"""
+    return ("group", group_id)
+
+
+class SearchResultCache:
+    """Cache des résultats par (portée, requête normalisée, filtres).
+
+    Chaque portée possède un compteur de génération incrémenté à chaque
+    modification de son index : une entrée créée sous une génération
+    antérieure est considérée comme périmée et ignorée à la lecture.
+
+    La valeur mise en cache est quelconque (liste de résultats, dictionnaire
+    résultats + facettes...) et copiée superficiellement à l'entrée et à la
+    sortie pour que l'appelant ne modifie pas l'entrée partagée.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[int, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalise la casse et les espaces d'une requête"""
+        return " ".join((query or "").lower().split())
+
+    @staticmethod
+    def _freeze_filters(filters: Optional[Dict[str, Any]]) -> tuple:
+        if not filters:
+            return ()
+        frozen = []
+        for key, value in filters.items():
+            if isinstance(value, (list, set, tuple)):
+                value = tuple(sorted(value))
+            frozen.append((key, value))
+        return tuple(sorted(frozen))
+
+    def make_key(self, scope: Hashable, query: str, filters: Optional[Dict[str, Any]] = None) -> tuple:
+        return (scope, self.normalize_query(query), self._freeze_filters(filters))
+
+    def generation(self, scope: Hashable) -> int:
+        return self._generations.get(scope, 0)
+
+    def bump(self, scope: Hashable) -> int:
+        """Invalide tous les résultats d'une portée (index modifié)"""
+        with self._lock:
+            generation = self._generations.get(scope, 0) + 1
+            self._generations[scope] = generation
+            return generation
+
+    def get(self, scope: Hashable, query: str, filters: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Retourne les résultats en cache ou None si absents/périmés"""
+        key = self.make_key(scope, query, filters)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            generation, results = entry
+            if generation != self._generations.get(scope, 0):
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.copy(results)
+
+    def put(self, scope: Hashable, query: str, results: Any, filters: Optional[Dict[str, Any]] = None):
+        """Mémorise les résultats sous la génération courante de la portée"""
+        key = self.make_key(scope, query, filters)
+        with self._lock:
+            self._entries[key] = (self._generations.get(scope, 0), copy.copy(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(100 * self.hits / total) if total else 0
+        }
+
+
+# Instance partagée par les gestionnaires de recherche
+search_cache = SearchResultCache()
@@ -1,14 +1,31 @@
 import logging
 from telegram import Update
-from telegram.ext import CommandHandler, MessageHandler, filters, CallbackContext
+from telegram.ext import CommandHandler, MessageHandler, CallbackQueryHandler, filters, CallbackContext
 from utils.memory_full import db
-from utils.search_ui import format_search_results, create_results_markup
+from utils.search_ui import (
+    format_search_results, create_results_markup, create_facets_markup, RESULTS_PER_PAGE, FACET_CODES
+)
+from utils.search_cache import search_cache, group_scope
+from utils.result_cursors import result_cursors
 
 logger = logging.getLogger(__name__)
 
+def faceted_search(group_id, query, filters=None):
+    """Résultats et compteurs de facettes, mis en cache par requête et filtres"""
+    scope = group_scope(group_id)
+    found = search_cache.get(scope, query, filters)
+    if found is None:
+        results, facets = db.search_files_faceted(query, group_id, filters=filters)
+        found = {'results': results, 'facets': facets}
+        search_cache.put(scope, query, found, filters)
+    return found
+
 class SearchEngine:
     @staticmethod
     def register(application):
+        def results_title(query, filters):
+            return f"{query} · {' / '.join(filters.values())}" if filters else query
+
         async def handle_search(update: Update, context: CallbackContext):
             message = update.message
             user_id = message.from_user.id
@@ -46,13 +63,20 @@ class SearchEngine:
                     await message.reply_text("❌ Crédits de recherche insuffisants. Contactez l'admin.")
                     return
 
-                results = db.search_files(query, group_id=group_id)
+                found = faceted_search(group_id, query)
+                results = found['results']
                 if not results:
                     await message.reply_text("🔍 Aucun résultat trouvé pour votre recherche")
                     return
 
-                response = format_search_results(query, results)
-                markup = create_results_markup(results)
+                # Conserver les résultats pour la pagination sans nouvelle recherche
+                cursor_id = result_cursors.create(
+                    results, query=query, chat_id=message.chat.id,
+                    group_id=group_id, facets=found['facets'], filters={}
+                )
+                page_results, total = result_cursors.page(cursor_id, 0, RESULTS_PER_PAGE)
+                response = format_search_results(query, page_results, 0, total)
+                markup = create_results_markup(page_results, cursor_id, 0, total)
 
                 await message.reply_text(
                     response,
@@ -68,7 +92,83 @@ class SearchEngine:
                 logger.error(f"Search error: {e}")
                 await message.reply_text("❌ Erreur lors de la recherche. Veuillez réessayer.")
 
+        async def handle_more_results(update: Update, context: CallbackContext):
+            query = update.callback_query
+            try:
+                _, cursor_id, page = query.data.split(':')
+                page = int(page)
+                cursor = result_cursors.get(cursor_id)
+                if not cursor or cursor['chat_id'] != query.message.chat.id:
+                    await query.answer("⌛ Résultats expirés. Relancez la recherche.", show_alert=True)
+                    return
+
+                page_results, total = result_cursors.page(cursor_id, page, RESULTS_PER_PAGE)
+                if not page_results:
+                    await query.answer("🔍 Aucun autre résultat")
+                    return
+
+                await query.answer()
+                await query.edit_message_text(
+                    format_search_results(results_title(cursor['query'], cursor.get('filters')), page_results, page, total),
+                    reply_markup=create_results_markup(page_results, cursor_id, page, total),
+                    parse_mode="HTML"
+                )
+            except Exception as e:
+                logger.error(f"Pagination error: {e}")
+                await query.answer("❌ Erreur lors de l'affichage des résultats", show_alert=True)
+
+        async def handle_facets(update: Update, context: CallbackContext):
+            query = update.callback_query
+            cursor_id = query.data.split(':', 1)[1]
+            cursor = result_cursors.get(cursor_id)
+            if not cursor or cursor['chat_id'] != query.message.chat.id or 'facets' not in cursor:
+                await query.answer("⌛ Résultats expirés. Relancez la recherche.", show_alert=True)
+                return
+
+            await query.answer()
+            await query.edit_message_text(
+                f"🎛️ <b>Filtrer les résultats pour '{results_title(cursor['query'], cursor['filters'])}'</b>\n\n"
+                f"{cursor['total']} résultat(s) — choisissez un type, un mois ou un auteur :",
+                reply_markup=create_facets_markup(cursor_id, cursor['facets'], cursor['filters']),
+                parse_mode="HTML"
+            )
+
+        async def handle_facet_filter(update: Update, context: CallbackContext):
+            query = update.callback_query
+            try:
+                _, cursor_id, code, value = query.data.split(':', 3)
+                cursor = result_cursors.get(cursor_id)
+                if not cursor or cursor['chat_id'] != query.message.chat.id or 'group_id' not in cursor:
+                    await query.answer("⌛ Résultats expirés. Relancez la recherche.", show_alert=True)
+                    return
+
+                # Les filtres se cumulent ; "x" les retire tous
+                filters = {} if code == 'x' else dict(cursor['filters'], **{FACET_CODES[code]: value})
+                found = faceted_search(cursor['group_id'], cursor['query'], filters or None)
+                if not found['results']:
+                    await query.answer("🔍 Aucun résultat avec ce filtre")
+                    return
+
+                new_cursor_id = result_cursors.create(
+                    found['results'], query=cursor['query'], chat_id=cursor['chat_id'],
+                    group_id=cursor['group_id'], facets=found['facets'], filters=filters
+                )
+                page_results, total = result_cursors.page(new_cursor_id, 0, RESULTS_PER_PAGE)
+
+                await query.answer()
+                await query.edit_message_text(
+                    format_search_results(results_title(cursor['query'], filters), page_results, 0, total),
+                    reply_markup=create_results_markup(page_results, new_cursor_id, 0, total),
+                    parse_mode="HTML"
+                )
+            except Exception as e:
+                logger.error(f"Facet filter error: {e}")
+                await query.answer("❌ Erreur lors du filtrage des résultats", show_alert=True)
+
         application.add_handler(CommandHandler('search', handle_search))
+        application.add_handler(CallbackQueryHandler(handle_more_results, pattern=r'^more_results:'))
+        application.add_handler(CallbackQueryHandler(handle_facets, pattern=r'^facets:'))
+        application.add_handler(CallbackQueryHandler(handle_facet_filter, pattern=r'^facet:'))
         application.add_handler(MessageHandler(
             filters.TEXT & ~filters.COMMAND & (filters.ChatType.PRIVATE | filters.ChatType.GROUPS),
             process_search
@@ -5,6 +5,7 @@ from telegram.ext import MessageHandler, filters, CallbackQueryHandler, Callback
 import logging
 from utils.memory_full import db
 from extensions.handlers.search_engine import SearchEngine
+from utils.result_cursors import result_cursors
 
 logger = logging.getLogger(__name__)
 
@@ -35,8 +36,16 @@ def register_search_handler(application):
     async def handle_download(update: Update, context: CallbackContext):
         query = update.callback_query
         try:
-            file_id = query.data.split('_')[1]
-            file_data = db.get_file_by_id(file_id)
+            if query.data.startswith('dl:'):
+                # Résultat conservé dans un curseur de recherche
+                _, cursor_id, index = query.data.split(':')
+                if result_cursors.get(cursor_id) is None:
+                    await query.answer("⌛ Résultats expirés. Relancez la recherche.", show_alert=True)
+                    return
+                file_data = result_cursors.get_result(cursor_id, int(index))
+            else:
+                file_id = query.data.split('_', 1)[1]
+                file_data = db.get_file_by_id(file_id)
 
             if not file_data:
                 await query.answer("❌ Fichier introuvable", show_alert=True)
@@ -48,7 +57,14 @@ def register_search_handler(application):
                 return
 
             # Envoi du fichier selon le type
-            if file_data['file_type'] == 'document':
+            if file_data.get('source') == 'export':
+                # Fiche importée d'un export : pas de file_id, copie du message d'origine
+                await context.bot.copy_message(
+                    chat_id=query.message.chat.id,
+                    from_chat_id=file_data['group_id'],
+                    message_id=file_data['message_id']
+                )
+            elif file_data['file_type'] == 'document':
                 await query.message.reply_document(file_data['file_id'])
             elif file_data['file_type'] == 'photo':
                 await query.message.reply_photo(file_data['file_id'])
@@ -76,5 +92,5 @@ def register_search_handler(application):
     ))
     application.add_handler(CallbackQueryHandler(
         handle_download,
-        pattern='^download_'
+        pattern='^(download_|dl:)'
     ))
\ No newline at end of file
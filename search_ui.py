@@ -2,42 +2,77 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext, CallbackQueryHandler
 from extensions.handlers import referral_ui  # ✅ Correction ici
 
-def format_search_results(query: str, results: list) -> str:
-    """Formate les résultats de recherche pour l'affichage"""
+RESULTS_PER_PAGE = 5
+
+# Codes courts des facettes dans les callback_data ("facet:<curseur>:t:video")
+FACET_CODES = {'t': 'file_type', 'm': 'month', 'u': 'uploader'}
+FACET_EMOJIS = {'document': "📄", 'video': "🎬", 'photo': "🖼️", 'audio': "🎧"}
+
+def format_search_results(query: str, results: list, page: int = 0, total: int = None) -> str:
+    """Formate une page de résultats de recherche pour l'affichage"""
+    total = len(results) if total is None else total
+    first = page * RESULTS_PER_PAGE
     msg = f"🔍 <b>Résultats pour '{query}'</b>\n\n"
     
-    for i, result in enumerate(results[:5]):  # Limiter à 5 résultats
+    for i, result in enumerate(results[:RESULTS_PER_PAGE]):  # Limiter à une page
         emoji = "📄"
         if result['file_type'] == 'video': emoji = "🎬"
         elif result['file_type'] == 'photo': emoji = "🖼️"
         elif result['file_type'] == 'audio': emoji = "🎧"
         
         title = result['title'] or f"Fichier {result['file_type']}"
-        msg += f"{i+1}. {emoji} <b>{title}</b>\n"
+        msg += f"{first + i + 1}. {emoji} <b>{title}</b>\n"
         
         if result.get('description'):
             msg += f"   📝 {result['description'][:50]}{'...' if len(result['description']) > 50 else ''}\n"
             
         msg += "\n"
     
-    if len(results) > 5:
-        msg += f"\n🔎 <i>{len(results)-5} résultats supplémentaires non affichés</i>"
+    remaining = total - first - min(len(results), RESULTS_PER_PAGE)
+    if remaining > 0:
+        msg += f"\n🔎 <i>{remaining} résultats supplémentaires</i>"
+    
+    if total > RESULTS_PER_PAGE:
+        pages = (total + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
+        msg += f"\n📑 <i>Page {page + 1}/{pages}</i>"
     
     return msg
 
-def create_results_markup(results: list) -> InlineKeyboardMarkup:
-    """Crée un clavier pour les résultats de recherche"""
+def create_results_markup(results: list, cursor_id: str = None, page: int = 0, total: int = None) -> InlineKeyboardMarkup:
+    """Crée un clavier pour une page de résultats de recherche.
+
+    Avec un curseur, les boutons référencent les résultats conservés côté
+    serveur ("dl:<curseur>:<n>", "more_results:<curseur>:<page>"), ce qui
+    respecte la limite de 64 octets des callback_data.
+    """
+    total = len(results) if total is None else total
+    first = page * RESULTS_PER_PAGE
     buttons = []
     
-    for i, result in enumerate(results[:3]):
+    for i, result in enumerate(results[:RESULTS_PER_PAGE if cursor_id else 3]):
         buttons.append(
             InlineKeyboardButton(
-                text=f"📥 Télécharger #{i+1}",
-                callback_data=f"download_{result['file_id']}"
+                text=f"📥 Télécharger #{first + i + 1}",
+                callback_data=f"dl:{cursor_id}:{first + i}" if cursor_id else f"download_{result['file_id']}"
             )
         )
     
-    if len(results) > 3:
+    if cursor_id:
+        if page > 0:
+            buttons.append(
+                InlineKeyboardButton(
+                    text="◀️ Précédents",
+                    callback_data=f"more_results:{cursor_id}:{page - 1}"
+                )
+            )
+        if first + RESULTS_PER_PAGE < total:
+            buttons.append(
+                InlineKeyboardButton(
+                    text="🔍 Plus de résultats",
+                    callback_data=f"more_results:{cursor_id}:{page + 1}"
+                )
+            )
+    elif len(results) > 3:
         buttons.append(
             InlineKeyboardButton(
                 text="🔍 Plus de résultats",
@@ -45,8 +80,44 @@ def create_results_markup(results: list) -> InlineKeyboardMarkup:
             )
         )
     
+    if cursor_id:
+        buttons.append(InlineKeyboardButton(text="🎛️ Filtrer", callback_data=f"facets:{cursor_id}"))
+    
     return InlineKeyboardMarkup([buttons[i:i+2] for i in range(0, len(buttons), 2)])
 
+def create_facets_markup(cursor_id: str, facets: dict, filters: dict = None) -> InlineKeyboardMarkup:
+    """Boutons de filtre avec le nombre de résultats par type, mois et auteur"""
+    filters = filters or {}
+    rows = []
+    
+    types = facets.get('file_type', {})
+    rows.append([
+        InlineKeyboardButton(
+            text=f"{FACET_EMOJIS.get(file_type, '📁')} {count}",
+            callback_data=f"facet:{cursor_id}:t:{file_type}"
+        )
+        for file_type, count in sorted(types.items(), key=lambda item: -item[1])
+        if filters.get('file_type') != file_type
+    ])
+    
+    months = sorted(facets.get('month', {}).items(), reverse=True)[:4]
+    rows.append([
+        InlineKeyboardButton(text=f"📅 {month} ({count})", callback_data=f"facet:{cursor_id}:m:{month}")
+        for month, count in months if filters.get('month') != month
+    ])
+    
+    uploaders = sorted(facets.get('uploader', {}).items(), key=lambda item: -item[1])[:3]
+    rows.append([
+        InlineKeyboardButton(text=f"👤 {uploader} ({count})", callback_data=f"facet:{cursor_id}:u:{uploader}")
+        for uploader, count in uploaders if filters.get('uploader') != uploader
+    ])
+    
+    if filters:
+        rows.append([InlineKeyboardButton(text="✖️ Retirer les filtres", callback_data=f"facet:{cursor_id}:x:")])
+    rows.append([InlineKeyboardButton(text="🔙 Résultats", callback_data=f"more_results:{cursor_id}:0")])
+    
+    return InlineKeyboardMarkup([row for row in rows if row])
+
 async def handle_invite_button(update: Update, context: CallbackContext):
     """Gère le bouton d'invitation"""
     query = update.callback_query
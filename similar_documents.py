@@ -0,0 +1,319 @@
+"""
+Recommandations "documents similaires" par TF-IDF et similarité cosinus.
+
+Les documents sont ajoutés au fil de l'indexation (mêmes termes que
+extract_keywords). Chaque propriétaire a son propre index : vocabulaire,
+fréquences documentaires et matrice creuse au format CSR (tableaux NumPy).
+Un ajout ne reconstruit que la matrice de son propriétaire, et les scores
+sont calculés par lots de lignes sur ses seuls documents.
+
+Les index sont enregistrés par propriétaire : un instantané .npz et un
+journal d'ajouts/suppressions (une ligne JSON par modification). Un ajout
+n'écrit que sa ligne ; l'instantané n'est réécrit que lorsque le journal
+devient long. Seuls les index les plus récemment utilisés restent en mémoire.
+"""
+
+import json
+import logging
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .database import get_disk_db
+from .text_analysis import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class OwnerVectors:
+    """Vecteurs TF-IDF des documents d'un propriétaire"""
+
+    def __init__(self, owner_id: int):
+        self.owner_id = owner_id
+        self.vocabulary: Dict[str, int] = {}
+        self.document_frequency = np.zeros(1024, dtype=np.int32)
+        self.rows: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # doc_id -> (termes, tf)
+        self.complete = False  # Tous les documents du propriétaire ont été chargés
+        self._matrix = None  # (doc_ids, indptr, indices, poids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.rows
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            term_id = len(self.vocabulary)
+            self.vocabulary[term] = term_id
+            if term_id >= len(self.document_frequency):
+                self.document_frequency = np.concatenate(
+                    [self.document_frequency, np.zeros(len(self.document_frequency), dtype=np.int32)]
+                )
+        return term_id
+
+    def add(self, doc_id: str, term_counts: Dict[str, int]):
+        self.remove(doc_id)
+        if not term_counts:
+            return
+        terms = np.fromiter((self._term_id(term) for term in term_counts), dtype=np.int32, count=len(term_counts))
+        counts = np.fromiter(term_counts.values(), dtype=np.float32, count=len(term_counts))
+        self.document_frequency[terms] += 1
+        self.rows[doc_id] = (terms, counts)
+        self._matrix = None
+
+    def remove(self, doc_id: str) -> bool:
+        row = self.rows.pop(doc_id, None)
+        if row is None:
+            return False
+        self.document_frequency[row[0]] -= 1
+        self._matrix = None
+        return True
+
+    def _idf(self) -> np.ndarray:
+        total = len(self.rows)
+        df = self.document_frequency[:len(self.vocabulary)].astype(np.float32)
+        return np.log((1 + total) / (1 + df)) + 1
+
+    def _build(self):
+        """Construit la matrice CSR des vecteurs TF-IDF normalisés"""
+        idf = self._idf()
+        doc_ids = list(self.rows)
+        indptr = np.zeros(len(doc_ids) + 1, dtype=np.int64)
+        indices_parts, data_parts = [], []
+        for position, doc_id in enumerate(doc_ids):
+            terms, counts = self.rows[doc_id]
+            weights = (1 + np.log(counts)) * idf[terms]
+            norm = np.linalg.norm(weights)
+            indices_parts.append(terms)
+            data_parts.append(weights / norm if norm else weights)
+            indptr[position + 1] = indptr[position] + len(terms)
+
+        self._matrix = (
+            doc_ids,
+            indptr,
+            np.concatenate(indices_parts) if indices_parts else np.zeros(0, dtype=np.int32),
+            np.concatenate(data_parts) if data_parts else np.zeros(0, dtype=np.float32)
+        )
+        return self._matrix
+
+    def similar(self, doc_id: str, k: int, batch_size: int) -> List[Tuple[str, float]]:
+        if doc_id not in self.rows:
+            return []
+        doc_ids, indptr, indices, data = self._matrix or self._build()
+
+        # Vecteur requête dense sur le vocabulaire
+        row = doc_ids.index(doc_id)
+        query = np.zeros(len(self.vocabulary), dtype=np.float32)
+        query[indices[indptr[row]:indptr[row + 1]]] = data[indptr[row]:indptr[row + 1]]
+
+        scores = np.empty(len(doc_ids), dtype=np.float32)
+        for start in range(0, len(doc_ids), batch_size):
+            end = min(start + batch_size, len(doc_ids))
+            low, high = indptr[start], indptr[end]
+            products = np.concatenate([[0.0], np.cumsum(data[low:high] * query[indices[low:high]])])
+            scores[start:end] = products[indptr[start + 1:end + 1] - low] - products[indptr[start:end] - low]
+        scores[row] = -1.0
+
+        k = min(k, len(doc_ids))
+        best = np.argpartition(-scores, k - 1)[:k] if k else []
+        ranked = sorted(best, key=lambda position: scores[position], reverse=True)
+        return [(doc_ids[position], float(scores[position])) for position in ranked if scores[position] > 0]
+
+    # --- Persistance ---
+
+    def save(self, path: Path):
+        """Écrit les comptes de termes (vocabulaire compacté) dans un fichier .npz"""
+        doc_ids = list(self.rows)
+        if doc_ids:
+            indices = np.concatenate([self.rows[doc_id][0] for doc_id in doc_ids])
+            counts = np.concatenate([self.rows[doc_id][1] for doc_id in doc_ids])
+        else:
+            indices, counts = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        lengths = np.fromiter((len(self.rows[doc_id][0]) for doc_id in doc_ids), dtype=np.int64, count=len(doc_ids))
+
+        # Seuls les termes encore présents sont écrits
+        used = np.unique(indices)
+        names = np.empty(len(self.vocabulary), dtype=object)
+        for term, term_id in self.vocabulary.items():
+            names[term_id] = term
+
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'wb') as f:
+            np.savez(
+                f,
+                doc_ids=np.array(doc_ids, dtype=str),
+                terms=np.array(list(names[used]), dtype=str),
+                indptr=np.concatenate([[0], np.cumsum(lengths)]),
+                indices=np.searchsorted(used, indices).astype(np.int32),
+                counts=counts,
+                complete=np.array(self.complete)
+            )
+        temp_path.replace(path)
+
+    @classmethod
+    def load(cls, owner_id: int, path: Path) -> "OwnerVectors":
+        vectors = cls(owner_id)
+        with np.load(path) as data:
+            terms = [str(term) for term in data['terms']]
+            indptr, indices, counts = data['indptr'], data['indices'], data['counts']
+            for term in terms:
+                vectors._term_id(term)
+            for position, doc_id in enumerate(data['doc_ids']):
+                row_terms = indices[indptr[position]:indptr[position + 1]].astype(np.int32)
+                vectors.rows[str(doc_id)] = (row_terms, counts[indptr[position]:indptr[position + 1]])
+                vectors.document_frequency[row_terms] += 1
+            vectors.complete = bool(data['complete'])
+        return vectors
+
+
+class TfidfIndex:
+    """Index TF-IDF par propriétaire, alimentés incrémentalement et chargés à la demande"""
+
+    def __init__(self, path=None, batch_size: int = 4096, max_owners: int = 256, compact_after: int = 256):
+        self._path = Path(path) if path else None
+        self.batch_size = batch_size
+        self.max_owners = max_owners  # Index de propriétaires gardés en mémoire (LRU)
+        self.compact_after = compact_after  # Lignes de journal avant réécriture de l'instantané
+        self._owners: "OrderedDict[int, OwnerVectors]" = OrderedDict()
+        self._journal_lengths: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def path(self) -> Path:
+        if self._path is None:
+            self._path = Path(get_disk_db().path) / "similar_documents"
+        self._path.mkdir(parents=True, exist_ok=True)
+        return self._path
+
+    def _owner_path(self, owner_id: int) -> Path:
+        return self.path / f"owner_{str(owner_id).replace('-', 'm')}.npz"
+
+    def _journal_path(self, owner_id: int) -> Path:
+        return self._owner_path(owner_id).with_suffix('.log')
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            return any(doc_id in vectors for vectors in self._owners.values())
+
+    def _vectors(self, owner_id: int) -> OwnerVectors:
+        """Index d'un propriétaire, relu depuis le disque s'il n'est pas en mémoire"""
+        vectors = self._owners.get(owner_id)
+        if vectors is None:
+            owner_path = self._owner_path(owner_id)
+            vectors = OwnerVectors(owner_id)
+            if owner_path.exists():
+                try:
+                    vectors = OwnerVectors.load(owner_id, owner_path)
+                except Exception as e:
+                    logger.error(f"Index de similarité illisible pour {owner_id}: {e}")
+            self._journal_lengths[owner_id] = self._replay(vectors)
+            self._owners[owner_id] = vectors
+            while len(self._owners) > self.max_owners:
+                evicted, _ = self._owners.popitem(last=False)
+                self._journal_lengths.pop(evicted, None)
+        self._owners.move_to_end(owner_id)
+        return vectors
+
+    def _owner_of(self, doc_id: str) -> Optional[int]:
+        return next((owner_id for owner_id, vectors in self._owners.items() if doc_id in vectors), None)
+
+    def _replay(self, vectors: OwnerVectors) -> int:
+        """Rejoue le journal d'un propriétaire sur son instantané, renvoie le nombre de lignes"""
+        journal_path = self._journal_path(vectors.owner_id)
+        if not journal_path.exists():
+            return 0
+        length = 0
+        with open(journal_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Dernière ligne tronquée par un arrêt brutal
+                    continue
+                if 'add' in entry:
+                    vectors.add(entry['add'], entry['terms'])
+                elif 'remove' in entry:
+                    vectors.remove(entry['remove'])
+                length += 1
+        return length
+
+    def _save(self, vectors: OwnerVectors):
+        """Réécrit l'instantané complet et vide le journal"""
+        try:
+            vectors.save(self._owner_path(vectors.owner_id))
+            self._journal_path(vectors.owner_id).unlink(missing_ok=True)
+            self._journal_lengths[vectors.owner_id] = 0
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde de l'index de similarité {vectors.owner_id}: {e}")
+
+    def _append(self, vectors: OwnerVectors, entry: dict):
+        """Ajoute une modification au journal, compacte l'instantané s'il devient long"""
+        length = self._journal_lengths.get(vectors.owner_id, 0) + 1
+        if length > self.compact_after:
+            self._save(vectors)
+            return
+        try:
+            with open(self._journal_path(vectors.owner_id), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._journal_lengths[vectors.owner_id] = length
+        except Exception as e:
+            logger.error(f"Erreur journal de l'index de similarité {vectors.owner_id}: {e}")
+
+    def add(self, doc_id: str, owner_id: int, text: str = None, term_counts: Optional[Dict[str, int]] = None):
+        """Ajoute (ou remplace) un document à partir de son texte ou de ses comptes de termes"""
+        if term_counts is None:
+            term_counts = Counter(tokenize(text or ""))
+        with self._lock:
+            vectors = self._vectors(owner_id)
+            vectors.add(doc_id, term_counts)
+            self._append(vectors, {'add': doc_id, 'terms': {term: int(count) for term, count in term_counts.items()}})
+
+    def remove(self, doc_id: str, owner_id: Optional[int] = None) -> bool:
+        with self._lock:
+            if owner_id is None:
+                owner_id = self._owner_of(doc_id)
+                if owner_id is None:
+                    return False
+            vectors = self._vectors(owner_id)
+            if not vectors.remove(doc_id):
+                return False
+            self._append(vectors, {'remove': doc_id})
+            return True
+
+    def similar(self, doc_id: str, k: int = 5, owner_id: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Les k documents du même propriétaire les plus proches (cosinus)"""
+        with self._lock:
+            if owner_id is None:
+                owner_id = self._owner_of(doc_id)
+                if owner_id is None:
+                    return []
+            return self._vectors(owner_id).similar(doc_id, k, self.batch_size)
+
+    def is_complete(self, owner_id: int) -> bool:
+        with self._lock:
+            return self._vectors(owner_id).complete
+
+    def ensure_owner_loaded(self, owner_id: int, documents: Iterable[Tuple[str, Dict[str, int]]]):
+        """Charge les documents (doc_id, comptes de termes) d'un propriétaire absent du disque
+
+        `documents` est consommé hors du verrou : son analyse (décompression,
+        tokenisation) ne bloque ni les autres propriétaires ni les recherches.
+        """
+        if self.is_complete(owner_id):
+            return
+        documents = list(documents)
+        with self._lock:
+            vectors = self._vectors(owner_id)
+            if vectors.complete:
+                return
+            for doc_id, term_counts in documents:
+                if doc_id not in vectors:
+                    vectors.add(doc_id, term_counts)
+            vectors.complete = True
+            self._save(vectors)
+
+
+# Instance partagée par les gestionnaires de recherche
+similar_documents = TfidfIndex()
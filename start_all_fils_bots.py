@@ -1,10 +1,11 @@
-import subprocess
-import time
-import os
-import sys
+import argparse
 import logging
-from utils.memory_full import db
-from datetime import datetime
+import os
+import signal
+import time
+
+from utils.bot_workers import BotSupervisor
+from utils.user_administrator import get_hosted_bots
 
 # Configuration du logger
 logging.basicConfig(
@@ -13,37 +14,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def start_all_fils_bots():
-    tokens = db.get_all_admin_bot_tokens()
+CHECK_INTERVAL = 10  # Secondes entre deux vérifications des workers
 
-    if not tokens:
+
+def start_all_fils_bots(worker_count: int = None):
+    """Répartit tous les bots fils sur des workers (une boucle asyncio par worker)"""
+    bots = get_hosted_bots()
+
+    if not bots:
         logger.error("❌ Aucun token trouvé dans la base de données.")
         return
 
-    # Chemin absolu vers le script à exécuter
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    script_path = os.path.join(script_dir, "run_fils_bot.py")
-    
-    if not os.path.exists(script_path):
-        logger.error(f"❌ Fichier run_fils_bot.py introuvable à l'emplacement: {script_path}")
-        return
+    supervisor = BotSupervisor(worker_count)
+    logger.info(f"🔄 {len(bots)} bots vont être lancés sur {supervisor.worker_count} workers...")
+    started = time.perf_counter()
+    supervisor.start(bots)
+    logger.info(f"✅ Workers lancés en {time.perf_counter() - started:.1f}s : {supervisor.distribution()}")
+
+    stopping = False
 
-    logger.info(f"🔄 {len(tokens)} bots vont être lancés...")
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
 
-    for token in tokens:
-        short_token = token[:10] + "..."
-        logger.info(f"🚀 Lancement du bot (token: {short_token})...")
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
 
-        try:
-            # Utilisation de sys.executable pour garantir le bon interpréteur Python
-            subprocess.Popen([sys.executable, script_path, token])
-            logger.info("✅ Bot démarré en arrière-plan.")
-        except Exception as e:
-            logger.error(f"❌ Erreur lancement bot {short_token} : {str(e)}")
+    last_check = time.monotonic()
+    while not stopping:
+        time.sleep(1)
+        if time.monotonic() - last_check >= CHECK_INTERVAL:
+            supervisor.check_workers()
+            last_check = time.monotonic()
 
-        time.sleep(1)  # Pause entre les bots
+    logger.info("Arrêt des workers...")
+    supervisor.stop()
+    logger.info("✅ Tous les bots ont été arrêtés")
 
-    logger.info("✅ Tous les bots ont été lancés !")
 
 if __name__ == "__main__":
-    start_all_fils_bots()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lance tous les bots fils sur plusieurs processus")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus workers")
+    args = parser.parse_args()
+    start_all_fils_bots(args.workers)
@@ -0,0 +1,20 @@
+"""
+Configuration des tests.
+
+Les modules du dépôt sont importés comme paquets `utils` (from utils.xxx import
+...) et `extensions.handlers` : le dossier du dépôt est déclaré sous ces noms.
+Les données sont écrites dans un dossier temporaire.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("DB_PATH", tempfile.mkdtemp(prefix="telesuche-tests-"))
+
+sys.path.insert(0, ROOT)
+from import_aliases import install  # noqa: E402
+
+install(ROOT)
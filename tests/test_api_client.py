@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from utils import api_client
+
+TOKEN = "123456:" + "A" * 35
+
+
+class FakeResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeClient:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def get(self, url, timeout=None):
+        self.pool.urls.append(url)
+        await asyncio.sleep(0.01)
+        return self.pool.response
+
+
+class FakePool:
+    def __init__(self, response):
+        self.response = response
+        self.urls = []
+        self.refs = 0
+        self.client = FakeClient(self)
+
+    def acquire(self):
+        self.refs += 1
+
+    async def release(self):
+        self.refs -= 1
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    api_client._valid_tokens.clear()
+    api_client._invalid_tokens.clear()
+    api_client._validations.clear()
+
+
+def use_pool(monkeypatch, status_code, data):
+    pool = FakePool(FakeResponse(status_code, data))
+    monkeypatch.setattr(api_client, "http_pool", pool)
+    return pool
+
+
+def test_concurrent_validations_share_one_getme(monkeypatch):
+    pool = use_pool(monkeypatch, 200, {'ok': True, 'result': {'username': "mon_bot"}})
+
+    async def run():
+        return await asyncio.gather(*(api_client.get_bot_info(TOKEN) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert results == [{'username': "mon_bot"}] * 5
+    assert len(pool.urls) == 1 and pool.refs == 0
+    assert asyncio.run(api_client.get_bot_info(TOKEN)) == {'username': "mon_bot"}
+    assert len(pool.urls) == 1
+
+
+def test_rejected_token_is_cached(monkeypatch):
+    pool = use_pool(monkeypatch, 401, {'ok': False})
+    assert asyncio.run(api_client.get_bot_info(TOKEN)) is None
+    assert not asyncio.run(api_client.validate_bot_token(TOKEN))
+    assert len(pool.urls) == 1
+
+
+def test_transient_error_is_not_cached(monkeypatch):
+    pool = use_pool(monkeypatch, 502, {'ok': False})
+    assert asyncio.run(api_client.get_bot_info(TOKEN)) is None
+    assert asyncio.run(api_client.get_bot_info(TOKEN)) is None
+    assert len(pool.urls) == 2
+
+
+def test_malformed_token_needs_no_call(monkeypatch):
+    pool = use_pool(monkeypatch, 200, {'ok': True, 'result': {}})
+    assert asyncio.run(api_client.get_bot_info("pas-un-token")) is None
+    assert pool.urls == []
@@ -0,0 +1,34 @@
+from utils import blob_store
+from utils.blob_store import BlobStore
+from utils.database import TeleSucheDB
+
+
+def make_store(tmp_path):
+    return BlobStore(TeleSucheDB(tmp_path))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = make_store(tmp_path)
+    first = store.put("même texte")
+    assert store.put("même texte") == first
+    assert store.get_metadata(first)["refcount"] == 2
+    assert store.get(first) == "même texte"
+
+
+def test_read_range_spans_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "CHUNK_SIZE", 10)
+    store = make_store(tmp_path)
+    content = "".join(chr(ord('a') + i % 26) for i in range(95))
+    digest = store.put(content)
+    assert store.read_range(digest, 8, 33) == content[8:33]
+    assert [start for _, start, _ in store.iter_chunks(digest)] == list(range(0, 95, 10))
+
+
+def test_blob_is_removed_with_its_last_reference(tmp_path):
+    store = make_store(tmp_path)
+    digest = store.put("texte")
+    store.put("texte")
+    store.release(digest)
+    assert store.get(digest) == "texte"
+    store.release(digest)
+    assert store.get(digest) is None and not store.exists(digest)
@@ -0,0 +1,47 @@
+import asyncio
+
+from utils import bot_commands
+from utils.bot_commands import BOT_COMMANDS, BOT_COMMANDS_HASH, configure_bot_commands
+from utils.memory_full import db
+
+
+class FakeBot:
+    def __init__(self, token):
+        self.token = token
+        self.commands = []
+
+    async def set_my_commands(self, commands):
+        self.commands.append(commands)
+
+
+class FakeApplication:
+    def __init__(self, token):
+        self.bot = FakeBot(token)
+
+
+def test_bot_with_same_commands_hash_is_skipped():
+    db.save_to_disk("bot_commands", "7001", BOT_COMMANDS_HASH)
+
+    async def run():
+        await configure_bot_commands(FakeApplication("7001:abc"))
+        return dict(bot_commands._pending_commands)
+
+    assert asyncio.run(run()) == {}
+
+
+def test_pending_bots_are_flushed_in_one_batch(monkeypatch):
+    monkeypatch.setattr(bot_commands, "COMMANDS_BATCH_DELAY", 0.01)
+    applications = [FakeApplication(f"70{n}2:abc") for n in range(3)]
+
+    async def run():
+        for application in applications:
+            await configure_bot_commands(application)
+        flush = bot_commands._commands_flush
+        assert len(bot_commands._pending_commands) == 3
+        await flush
+        await configure_bot_commands(applications[0])
+        return bot_commands._commands_flush is flush
+
+    assert asyncio.run(run())  # Tâche unique pour le lot, bot déjà configuré ignoré ensuite
+    assert all(application.bot.commands == [BOT_COMMANDS] for application in applications)
+    assert db.load_from_disk("bot_commands", "7002") == BOT_COMMANDS_HASH
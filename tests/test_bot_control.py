@@ -0,0 +1,88 @@
+import asyncio
+
+from utils.bot_control import BotControl
+from utils.bot_workers import ADMIN_BOT, CHILD_BOT
+
+OLD = "123456:old-secret"
+NEW = "123456:new-secret"
+
+
+class FakeRuntime:
+    def __init__(self):
+        self.bots = {}
+        self.startup_times = {}
+        self.removed = []
+
+    def keys(self):
+        return list(self.bots)
+
+    def add(self, key, factory):
+        self.bots[key] = factory
+
+    async def wait_started(self, keys, timeout):
+        for key in keys:
+            self.startup_times[key] = {'total': 0.1}
+
+    async def remove(self, key, delete_webhook=False):
+        self.bots.pop(key, None)
+        self.removed.append((key, delete_webhook))
+
+
+class FakeSupervisor:
+    running = True
+
+    def __init__(self):
+        self.assignments = {}
+        self.kinds = {}
+        self.removed = []
+
+    def add_bot(self, token, kind):
+        self.assignments[token] = 0
+        self.kinds[token] = kind
+
+    def remove_bot(self, token, delete_webhook=False):
+        self.assignments.pop(token, None)
+        self.kinds.pop(token, None)
+        self.removed.append((token, delete_webhook))
+
+
+def test_regenerated_token_replaces_the_hosted_one():
+    control = BotControl(FakeRuntime())
+
+    async def run():
+        assert await control.start_bot(OLD, CHILD_BOT)
+        assert await control.start_bot(OLD, CHILD_BOT)  # Déjà hébergé
+        assert await control.start_bot(NEW, CHILD_BOT)
+
+    asyncio.run(run())
+    assert control.runtime.keys() == [NEW]
+    assert control.runtime.removed == [(OLD, False)]
+    assert control.hosted_token("123456:autre") == NEW
+
+
+def test_stop_deletes_webhook_by_default():
+    control = BotControl(FakeRuntime())
+
+    async def run():
+        await control.start_bot(OLD, CHILD_BOT)
+        await control.stop_bot(OLD)
+
+    asyncio.run(run())
+    assert control.runtime.keys() == []
+    assert control.runtime.removed == [(OLD, True)]
+
+
+def test_workers_host_bots_when_supervisor_runs():
+    control = BotControl(FakeRuntime())
+    control.supervisor = FakeSupervisor()
+
+    async def run():
+        await control.start_bot(OLD, CHILD_BOT)
+        await control.reload_bot(NEW, CHILD_BOT)
+        await control.start_bot("777:admin", ADMIN_BOT)
+
+    asyncio.run(run())
+    assert control.supervisor.assignments == {NEW: 0, "777:admin": 0}
+    assert control.supervisor.kinds == {NEW: CHILD_BOT, "777:admin": ADMIN_BOT}
+    assert control.supervisor.removed == [(OLD, False)]
+    assert control.runtime.keys() == []
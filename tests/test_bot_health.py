@@ -0,0 +1,67 @@
+from utils import bot_health as health_module
+from utils.bot_health import BACKOFF, QUARANTINED, RUNNING, BotHealth
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backoff_doubles_with_jitter_and_is_capped(monkeypatch):
+    bounds = []
+    monkeypatch.setattr(health_module.random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+    health = BotHealth("bot")
+    delays = [health.failed("err", base_delay=5, max_delay=30) for _ in range(4)]
+    assert delays == [5, 10, 20, 30]
+    assert bounds == [(2.5, 5), (5, 10), (10, 20), (15, 30)]
+    assert health.state == BACKOFF and health.failures == 4
+    assert health.snapshot()['retry_in'] <= 30
+
+
+def test_failures_reset_after_a_stable_run(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(health_module.time, "monotonic", clock)
+    health = BotHealth("bot")
+    health.failed("err", 5, 300)
+    health.failed("err", 5, 300)
+    health.started("mon_bot")
+    clock.now += 301
+    delay = health.failed("plantage", 5, 300)
+    assert health.failures == 1 and 2.5 <= delay <= 5
+    assert health.last_error == "plantage"
+
+
+def test_snapshot_counts_errors_on_the_window(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(health_module.time, "monotonic", clock)
+    health = BotHealth("bot")
+    health.started("mon_bot")
+    health.record_call("getUpdates")
+    health.record_call("sendMessage", "HTTP 500")
+    snapshot = health.snapshot()
+    assert snapshot['state'] == RUNNING
+    assert snapshot['calls'] == 2 and snapshot['error_rate'] == 0.5
+    assert snapshot['last_error'] == "sendMessage: HTTP 500"
+
+    clock.now += health_module.ERROR_WINDOW + 1
+    assert health.snapshot()['calls'] == 0
+
+
+def test_poll_stall_and_quarantine(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(health_module.time, "monotonic", clock)
+    health = BotHealth("bot")
+    assert not health.poll_stalled(120)
+    health.started("mon_bot")
+    clock.now += 100
+    health.record_call("getUpdates")
+    clock.now += 100
+    assert not health.poll_stalled(120)
+    clock.now += 30
+    assert health.poll_stalled(120)
+
+    health.quarantine("Token invalide")
+    assert health.state == QUARANTINED and health.retry_at is None
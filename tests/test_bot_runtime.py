@@ -0,0 +1,108 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+from telegram.error import InvalidToken
+from telegram.ext import Application
+
+from utils.bot_health import QUARANTINED
+from utils.bot_runtime import UPDATER_INTERNALS, BotRuntime
+from utils.http_pool import http_pool
+
+
+def test_invalid_token_is_quarantined_not_restarted():
+    runtime = BotRuntime(restart_delay=0.01)
+    attempts = []
+
+    async def factory():
+        attempts.append(1)
+        raise InvalidToken("Unauthorized")
+
+    async def run():
+        await runtime.add("123:bad", factory)
+
+    asyncio.run(run())
+    assert attempts == [1]
+    assert runtime.quarantined == ["123:bad"]
+    assert runtime.health["123:bad"].state == QUARANTINED
+    assert "123:bad" not in runtime
+
+
+def test_failing_bot_is_restarted_until_removed():
+    runtime = BotRuntime(restart_delay=0.01, max_restart_delay=0.02)
+
+    async def factory():
+        raise RuntimeError("réseau")
+
+    async def run():
+        runtime.add("123:flaky", factory)
+        while runtime.health["123:flaky"].restarts < 2:
+            await asyncio.sleep(0.005)
+        assert runtime.health["123:flaky"].last_error == "RuntimeError: réseau"
+        await runtime.remove("123:flaky")
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert len(runtime) == 0
+    assert "123:flaky" not in runtime.health
+
+
+def test_startup_report_ranks_slowest_bots():
+    runtime = BotRuntime()
+    steps = {'build': 0.1, 'initialize': 0.2, 'start': 0.1, 'updates': 0.1}
+    runtime.startup_times = {
+        "111111:a": dict(steps, total=0.5),
+        "222222:b": dict(steps, updates=2.1, total=2.5),
+    }
+    report = runtime.startup_report().splitlines()
+    assert report[0].startswith("Démarrage de 2 bots")
+    assert report[2].startswith("  222222...")
+    assert BotRuntime().startup_report() == "Aucun bot démarré"
+
+
+def test_updater_internals_exist_in_installed_ptb():
+    # Échoue à la montée de version de python-telegram-bot : revérifier polling_alive et confirm_updates
+    assert UPDATER_INTERNALS
+    updater = Application.builder().token("123456:" + "A" * 35).build().updater
+    assert hasattr(updater, '_Updater__polling_task')
+    assert hasattr(updater, '_last_update_id')
+
+
+def test_bot_is_idle_only_without_updates_or_jobs():
+    runtime = BotRuntime(idle_timeout=60)
+    jobs = []
+    application = SimpleNamespace(job_queue=SimpleNamespace(jobs=lambda: jobs))
+
+    runtime.last_activity["a"] = time.monotonic()
+    assert not runtime._is_idle("a", application)
+    runtime.last_activity["a"] = time.monotonic() - 61
+    assert runtime._is_idle("a", application)
+    jobs.append("rappel")
+    assert not runtime._is_idle("a", application)
+    assert not BotRuntime(idle_timeout=0)._is_idle("a", application)
+
+
+def test_sleeping_bot_wakes_on_pending_get_updates(monkeypatch):
+    runtime = BotRuntime(wake_interval=0.01)
+    queues = {"/botA/getUpdates": [{'update_id': 1}], "/botB/getUpdates": []}
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        return httpx.Response(200, json={'ok': True, 'result': queues[request.url.path]})
+
+    async def run():
+        monkeypatch.setattr(http_pool, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        for key in ("A", "B"):
+            runtime._sleeping[key] = asyncio.Event()
+            runtime._wake_urls[key] = f"https://api.telegram.org/bot{key}/getUpdates"
+        checker = asyncio.create_task(runtime._check_sleeping())
+        await asyncio.wait_for(runtime._sleeping["A"].wait(), 5)
+        woken_b = runtime._sleeping["B"].is_set()
+        runtime._wake_urls.clear()
+        await checker
+        return woken_b
+
+    assert asyncio.run(run()) is False
+    assert set(requests) == set(queues)
+    assert runtime._wake_checker is None
@@ -0,0 +1,128 @@
+import asyncio
+import multiprocessing
+import threading
+from collections import Counter
+
+import pytest
+
+from utils.bot_workers import ADMIN_BOT, CHILD_BOT, BotSupervisor, HashRing, bot_key
+
+KEYS = [str(1000000 + n) for n in range(2000)]
+
+
+def test_bot_key_survives_token_regeneration():
+    assert bot_key("123456:old-secret") == bot_key("123456:new-secret") == "123456"
+
+
+def test_ring_spreads_keys_and_is_deterministic():
+    ring = HashRing(range(4))
+    owners = Counter(ring.node_for(key) for key in KEYS)
+    assert set(owners) == {0, 1, 2, 3}
+    assert min(owners.values()) > len(KEYS) / 4 / 2
+    assert [HashRing(range(4)).node_for(key) for key in KEYS[:50]] == [ring.node_for(key) for key in KEYS[:50]]
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(range(4))
+    before = {key: ring.node_for(key) for key in KEYS}
+    ring.add_node(4)
+    moved = [key for key in KEYS if ring.node_for(key) != before[key]]
+    assert all(ring.node_for(key) == 4 for key in moved)
+    assert len(moved) < len(KEYS) / 3
+
+    ring.remove_node(4)
+    assert {key: ring.node_for(key) for key in KEYS} == before
+
+
+def test_empty_ring_raises():
+    with pytest.raises(LookupError):
+        HashRing().node_for("123")
+
+
+class FakeConn:
+    def __init__(self, log):
+        self.log = log
+
+    def send(self, command):
+        self.log.append(command)
+
+    def close(self):
+        pass
+
+
+class FakeProcess:
+    exitcode = 0
+
+    def join(self, timeout=None):
+        pass
+
+    def is_alive(self):
+        return False
+
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    supervisor = BotSupervisor(worker_count=2)
+    supervisor.sent = {}
+
+    def spawn(index):
+        supervisor.sent[index] = []
+        supervisor.workers[index] = (FakeProcess(), FakeConn(supervisor.sent[index]))
+
+    monkeypatch.setattr(supervisor, "_spawn", spawn)
+    return supervisor
+
+
+def test_resize_moves_only_reassigned_bots(supervisor):
+    tokens = [f"{key}:secret" for key in KEYS[:200]]
+    supervisor.start(dict.fromkeys(tokens, CHILD_BOT))
+    assert sum(supervisor.distribution().values()) == 200
+
+    before = dict(supervisor.assignments)
+    moved = supervisor.resize(3)
+    changed = [token for token in tokens if supervisor.assignments[token] != before[token]]
+    assert moved == len(changed) and 0 < moved < 200
+    assert all(supervisor.assignments[token] == 2 for token in changed)
+    assert ("remove", changed[0], None) in supervisor.sent[before[changed[0]]]
+    assert ("add", changed[0], CHILD_BOT) in supervisor.sent[2]
+
+
+def test_dead_worker_is_respawned_with_its_bots(supervisor):
+    bots = {"111:a": ADMIN_BOT, "222:b": CHILD_BOT, "333:c": CHILD_BOT}
+    supervisor.start(bots)
+    restarted = supervisor.check_workers()
+    assert restarted == 2
+    for index in supervisor.workers:
+        hosted = [token for token, owner in supervisor.assignments.items() if owner == index]
+        assert supervisor.sent[index] == [("add", token, bots[token]) for token in hosted]
+
+
+class AliveProcess(FakeProcess):
+    def is_alive(self):
+        return True
+
+
+def test_health_table_gathers_rows_from_workers():
+    supervisor = BotSupervisor(worker_count=2)
+    ends = {}
+    for index in range(2):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        supervisor.workers[index] = (AliveProcess(), parent_conn)
+        ends[index] = child_conn
+
+    def worker(index, rows):
+        command, request, _ = ends[index].recv()
+        ends[index].send((command, request - 1, [{'key': "périmé"}]))  # Réponse d'une demande expirée
+        ends[index].send((command, request, rows))
+
+    threads = [
+        threading.Thread(target=worker, args=(0, [{'key': "111:a", 'state': "running"}])),
+        threading.Thread(target=worker, args=(1, [{'key': "222:b", 'state': "sleeping"}])),
+    ]
+    for thread in threads:
+        thread.start()
+    rows = asyncio.run(supervisor.health_table(timeout=5))
+    for thread in threads:
+        thread.join()
+
+    assert sorted((row['key'], row['worker']) for row in rows) == [("111:a", 0), ("222:b", 1)]
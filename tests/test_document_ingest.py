@@ -0,0 +1,62 @@
+import asyncio
+import os
+
+from utils import document_ingest
+from utils.document_ingest import downloaded_document
+
+
+class FakeTelegramFile:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.calls = []
+
+    async def download_to_memory(self, out):
+        self.calls.append("memory")
+        out.write(self.content)
+
+    async def download_to_drive(self, path):
+        self.calls.append("drive")
+        with open(path, 'wb') as f:
+            f.write(self.content)
+
+
+def test_small_file_is_downloaded_in_memory():
+    file = FakeTelegramFile(b"contenu")
+
+    async def run():
+        async with downloaded_document(file, len(file.content)) as source:
+            return source
+
+    assert asyncio.run(run()) == b"contenu"
+    assert file.calls == ["memory"]
+
+
+def test_large_file_uses_a_temporary_file_removed_afterwards(monkeypatch):
+    monkeypatch.setattr(document_ingest, "MEMORY_THRESHOLD", 4)
+    file = FakeTelegramFile(b"gros contenu")
+
+    async def run():
+        async with downloaded_document(file, len(file.content), ".pdf") as source:
+            with open(source, 'rb') as f:
+                return source, f.read()
+
+    path, content = asyncio.run(run())
+    assert content == b"gros contenu" and path.endswith(".pdf")
+    assert not os.path.exists(path)
+
+
+def test_unknown_size_goes_to_disk_and_is_cleaned_on_error():
+    file = FakeTelegramFile(b"x")
+    seen = []
+
+    async def run():
+        async with downloaded_document(file, None) as source:
+            seen.append(source)
+            raise RuntimeError("extraction")
+
+    try:
+        asyncio.run(run())
+    except RuntimeError:
+        pass
+    assert file.calls == ["drive"]
+    assert not os.path.exists(seen[0])
@@ -0,0 +1,59 @@
+from utils.file_index import ShardedFileIndex
+
+
+def record(file_id, group_id, title="rapport annuel"):
+    return {'file_id': file_id, 'group_id': group_id, 'title': title, 'file_type': 'document'}
+
+
+def test_get_file_without_group_loads_evicted_shard(tmp_path):
+    index = ShardedFileIndex(tmp_path, max_resident=1)
+    index.index_file(record("doc-a", -100))
+    index.index_file(record("doc-b", -200))
+    assert index.resident_groups() == [-200]
+
+    found = index.get_file("doc-a")
+    assert found is not None and found['group_id'] == -100
+
+
+def test_removed_file_is_no_longer_located(tmp_path):
+    index = ShardedFileIndex(tmp_path, max_resident=1)
+    index.index_files([record("doc-a", -100), record("doc-b", -200)])
+    assert index.remove_file(-100, "doc-a")
+    assert index.get_file("doc-a") is None
+    assert index.get_file("doc-b")['group_id'] == -200
+
+
+def test_locator_is_rebuilt_from_existing_shards(tmp_path):
+    index = ShardedFileIndex(tmp_path)
+    index.index_files([record(f"doc-{n}", -100) for n in range(3)])
+    index.flush()
+    for shard in index._shards.values():
+        shard.close()
+    for bucket in (tmp_path / "locator").iterdir():
+        bucket.unlink()
+    (tmp_path / "locator").rmdir()
+
+    reopened = ShardedFileIndex(tmp_path, max_resident=1)
+    assert reopened.resident_groups() == []
+    assert reopened.get_file("doc-2")['group_id'] == -100
+
+
+def test_unique_id_is_found_in_memtable_and_segments(tmp_path):
+    index = ShardedFileIndex(tmp_path)
+    index.index_file(dict(record("doc-a", -100), file_unique_id="uniq-a"))
+    assert index.find_unique("uniq-a", -100)['file_id'] == "doc-a"
+    assert index.find_unique("uniq-a", -200) is None
+
+    index.flush()
+    assert index.find_unique("uniq-a", -100)['file_id'] == "doc-a"
+    index.remove_file(-100, "doc-a")
+    assert index.find_unique("uniq-a", -100) is None
+
+
+def test_known_files_keep_metadata_in_shared_buckets(tmp_path):
+    index = ShardedFileIndex(tmp_path)
+    for n in range(50):
+        index.known_files.remember(f"uniq-{n}", f"titre {n}", "")
+    assert index.known_files.get("uniq-7") == {'title': "titre 7", 'description': ""}
+    assert index.known_files.get("inconnu") is None
+    assert len(index.known_files._buckets) <= index.known_files.cache_size
@@ -0,0 +1,34 @@
+from utils.file_indexer import FileIndexer
+from utils.memory_full import db
+
+
+def shared_photo(group_id, file_id, caption=""):
+    return {
+        'file_id': file_id, 'file_unique_id': "uniq-photo-1", 'file_type': 'photo',
+        'title': "", 'description': caption, 'group_id': group_id, 'user_id': 9
+    }
+
+
+def test_same_group_duplicate_only_merges_caption():
+    db.index_file(shared_photo(-5100, "p-1", "vacances"))
+    assert FileIndexer.index_known_file(shared_photo(-5100, "p-2", "plage"))
+    record = db.get_file_by_id("p-1", -5100)
+    assert record['description'] == "vacances\nplage"
+    assert db.get_file_by_id("p-2", -5100) is None
+
+
+def test_cross_group_file_is_not_indexed_silently():
+    db.index_file(shared_photo(-5200, "p-3", "montagne"))
+    file_data = shared_photo(-5300, "p-4")
+    assert not FileIndexer.index_known_file(file_data)
+    assert db.get_file_by_id("p-4", -5300) is None
+
+    FileIndexer.reuse_known_metadata(file_data)
+    assert file_data['description'] == "montagne"
+
+
+def test_cross_group_file_is_not_rewarded_again():
+    file_data = dict(shared_photo(-5400, "p-5"), file_unique_id="uniq-photo-2")
+    assert FileIndexer.reward_for(file_data) == FileIndexer.FILE_TYPES['photo']['reward']
+    db.index_file(file_data)
+    assert FileIndexer.reward_for(dict(shared_photo(-5500, "p-6"), file_unique_id="uniq-photo-2")) == 0
@@ -0,0 +1,70 @@
+from telegram.ext import CommandHandler, ConversationHandler, MessageHandler, filters
+
+from utils.handler_blueprint import HandlerBlueprint
+
+
+async def callback(update, context):
+    return ConversationHandler.END
+
+
+def make_conversation():
+    return ConversationHandler(
+        entry_points=[CommandHandler('start', callback)],
+        states={1: [MessageHandler(filters.TEXT, callback)]},
+        fallbacks=[CommandHandler('cancel', callback)],
+        name="inscription"
+    )
+
+
+class FakeJobQueue:
+    def __init__(self):
+        self.calls = []
+
+    def run_repeating(self, *args, **kwargs):
+        self.calls.append(("run_repeating", args, kwargs))
+
+
+class FakeApplication:
+    def __init__(self, job_queue=None):
+        self.handlers = []
+        self.job_queue = job_queue
+
+    def add_handler(self, handler, group=0):
+        self.handlers.append((handler, group))
+
+
+def register(application):
+    application.add_handler(CommandHandler('help', callback))
+    application.add_handlers({1: [make_conversation()]})
+    application.job_queue.run_repeating(callback, interval=60)
+
+
+def broken(application):
+    raise RuntimeError("enregistrement impossible")
+
+
+def test_registrations_run_once_and_errors_are_isolated():
+    blueprint = HandlerBlueprint.record(register, broken)
+    assert len(blueprint) == 2
+    assert [group for _, group in blueprint.handlers] == [0, 1]
+    assert blueprint.jobs == (("run_repeating", (callback,), {'interval': 60}),)
+
+
+def test_handlers_are_shared_but_conversations_are_copied():
+    blueprint = HandlerBlueprint.record(register)
+    first, second = FakeApplication(FakeJobQueue()), FakeApplication(FakeJobQueue())
+    blueprint.attach(first)
+    blueprint.attach(second)
+
+    assert first.handlers[0][0] is second.handlers[0][0]
+    first_conversation, second_conversation = first.handlers[1][0], second.handlers[1][0]
+    assert first_conversation is not second_conversation
+    assert first_conversation.name == "inscription" and second.handlers[1][1] == 1
+    assert first_conversation.states[1][0] is blueprint.handlers[1][0].states[1][0]
+    assert len(first.job_queue.calls) == len(second.job_queue.calls) == 1
+
+
+def test_jobs_are_skipped_without_job_queue():
+    application = FakeApplication()
+    HandlerBlueprint.record(register).attach(application)
+    assert len(application.handlers) == 2
@@ -0,0 +1,42 @@
+import io
+import json
+
+from utils.history_backfill import TelegramExport, backfill_group, export_record
+from utils.memory_full import db
+
+NOT_INCLUDED = "(File not included. Change data exporting settings to download.)"
+
+
+def photo(message_id):
+    return {'id': message_id, 'type': 'message', 'date': "2024-05-01T10:00:00",
+            'photo': NOT_INCLUDED, 'text': "", 'from_id': "user42"}
+
+
+def export_stream(messages, chunk_size=64):
+    data = json.dumps({'name': "Groupe", 'type': 'private_supergroup', 'id': 77, 'messages': messages})
+    return TelegramExport(io.StringIO(data), chunk_size=chunk_size)
+
+
+def test_export_is_streamed_across_small_chunks():
+    export = export_stream([photo(n) for n in range(1, 6)], chunk_size=16)
+    assert [message['id'] for message in export.messages()] == [1, 2, 3, 4, 5]
+    assert export.chat_id == -10077
+
+
+def test_captionless_photos_are_not_duplicates():
+    stats = list(backfill_group(iter([photo(n) for n in range(1, 6)]), -6100, db, batch_size=2))
+    assert stats[-1] == {'messages': 5, 'indexed': 5, 'duplicates': 0}
+    assert len(stats) == 3  # Un rapport par lot plein, puis le dernier
+
+
+def test_reimport_skips_messages_already_indexed():
+    list(backfill_group(iter([photo(1), photo(2)]), -6200, db))
+    stats = list(backfill_group(iter([photo(1), photo(2), photo(3)]), -6200, db))
+    assert stats[-1] == {'messages': 3, 'indexed': 1, 'duplicates': 2}
+
+
+def test_missing_export_file_does_not_become_the_title():
+    message = {'id': 9, 'type': 'message', 'file': NOT_INCLUDED, 'text': "cours"}
+    assert export_record(message, -6300)['title'] == "Document sans titre"
+    message['file'] = "files/rapport.pdf"
+    assert export_record(message, -6300)['title'] == "rapport.pdf"
@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+
+from utils.http_pool import SharedHTTPPool
+
+BOT_URL = "https://api.telegram.org/bot123:abc"
+
+
+def mocked_pool(status=200):
+    pool = SharedHTTPPool()
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(status, json={'ok': status == 200, 'result': True})
+    ))
+    return pool
+
+
+def test_requests_share_the_client_until_last_release():
+    pool = mocked_pool()
+    first, second = pool.request(), pool.request()
+
+    async def run():
+        await first.initialize()
+        await second.initialize()
+        await first.initialize()  # Sans effet : une référence par requête
+        assert pool.stats()['references'] == 2
+        assert first._build_client() is second._build_client()
+        await first.shutdown()
+        assert not pool.client.is_closed
+        client = pool.client
+        await second.shutdown()
+        return client
+
+    assert asyncio.run(run()).is_closed
+
+
+def test_calls_are_counted_and_reported_to_the_bot_watcher():
+    pool = mocked_pool(status=500)
+    calls = []
+    pool.watch(BOT_URL, lambda method, error: calls.append((method, error)))
+    request = pool.request()
+
+    async def run():
+        await request.do_request(f"{BOT_URL}/sendMessage", "POST")
+        await request.do_request(f"{BOT_URL}/getUpdates", "POST")
+
+    asyncio.run(run())
+    assert calls == [("sendMessage", "HTTP 500"), ("getUpdates", "HTTP 500")]
+    assert pool.metrics['requests'] == 1 and pool.metrics['polls'] == 1
+    assert pool.metrics['in_flight'] == 0
+
+    pool.unwatch(BOT_URL)
+    asyncio.run(request.do_request(f"{BOT_URL}/getMe", "POST"))
+    assert len(calls) == 2
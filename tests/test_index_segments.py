@@ -0,0 +1,38 @@
+from utils.file_index import ShardedFileIndex, facet_values, file_terms
+from utils.index_segments import Segment, decode_postings, encode_postings, write_segment
+
+
+def test_postings_round_trip_with_large_gaps():
+    numbers = [0, 1, 5, 130, 20000, 20001]
+    assert decode_postings(encode_postings(numbers)) == numbers
+
+
+def test_segment_lookups(tmp_path):
+    records = {
+        "b": {'file_id': "b", 'title': "cours physique", 'file_type': 'video'},
+        "a": {'file_id': "a", 'title': "cours maths", 'file_type': 'document'},
+    }
+    path = tmp_path / "seg_000001.tsg"
+    assert write_segment(path, records, file_terms, facet_values) == 2
+
+    segment = Segment(path, 1)
+    assert [segment.key(n) for n in range(segment.doc_count)] == ["a", "b"]
+    assert segment.record(segment.doc_number("b"))['title'] == "cours physique"
+    assert segment.doc_number("z") is None
+    assert segment.postings("cours") == [0, 1]
+    assert segment.postings("chimie") == []
+    assert dict(segment.facet_values("file_type")) == {'document': [0], 'video': [1]}
+
+
+def test_flushed_shard_is_searchable_after_reload(tmp_path):
+    index = ShardedFileIndex(tmp_path)
+    index.index_files([
+        {'file_id': f"f{n}", 'group_id': -7, 'title': f"chapitre {n} algebre", 'file_type': 'document'}
+        for n in range(5)
+    ])
+    index.remove_file(-7, "f2")
+    index.flush()
+
+    reopened = ShardedFileIndex(tmp_path)
+    found = {record['file_id'] for record in reopened.search("algebre", -7)}
+    assert found == {"f0", "f1", "f3", "f4"}
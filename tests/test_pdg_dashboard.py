@@ -0,0 +1,36 @@
+from utils.bot_health import BACKOFF, RUNNING
+from utils.pdg_dashboard import format_health_table
+
+
+class FakeProcess:
+    def __init__(self, alive):
+        self.alive = alive
+
+    def is_alive(self):
+        return self.alive
+
+
+class FakeSupervisor:
+    running = True
+
+    def __init__(self):
+        self.workers = {0: (FakeProcess(True), None), 1: (FakeProcess(False), None)}
+
+    def distribution(self):
+        return {0: 2, 1: 1}
+
+
+def row(key, state, worker, last_error=""):
+    return {
+        'key': key, 'name': None, 'state': state, 'last_poll': 3.0, 'calls': 10, 'api_errors': 0,
+        'handler_errors': 0, 'restarts': 0, 'retry_in': 30.0, 'last_error': last_error, 'worker': worker
+    }
+
+
+def test_worker_mode_shows_per_bot_health():
+    rows = [row("111:a", RUNNING, 0), row("222:b", BACKOFF, 0, "polling interrompu")]
+    message = format_health_table(rows, FakeSupervisor())
+    assert "Santé des bots (2)" in message
+    assert "222 : polling interrompu (relance dans 30s)" in message
+    assert "Worker 0 : 2/2 bots (🟢)" in message
+    assert "Worker 1 : 0/1 bots (🔴)" in message
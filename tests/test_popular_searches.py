@@ -0,0 +1,63 @@
+from utils.database import DatabaseManager
+from utils.popular_searches import SearchTrends, SpaceSaving, GLOBAL_SCOPE
+from utils.search_cache import user_scope
+
+
+def test_space_saving_keeps_heavy_hitters_within_capacity():
+    summary = SpaceSaving(capacity=3)
+    for item in ["a"] * 10 + ["b"] * 5 + ["c", "d", "e", "f"]:
+        summary.add(item)
+    assert len(summary.counts) == 3
+    assert summary.total == 19
+    assert summary.top(2)[0] == ("a", 10)
+
+
+def test_trends_are_recorded_per_scope():
+    trends = SearchTrends()
+    trends.record("Cours  Maths", user_id=1)
+    trends.record("cours maths", user_id=2)
+    trends.record("histoire", user_id=1)
+    assert trends.top(GLOBAL_SCOPE, "day", 1) == [{"query": "cours maths", "count": 2}]
+    assert trends.total(user_scope(1), "day") == 2
+    assert trends.top(user_scope(3)) == []
+
+
+def test_trends_survive_a_round_trip():
+    trends = SearchTrends()
+    trends.record("physique", user_id=1)
+    restored = SearchTrends()
+    restored.load_dict(trends.to_dict())
+    assert restored.top(user_scope(1), "month") == [{"query": "physique", "count": 1}]
+
+
+def test_daily_search_count_is_exact_and_persisted():
+    manager = DatabaseManager()
+    for n in range(12):
+        manager.log_search(7700, f"requête {n}", 1)
+    assert manager.get_daily_search_count(7700) == 12
+
+    manager.db.cache.clear()
+    assert DatabaseManager().get_daily_search_count(7700) == 12
+    assert manager.get_daily_search_count(7701) == 0
+
+
+def test_space_saving_evicts_the_smallest_counter():
+    summary = SpaceSaving(capacity=2)
+    for item in ["a", "a", "a", "b", "b", "c"]:
+        summary.add(item)
+    assert summary.counts == {"a": 3, "c": 3}
+    assert summary.errors["c"] == 2
+
+    restored = SpaceSaving.from_dict(summary.to_dict())
+    restored.add("d")
+    assert set(restored.counts) == {"a", "d"} or set(restored.counts) == {"c", "d"}
+    assert restored.counts["d"] == 4
+
+
+def test_space_saving_heap_stays_bounded():
+    summary = SpaceSaving(capacity=8)
+    for n in range(10000):
+        summary.add(f"terme {n % 50}")
+    assert len(summary.counts) == 8
+    assert len(summary._heap) <= 4 * 8 + 16
+    assert summary.total == 10000
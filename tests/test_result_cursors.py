@@ -0,0 +1,31 @@
+from utils import result_cursors as cursors_module
+from utils.result_cursors import ResultCursorStore
+
+
+def test_pages_and_results_come_from_the_cursor():
+    store = ResultCursorStore()
+    cursor_id = store.create(list(range(12)), query="cours", chat_id=5)
+    assert len(f"more_results:{cursor_id}:99") <= 64
+    assert store.page(cursor_id, 2, 5) == ([10, 11], 12)
+    assert store.get_result(cursor_id, 3) == 3
+    assert store.get_result(cursor_id, 12) is None
+    assert store.get(cursor_id)["query"] == "cours"
+
+
+def test_results_and_cursors_are_capped():
+    store = ResultCursorStore(max_cursors=2, max_results=3)
+    first = store.create(list(range(10)))
+    assert store.page(first, 0, 10) == ([0, 1, 2], 3)
+    store.create([])
+    store.create([])
+    assert store.get(first) is None
+
+
+def test_cursor_expires(monkeypatch):
+    store = ResultCursorStore(ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr(cursors_module.time, "monotonic", lambda: now[0])
+    cursor_id = store.create([1])
+    now[0] += 11
+    assert store.get(cursor_id) is None
+    assert store.page(cursor_id, 0, 5) is None
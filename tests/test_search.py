@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.result_cursors import result_cursors
+from utils.search import SearchHandler
+
+
+class FakeQuery:
+    def __init__(self, data, user_id=1):
+        self.data = data
+        self.from_user = SimpleNamespace(id=user_id)
+        self.answers = []
+        self.edits = []
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append((text, show_alert))
+
+    async def edit_message_text(self, text, reply_markup=None, parse_mode=None):
+        self.edits.append((text, reply_markup))
+
+
+def click(handler, data, user_id=1):
+    query = FakeQuery(data, user_id)
+    asyncio.run(handler.handle_callback(SimpleNamespace(callback_query=query), None))
+    return query
+
+
+def buttons(query):
+    return [button.callback_data for row in query.edits[-1][1].inline_keyboard for button in row]
+
+
+def test_type_filters_fit_in_callback_data():
+    results = [
+        {'file_name': "contrat.docx", 'file_type': "application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
+        {'file_name': "note.pdf", 'file_type': "application/pdf"},
+    ]
+    handler = SearchHandler(db=None, translations=None)
+    handler.create_document_excerpt = lambda result, query_text: "…"
+    cursor_id = result_cursors.create(results, query="x" * 200, user_id=1)
+
+    filters = click(handler, f"search_filter:{cursor_id}")
+    assert all(len(data.encode()) <= 64 for data in buttons(filters))
+
+    filtered = click(handler, buttons(filters)[0])
+    assert "contrat.docx" in filtered.edits[0][0] and "note.pdf" not in filtered.edits[0][0]
+
+
+def test_cursor_of_another_user_is_treated_as_expired():
+    cursor_id = result_cursors.create([{'file_name': "a", 'file_type': "pdf"}], query="a", user_id=1)
+    query = click(SearchHandler(db=None, translations=None), f"search_filter:{cursor_id}", user_id=2)
+    assert query.answers == [("⌛ Résultats expirés. Relancez la recherche.", True)]
+    assert query.edits == []
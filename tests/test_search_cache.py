@@ -0,0 +1,72 @@
+from utils.search_cache import SearchResultCache, group_scope, search_cache, user_scope
+
+
+def test_hit_after_put():
+    cache = SearchResultCache()
+    cache.put(user_scope(1), "Rapport  Annuel", [{"id": 1}])
+    assert cache.get(user_scope(1), "rapport annuel") == [{"id": 1}]
+    assert cache.stats()["hits"] == 1
+
+
+def test_filters_are_part_of_the_key():
+    cache = SearchResultCache()
+    cache.put(group_scope(5), "cours", [1], {"file_type": "pdf"})
+    assert cache.get(group_scope(5), "cours") is None
+    assert cache.get(group_scope(5), "cours", {"file_type": "pdf"}) == [1]
+
+
+def test_bump_invalidates_only_its_scope():
+    cache = SearchResultCache()
+    cache.put(user_scope(1), "q", [1])
+    cache.put(user_scope(2), "q", [2])
+    cache.bump(user_scope(1))
+    assert cache.get(user_scope(1), "q") is None
+    assert cache.get(user_scope(2), "q") == [2]
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SearchResultCache(max_entries=2)
+    cache.put(user_scope(1), "a", [1])
+    cache.put(user_scope(1), "b", [2])
+    cache.get(user_scope(1), "a")
+    cache.put(user_scope(1), "c", [3])
+    assert cache.get(user_scope(1), "b") is None
+    assert cache.get(user_scope(1), "a") == [1]
+
+
+def test_deleting_a_document_invalidates_the_user_scope():
+    from utils.database import DatabaseManager
+
+    manager = DatabaseManager()
+    doc_id = manager.create_indexed_document({'user_id': 41, 'content_hash': "ab" * 32, 'file_name': "a.pdf"})
+    generation = search_cache.generation(user_scope(41))
+    assert manager.delete_indexed_document(41, doc_id)
+    assert search_cache.generation(user_scope(41)) > generation
+
+
+def test_deleting_a_group_file_invalidates_the_group_scope():
+    from utils.memory_full import db
+
+    db.index_file({'file_id': "f-del", 'group_id': -4200, 'title': "cours", 'file_type': "pdf", 'user_id': 1})
+    search_cache.put(group_scope(-4200), "cours", [{'file_id': "f-del"}])
+    assert db.delete_indexed_file(-4200, "f-del")
+    assert search_cache.get(group_scope(-4200), "cours") is None
+
+
+def test_faceted_search_second_identical_search_hits_cache(monkeypatch):
+    from utils import search_engine
+    from utils.memory_full import db
+
+    calls = []
+
+    def search_files_faceted(query, group_id, filters=None):
+        calls.append(query)
+        return [{"file_id": "f1", "title": "cours"}], {"file_type": {"document": 1}}
+
+    monkeypatch.setattr(db, "search_files_faceted", search_files_faceted)
+    first = search_engine.faceted_search(-4300, "cours")
+    second = search_engine.faceted_search(-4300, "cours")
+    assert second == first
+    assert second["results"][0]["file_id"] == "f1"
+    assert second["facets"] == {"file_type": {"document": 1}}
+    assert calls == ["cours"]
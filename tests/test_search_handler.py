@@ -0,0 +1,46 @@
+import asyncio
+from types import SimpleNamespace
+
+from telegram.ext import CallbackQueryHandler
+
+from utils.result_cursors import result_cursors
+from utils.search_handler import register_search_handler
+
+
+class FakeApplication:
+    def __init__(self):
+        self.handlers = []
+
+    def add_handler(self, handler, group=0):
+        self.handlers.append(handler)
+
+
+class FakeQuery:
+    def __init__(self, data):
+        self.data = data
+        self.answers = []
+        self.message = SimpleNamespace(chat=SimpleNamespace(id=-8100))
+        self.from_user = SimpleNamespace(id=1)
+
+    async def answer(self, text=None, show_alert=False):
+        self.answers.append((text, show_alert))
+
+
+def download_callback():
+    application = FakeApplication()
+    register_search_handler(application)
+    return next(handler.callback for handler in application.handlers
+                if isinstance(handler, CallbackQueryHandler) and handler.pattern.match("dl:x:0"))
+
+
+def test_expired_cursor_asks_to_search_again():
+    query = FakeQuery("dl:inconnu:0")
+    asyncio.run(download_callback()(SimpleNamespace(callback_query=query), None))
+    assert query.answers == [("⌛ Résultats expirés. Relancez la recherche.", True)]
+
+
+def test_out_of_range_result_is_not_found():
+    cursor_id = result_cursors.create([{'file_id': "f", 'file_type': 'document', 'title': "t"}])
+    query = FakeQuery(f"dl:{cursor_id}:5")
+    asyncio.run(download_callback()(SimpleNamespace(callback_query=query), None))
+    assert query.answers == [("❌ Fichier introuvable", True)]
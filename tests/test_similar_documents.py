@@ -0,0 +1,77 @@
+from utils.similar_documents import TfidfIndex
+
+
+def make_index(tmp_path):
+    index = TfidfIndex(tmp_path)
+    index.add("a1", 1, "chat chien souris")
+    index.add("a2", 1, "chat chien oiseau")
+    index.add("a3", 1, "voiture moteur route")
+    index.add("b1", 2, "chat chien souris")
+    return index
+
+
+def test_similar_stays_within_owner(tmp_path):
+    index = make_index(tmp_path)
+    neighbours = index.similar("a1", k=5, owner_id=1)
+    assert [doc_id for doc_id, _ in neighbours] == ["a2"]
+    assert 0 < neighbours[0][1] < 1
+
+
+def test_add_only_rebuilds_its_owner(tmp_path):
+    index = make_index(tmp_path)
+    index.similar("a1", owner_id=1)
+    index.similar("b1", owner_id=2)
+    index.add("b2", 2, "chat souris")
+    assert index._owners[1]._matrix is not None
+    assert index._owners[2]._matrix is None
+
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    make_index(tmp_path)
+    reopened = TfidfIndex(tmp_path)
+    assert reopened.similar("a1", owner_id=1)[0][0] == "a2"
+    assert reopened.remove("a2", 1)
+    assert TfidfIndex(tmp_path).similar("a1", owner_id=1) == []
+
+
+def test_ensure_owner_loaded_runs_once(tmp_path):
+    index = TfidfIndex(tmp_path)
+    index.ensure_owner_loaded(5, [("d1", {"alpha": 2, "beta": 1}), ("d2", {"alpha": 1})])
+    assert "d1" in index and "d2" in index
+    index.ensure_owner_loaded(5, [("d3", {"gamma": 1})])
+    assert "d3" not in index
+    assert TfidfIndex(tmp_path, max_owners=1)._vectors(5).complete
+
+
+def test_add_appends_to_journal_without_rewriting_snapshot(tmp_path):
+    index = TfidfIndex(tmp_path, compact_after=3)
+    index.add("a1", 1, "chat chien souris")
+    index.add("a2", 1, "chat chien oiseau")
+    assert not index._owner_path(1).exists()
+    assert len(index._journal_path(1).read_text().splitlines()) == 2
+
+    index.remove("a2", 1)
+    index.add("a3", 1, "chat souris")
+    assert index._owner_path(1).exists()
+    assert not index._journal_path(1).exists()
+    assert sorted(TfidfIndex(tmp_path).similar("a1", owner_id=1)) == sorted(index.similar("a1", owner_id=1))
+
+
+def test_truncated_journal_line_is_ignored(tmp_path):
+    index = TfidfIndex(tmp_path)
+    index.add("a1", 1, "chat chien souris")
+    index.add("a2", 1, "chat chien oiseau")
+    with open(index._journal_path(1), 'a') as f:
+        f.write('{"add": "a3", "ter')
+    assert TfidfIndex(tmp_path).similar("a1", owner_id=1)[0][0] == "a2"
+
+
+def test_ensure_owner_loaded_skips_analysis_when_complete(tmp_path):
+    index = TfidfIndex(tmp_path)
+    index.ensure_owner_loaded(5, [("d1", {"alpha": 1})])
+
+    def documents():
+        raise AssertionError("documents analysés inutilement")
+        yield
+
+    index.ensure_owner_loaded(5, documents())
@@ -0,0 +1,21 @@
+from utils.text_analysis import AnalysisCache, analyze_text, top_keywords
+
+
+def test_analysis_counts_terms_and_first_positions():
+    analysis = analyze_text("Le contrat, le CONTRAT et la facture du contrat.")
+    assert analysis['word_count'] == 9
+    assert analysis['term_counts'] == {'contrat': 3, 'facture': 1}
+    assert analysis['keywords'][0] == 'contrat'
+    assert analysis['positions']['contrat'] == 3
+
+
+def test_top_keywords_keeps_first_seen_order_on_ties():
+    assert top_keywords({'beta': 2, 'alpha': 2, 'gamma': 1}, 2) == ['beta', 'alpha']
+
+
+def test_analysis_cache_reuses_result_per_digest():
+    cache = AnalysisCache(max_entries=1)
+    first = cache.get("d1", "rapport annuel")
+    assert cache.get("d1", "texte ignoré") is first
+    cache.get("d2", "autre document")
+    assert cache.get("d1", "nouveau texte")['term_counts'] == {'nouveau': 1, 'texte': 1}
@@ -0,0 +1,79 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+
+from utils import text_extraction
+
+
+def blank_pdf(pages: int) -> bytes:
+    from PyPDF2 import PdfWriter
+
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def collect(source, extension):
+    async def run():
+        try:
+            return [page async for page in text_extraction.iter_pages(source, extension)]
+        finally:
+            text_extraction.shutdown_executor()
+    return asyncio.run(run())
+
+
+def test_pdf_from_memory_yields_every_page_without_touching_the_disk(monkeypatch):
+    segments = []
+    share = text_extraction._share
+    monkeypatch.setattr(text_extraction, "_share", lambda content: segments.append(share(content)) or segments[-1])
+    pages = collect(blank_pdf(20), '.pdf')
+    assert [(number, total) for number, total, _ in pages] == [(n, 20) for n in range(1, 21)]
+    assert len(segments) == 1
+    assert not os.path.exists(f"/dev/shm/{segments[0].name}")
+
+
+def test_reader_is_kept_between_batches_and_dropped_after_the_last(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(blank_pdf(10))
+    text_extraction._pdf_pages(str(path), 0, 8, time.time() + 60, 60.0)
+    reader = text_extraction._reader
+    assert reader is not None
+    pages, total, _ = text_extraction._pdf_pages(str(path), 8, 16, time.time() + 60, 60.0)
+    assert len(pages) == 2 and total == 10
+    assert text_extraction._reader is None
+    assert reader[1].closed
+
+
+def test_worker_reads_shared_memory_source():
+    content = blank_pdf(3)
+    segment = text_extraction._share(content)
+    try:
+        pages, total, _ = text_extraction._pdf_pages(("shm", segment.name, len(content)), 0, 8, time.time() + 60, 60.0)
+    finally:
+        segment.close()
+        segment.unlink()
+    assert len(pages) == total == 3
+    assert text_extraction._reader is None
+
+
+def test_worker_stops_at_the_deadline(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(blank_pdf(10))
+    pages, total, _ = text_extraction._pdf_pages(str(path), 0, 8, time.time() - 1, 60.0)
+    assert pages == [] and total == 10
+    assert text_extraction._reader is None
+
+
+def test_text_file_is_a_single_page():
+    assert collect(b"bonjour", '.txt') == [(1, 1, "bonjour")]
+
+
+def test_unsupported_extension():
+    with pytest.raises(ValueError):
+        collect(b"", '.exe')
@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.http_pool import http_pool
+from utils import webhook_server
+from utils.webhook_server import SECRET_HEADER, WebhookServer
+
+TOKEN = "123456:" + "A" * 35
+
+
+class FakeBot:
+    def __init__(self, token):
+        self.token = token
+        self.base_url = f"https://api.telegram.org/bot{token}"
+        self.webhooks = []
+
+    async def set_webhook(self, url, secret_token, **kwargs):
+        self.webhooks.append((url, secret_token))
+
+    async def delete_webhook(self):
+        self.webhooks.append(None)
+
+
+class FakeApplication:
+    def __init__(self, token=TOKEN):
+        self.bot = FakeBot(token)
+        self.update_queue = asyncio.Queue()
+
+
+def test_bot_path_depends_on_bot_id_and_server_secret():
+    server = WebhookServer("https://example.org/", secret="s1")
+    assert server.bot_path(TOKEN) == server.bot_path("123456:" + "B" * 35)
+    assert server.bot_path(TOKEN) != WebhookServer("https://example.org", secret="s2").bot_path(TOKEN)
+    assert server.bot_secret(TOKEN) != server.bot_secret("123456:" + "B" * 35)
+
+
+def test_updates_are_routed_and_secret_checked():
+    server = WebhookServer("https://example.org", secret="s1")
+    application = FakeApplication()
+
+    async def run():
+        await server.register("bot", application)
+        url, secret = application.bot.webhooks[0]
+        assert url == f"https://example.org/tg/{server.bot_path(TOKEN)}"
+
+        app = web.Application()
+        app.router.add_post("/tg/{path}", server._handle_update)
+        async with TestClient(TestServer(app)) as client:
+            path = f"/tg/{server.bot_path(TOKEN)}"
+            assert (await client.post("/tg/inconnu", json={})).status == 404
+            assert (await client.post(path, json={'update_id': 1}, headers={SECRET_HEADER: "faux"})).status == 403
+            assert (await client.post(path, json={'update_id': 2}, headers={SECRET_HEADER: secret})).status == 200
+        return await application.update_queue.get()
+
+    assert asyncio.run(run()).update_id == 2
+
+
+def test_parked_updates_are_delivered_on_wake():
+    server = WebhookServer("https://example.org", secret="s1")
+    woken = []
+
+    async def run():
+        await server.register("bot", FakeApplication())
+        server.park("bot", lambda: woken.append(True))
+        route = server.routes[server.bot_path(TOKEN)]
+
+        app = web.Application()
+        app.router.add_post("/tg/{path}", server._handle_update)
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(f"/tg/{server.bot_path(TOKEN)}", json={'update_id': 7},
+                                         headers={SECRET_HEADER: route.secret})
+            assert response.status == 200
+
+        awake = FakeApplication()
+        await server.register("bot", awake)
+        assert awake.bot.webhooks == []  # Le webhook déclaré avant la veille est conservé
+        return await awake.update_queue.get()
+
+    assert asyncio.run(run()).update_id == 7
+    assert woken == [True]
+
+
+def test_parked_bot_webhook_is_deleted_without_application(monkeypatch):
+    server = WebhookServer("https://example.org", secret="s1")
+    calls = []
+
+    def handler(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json={'ok': True, 'result': True})
+
+    async def run():
+        monkeypatch.setattr(http_pool, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        await server.register("bot", FakeApplication())
+        server.park("bot", lambda: None)
+        await server.unregister("bot", delete_webhook=True)
+        await http_pool._client.aclose()
+
+    asyncio.run(run())
+    assert calls == [f"https://api.telegram.org/bot{TOKEN}/deleteWebhook"]
+    assert server.routes == {} and server.paths == {}
+
+
+def test_parked_route_buffers_a_bounded_number_of_updates(monkeypatch):
+    monkeypatch.setattr(webhook_server, "MAX_PARKED_UPDATES", 2)
+    server = WebhookServer("https://example.org", secret="s1")
+    woken = []
+
+    async def run():
+        await server.register("bot", FakeApplication())
+        server.park("bot", lambda: woken.append(True))
+        route = server.routes[server.bot_path(TOKEN)]
+
+        app = web.Application()
+        app.router.add_post("/tg/{path}", server._handle_update)
+        async with TestClient(TestServer(app)) as client:
+            for update_id in range(3):
+                await client.post(f"/tg/{server.bot_path(TOKEN)}", json={'update_id': update_id},
+                                  headers={SECRET_HEADER: route.secret})
+        return route.pending
+
+    assert [data['update_id'] for data in asyncio.run(run())] == [0, 1]
+    assert woken == [True] * 3
@@ -0,0 +1,88 @@
+"""
+Analyse de texte partagée par l'indexation, les mots-clés et les recommandations
+"""
+
+import heapq
+import re
+import threading
+from collections import Counter, OrderedDict
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List
+
+# Liste de mots vides en français et anglais
+STOP_WORDS = frozenset({
+    'le', 'la', 'les', 'un', 'une', 'des', 'du', 'de', 'et', 'ou', 'mais',
+    'donc', 'car', 'que', 'qui', 'quoi', 'dont', 'où', 'ce', 'cette',
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been'
+})
+
+NON_ALNUM = re.compile(r'[\W_]+')
+_WORD = re.compile(r'\S+')
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """Mots significatifs d'un texte (minuscules, sans ponctuation ni mots vides)"""
+    for word in text.lower().split():
+        word = NON_ALNUM.sub('', word)
+        if len(word) > 3 and word not in STOP_WORDS:
+            yield word
+
+
+def top_keywords(term_counts: Dict[str, int], n: int = 20) -> List[str]:
+    """Termes les plus fréquents (ordre d'apparition en cas d'égalité)"""
+    return [term for term, _ in heapq.nlargest(n, term_counts.items(), key=itemgetter(1))]
+
+
+def analyze_text(text: str, keyword_count: int = 20, position_limit: int = 200) -> Dict[str, Any]:
+    """Analyse complète d'un document en un seul parcours du texte.
+
+    Retourne le nombre de mots, les comptes des termes significatifs, les
+    mots-clés et la position de la première occurrence des termes les plus
+    fréquents (pour les extraits).
+    """
+    word_count = 0
+    counts: Counter = Counter()
+    positions: Dict[str, int] = {}
+    for match in _WORD.finditer(text.lower()):
+        word_count += 1
+        word = NON_ALNUM.sub('', match.group())
+        if len(word) > 3:
+            counts[word] += 1
+            if word not in positions:
+                positions[word] = match.start()
+
+    term_counts = {word: count for word, count in counts.items() if word not in STOP_WORDS}
+    return {
+        'word_count': word_count,
+        'term_counts': term_counts,
+        'keywords': top_keywords(term_counts, keyword_count),
+        'positions': {word: positions[word] for word, _ in counts.most_common(position_limit)}
+    }
+
+
+class AnalysisCache:
+    """Analyses récentes indexées par empreinte du contenu (LRU)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str, text: str) -> Dict[str, Any]:
+        """Analyse du contenu, calculée au premier appel pour cette empreinte"""
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                return self._entries[digest]
+
+        analysis = analyze_text(text)
+        with self._lock:
+            self._entries[digest] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+
+# Instance partagée entre l'indexation, les statistiques et les réponses
+analysis_cache = AnalysisCache()
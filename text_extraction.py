@@ -0,0 +1,223 @@
+"""
+Extraction du texte des documents (PDF, DOCX, texte) hors de la boucle asyncio.
+
+Le travail CPU (analyse PDF/DOCX) est exécuté dans un ProcessPoolExecutor
+par lots de pages, ce qui permet de restituer le texte page par page à
+l'indexeur et de suivre la progression sans bloquer le bot.
+
+Un PDF reçu en mémoire est copié une fois dans un segment de mémoire
+partagée (sans passer par le disque) : les lots ne transportent que son nom,
+et chaque processus du pool garde le document analysé d'un lot à l'autre,
+jusqu'à son dernier lot. Les lots s'arrêtent d'eux-mêmes à l'échéance du
+document au lieu de continuer après son abandon.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+# Paramètres d'extraction
+PAGES_PER_TASK = 8                # Pages PDF traitées par tâche du pool
+PARAGRAPHS_PER_PAGE = 40          # Découpage des DOCX (pas de pagination native)
+DOCUMENT_TIME_BUDGET = 120.0      # Secondes (temps réel) par document
+DOCUMENT_CPU_BUDGET = 60.0        # Secondes CPU cumulées par document
+MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+WORKER_GRACE = 5.0                # Secondes laissées au lot pour rendre ses pages à l'échéance
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt', '.md')
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+Source = Union[str, bytes, bytearray]
+SharedSource = Tuple[str, str, int]  # ("shm", nom du segment, taille) : PDF en mémoire partagée
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+class ExtractionBudgetExceeded(Exception):
+    """Le document a dépassé son budget de temps ou de CPU"""
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Retourne le pool de processus partagé (créé à la demande)"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    """Arrête le pool de processus (à l'arrêt du bot)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# --- Fonctions exécutées dans les processus du pool ---
+
+def _open_source(source: Source):
+    """Ouvre une source (chemin ou contenu binaire) en lecture binaire"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return open(source, 'rb')
+
+
+def _read_text(source: Source) -> str:
+    with _open_source(source) as f:
+        return f.read().decode('utf-8', errors='replace')
+
+
+_reader = None  # (clé, flux, PdfReader) du PDF en cours dans ce processus
+
+
+def _read_shared(source: SharedSource) -> bytes:
+    """Copie le contenu d'un segment de mémoire partagée créé par le processus principal"""
+    segment = shared_memory.SharedMemory(name=source[1])
+    try:
+        return bytes(segment.buf[:source[2]])
+    finally:
+        segment.close()  # Le segment appartient au processus principal, qui le supprime
+
+
+def _drop_reader():
+    """Libère le document gardé par ce processus (et son fichier ouvert)"""
+    global _reader
+    if _reader is not None:
+        _reader[1].close()
+        _reader = None
+
+
+def _pdf_reader(source: Union[str, SharedSource]):
+    """PdfReader du document, analysé une seule fois par processus du pool"""
+    global _reader
+    from PyPDF2 import PdfReader
+
+    if isinstance(source, tuple):
+        key = source
+    else:
+        stat = os.stat(source)
+        key = (source, stat.st_mtime_ns, stat.st_size)
+    if _reader is None or _reader[0] != key:
+        _drop_reader()
+        stream = io.BytesIO(_read_shared(source)) if isinstance(source, tuple) else open(source, 'rb')
+        _reader = (key, stream, PdfReader(stream))
+    return _reader[2]
+
+
+def _pdf_pages(source: Union[str, SharedSource], start: int, end: int, deadline: float,
+               cpu_budget: float) -> Tuple[List[str], int, float]:
+    """Extrait les pages [start, end) jusqu'à l'échéance (time.time()) ou au budget CPU.
+
+    Retourne (textes, nombre de pages du document, temps CPU consommé). Le
+    document est libéré après son dernier lot ou un lot interrompu.
+    """
+    started = time.process_time()
+    reader = _pdf_reader(source)
+    total = len(reader.pages)
+    pages = []
+    for index in range(start, min(end, total)):
+        if time.time() > deadline or time.process_time() - started > cpu_budget:
+            break
+        pages.append(reader.pages[index].extract_text() or "")
+    if start + len(pages) >= total or len(pages) < min(end, total) - start:
+        _drop_reader()  # Dernier lot ou lot interrompu : pas de lot suivant pour ce document
+    return pages, total, time.process_time() - started
+
+
+def _docx_pages(source: Source) -> List[str]:
+    """Extrait les paragraphes d'un DOCX regroupés en pseudo-pages"""
+    with _open_source(source) as f, zipfile.ZipFile(f) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+
+    paragraphs = []
+    for paragraph in root.iter(f'{_WORD_NS}p'):
+        text = ''.join(node.text or '' for node in paragraph.iter(f'{_WORD_NS}t'))
+        if text.strip():
+            paragraphs.append(text)
+
+    return [
+        '\n'.join(paragraphs[i:i + PARAGRAPHS_PER_PAGE])
+        for i in range(0, len(paragraphs), PARAGRAPHS_PER_PAGE)
+    ]
+
+
+# --- API asynchrone ---
+
+async def _run_in_pool(deadline: float, func, *args):
+    loop = asyncio.get_running_loop()
+    remaining = deadline - loop.time()
+    if remaining <= 0:
+        raise ExtractionBudgetExceeded("Budget de temps épuisé")
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(get_executor(), func, *args), remaining + WORKER_GRACE
+        )
+    except asyncio.TimeoutError:
+        raise ExtractionBudgetExceeded("Budget de temps épuisé")
+
+
+def _share(content: bytes) -> shared_memory.SharedMemory:
+    """Copie un contenu en mémoire dans un segment partagé avec les processus du pool"""
+    segment = shared_memory.SharedMemory(create=True, size=max(1, len(content)))
+    segment.buf[:len(content)] = content
+    return segment
+
+
+async def iter_pages(
+    source: Source,
+    file_extension: str,
+    time_budget: float = DOCUMENT_TIME_BUDGET,
+    cpu_budget: float = DOCUMENT_CPU_BUDGET
+) -> AsyncIterator[Tuple[int, int, str]]:
+    """Produit (numéro de page, nombre de pages, texte) au fil de l'extraction.
+
+    Lève ExtractionBudgetExceeded si le document dépasse son budget : les
+    pages déjà produites restent exploitables par l'appelant.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + time_budget
+
+    if file_extension in ('.txt', '.md'):
+        text = await asyncio.wait_for(loop.run_in_executor(None, _read_text, source), time_budget)
+        yield 1, 1, text
+
+    elif file_extension == '.pdf':
+        segment = _share(source) if isinstance(source, (bytes, bytearray)) else None
+        pdf_source = ("shm", segment.name, len(source)) if segment else source
+        try:
+            wall_deadline = time.time() + time_budget
+            start, total, cpu_used = 0, None, 0.0
+            while total is None or start < total:
+                pages, total, cpu = await _run_in_pool(
+                    deadline, _pdf_pages, pdf_source, start, start + PAGES_PER_TASK, wall_deadline, cpu_budget - cpu_used
+                )
+                cpu_used += cpu
+                for offset, text in enumerate(pages):
+                    yield start + offset + 1, total, text
+                if cpu_used >= cpu_budget:
+                    raise ExtractionBudgetExceeded("Budget CPU épuisé")
+                if len(pages) < min(PAGES_PER_TASK, total - start):
+                    raise ExtractionBudgetExceeded("Budget de temps épuisé")
+                start += PAGES_PER_TASK
+        finally:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+    elif file_extension == '.docx':
+        pages = await _run_in_pool(deadline, _docx_pages, source)
+        for index, text in enumerate(pages, 1):
+            yield index, len(pages), text
+
+    else:
+        raise ValueError(f"Format non supporté: {file_extension}")
@@ -20,6 +20,12 @@ from extensions.extension import register_bot_fils_extensions
 from interface.interface import setup_admin_interfaces
 from handlers.groups_handlers import setup_groups_handlers
 from utils.database import DatabaseManager
+from utils.bot_runtime import bot_runtime
+from utils.bot_commands import configure_bot_commands
+from utils.bot_workers import ADMIN_BOT, CHILD_BOT
+from utils.http_pool import http_pool
+from utils.handler_blueprint import HandlerBlueprint
+from config import config
 from utils.security import SecurityManager
 from utils import message_config
 from i18n.translations import TranslationManager
@@ -264,7 +270,7 @@ async def handle_stats_view(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Erreur affichage stats: {e}")
         await update.callback_query.message.reply_text("❌ Erreur d'affichage des statistiques")
 
-async def register_admin_handlers(application):
+def register_admin_handlers(application):
     """Enregistre tous les handlers d'administration"""
     # Handlers principaux
     application.add_handler(CallbackQueryHandler(handle_bot_config, pattern="^admin_bot_config$"))
@@ -278,34 +284,6 @@ async def register_admin_handlers(application):
     application.add_handler(CallbackQueryHandler(handle_setup_request, pattern="^admin_subs_back$"))
     application.add_handler(CallbackQueryHandler(handle_setup_request, pattern="^admin_stats_back$"))
 
-async def configure_bot_commands(application: Application):
-    commands = [
-        ("setup", "Ouvrir le menu principal"),
-        ("recover", "Récupérer accès perdu"),
-        ("profile", "Mon profil"),
-        ("me", "Mes informations"),
-        ("shop", "Achat de crédits"),
-        ("buy", "Acheter un produit"),
-        ("credits", "Mes crédits"),
-        ("subscribe", "Abonnements"),
-        ("premium", "Passer en premium"),
-        ("referral", "Parrainage"),
-        ("invite", "Générer un lien de parrainage"),
-        ("filleuls", "Voir mes filleuls"),
-        ("search", "Rechercher dans l'index"),
-        ("index", "Indexer un document"),
-        ("admin", "Panel administrateur"),
-        ("stats", "Statistiques"),
-        ("logs", "Logs système"),
-        ("kick", "Expulser un utilisateur"),
-        ("ban", "Bannir un utilisateur"),
-        ("mute", "Réduire au silence"),
-        ("unmute", "Retirer le silence"),
-        ("warn", "Avertir un utilisateur"),
-        ("start", "Démarrer le bot")
-    ]
-    await application.bot.set_my_commands(commands)
-
 async def handle_back(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler pour le bouton Retour"""
     try:
@@ -381,33 +359,48 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         except Exception:
             pass
 
+async def build_admin_application(token: str) -> Application:
+    """Construit l'application d'un bot admin avec ses handlers"""
+    builder = Application.builder().token(token).base_url(config.BOT_API_BASE_URL)
+    application = http_pool.configure(builder).build()
+    application.add_error_handler(error_handler)
+    await register_user_bot_handlers(application)
+    return application
+
+async def build_bot_application(token: str, kind: str) -> Application:
+    """Usine d'un bot hébergé : bot fils (/start, configuration) ou bot admin"""
+    if kind == CHILD_BOT:
+        from utils.bot_linking import build_child_application
+        return await build_child_application(token)
+    return await build_admin_application(token)
+
+def get_hosted_bots() -> Dict[str, str]:
+    """Token -> type des bots admin et des bots fils enregistrés, sans doublon"""
+    bots = {token: ADMIN_BOT for token in user_handler.get_all_admin_bot_tokens()}
+    for token in db.get_all_child_bot_tokens():
+        bots.setdefault(token, CHILD_BOT)
+    return bots
+
 async def init_and_start_all_admin_bots_polling():
-    """Point d'entrée principal"""
-    tokens = user_handler.get_all_admin_bot_tokens()
-    if not tokens:
+    """Point d'entrée principal : héberge tous les bots admin et fils dans la boucle courante"""
+    bots = get_hosted_bots()
+    if not bots:
         logger.warning("Aucun token admin trouvé.")
         return
 
-    applications = []
-    for token in tokens:
-        try:
-            application = Application.builder().token(token).build()
-            application.add_error_handler(error_handler)
-            await register_user_bot_handlers(application)
-
-            import threading
-            def run_app():
-                application.run_polling()
-            
-            thread = threading.Thread(target=run_app, daemon=True)
-            thread.start()
-            applications.append(application)
+    for token, kind in bots.items():
+        bot_runtime.add(token, lambda token=token, kind=kind: build_bot_application(token, kind))
+    logger.info(f"{len(bots)} bots planifiés")
 
-            logger.info(f"Bot admin démarré avec le token: {token[:6]}...")
-        except Exception as e:
-            logger.error(f"Erreur démarrage bot admin: {e}")
+    asyncio.create_task(log_startup_report(list(bots)))
+    return bot_runtime
 
-    return applications
+async def log_startup_report(tokens: List[str]):
+    """Journalise les temps de démarrage une fois tous les bots lancés"""
+    started = asyncio.get_running_loop().time()
+    await bot_runtime.wait_started(tokens)
+    elapsed = asyncio.get_running_loop().time() - started
+    logger.info(f"{bot_runtime.startup_report(tokens)}\nDurée totale: {elapsed:.1f}s")
 
 async def register_user_bot_handlers(application: Application):
     """Enregistre les handlers pour un bot utilisateur"""
@@ -419,74 +412,79 @@ async def register_user_bot_handlers(application: Application):
         # 2. Enregistrement des commandes de base
         await configure_bot_commands(application)
 
-        # 3. Handlers utilisateur de base
-        application.add_handler(CommandHandler("profile", user_handler.profile_command))
-        application.add_handler(CommandHandler("me", user_handler.me_command))
-        
-        # Handler pour le bouton "🏠 Menu Admin"
-        application.add_handler(MessageHandler(filters.Regex(r'^🏠 Menu Admin$'), handle_trigger_setup))
-        
-        # Handlers boutique
-        application.add_handler(CommandHandler("shop", shop_handler.shop_command))
-        application.add_handler(CommandHandler("buy", shop_handler.buy_command))
-        application.add_handler(CommandHandler("credits", shop_handler.credits_command))
-        
-        # Handlers abonnement
-        application.add_handler(CommandHandler("subscribe", subscription_handler.subscribe_command))
-        application.add_handler(CommandHandler("premium", subscription_handler.premium_command))
-        
-        # Handlers parrainage
-        application.add_handler(CommandHandler("referral", referral_handler.referral_command))
-        application.add_handler(CommandHandler("invite", referral_handler.invite_command))
-        application.add_handler(CommandHandler("filleuls", referral_handler.filleuls_command))
-        
-        # Handlers recherche
-        application.add_handler(CommandHandler("search", search_handler.search_command))
-        application.add_handler(CommandHandler("index", search_handler.index_command))
-        
-        # Handlers admin
-        application.add_handler(CommandHandler("admin", admin_handler.admin_panel))
-        application.add_handler(CommandHandler("stats", admin_handler.stats_command))
-        application.add_handler(CommandHandler("logs", admin_handler.logs_command))
-        
-        # Handlers de modération (uniquement en inbox)
-        def is_private_chat(update: Update):
-            return update.message.chat.type == 'private'
-        
-        application.add_handler(CommandHandler("kick", moderation_handler.kick_command, filters=is_private_chat))
-        application.add_handler(CommandHandler("ban", moderation_handler.ban_command, filters=is_private_chat))
-        application.add_handler(CommandHandler("mute", moderation_handler.mute_command, filters=is_private_chat))
-        application.add_handler(CommandHandler("unmute", moderation_handler.unmute_command, filters=is_private_chat))
-        application.add_handler(CommandHandler("warn", moderation_handler.warn_command, filters=is_private_chat))
-
-        # Handlers de menu
-        application.add_handler(CommandHandler("setup", handle_setup_request))
-        application.add_handler(CommandHandler("menu", handle_auth_request))
-        
-        # 4. Handler pour les callbacks - ESSENTIEL!
-        application.add_handler(CallbackQueryHandler(handle_callback))
-
-        # 5. Handler spécifique pour le setup
-        application.add_handler(CallbackQueryHandler(
-            handle_trigger_setup, 
-            pattern="^trigger_setup$"
-        ))
-        
-        # Handler pour les messages - DOIT ÊTRE EN DERNIER
-        application.add_handler(MessageHandler(filters.ALL, handle_message))
-        
-        # Intégration des handlers de groupe
-        setup_groups_handlers(application)
-        
-        # Enregistrement des extensions
-        register_bot_fils_extensions(application)
-        setup_admin_interfaces(application)
-        await register_admin_handlers(application)
+        # 3. Handlers partagés, construits une fois au chargement du module
+        child_handlers.attach(application)
 
         logger.info("Handlers du bot utilisateur enregistrés avec succès")
     except Exception as e:
         logger.error(f"Erreur d'enregistrement des handlers: {e}", exc_info=True)
 
+def register_child_handlers(application):
+    """Handlers communs à tous les bots utilisateur (enregistrés dans child_handlers)"""
+    # Handlers utilisateur de base
+    application.add_handler(CommandHandler("profile", user_handler.profile_command))
+    application.add_handler(CommandHandler("me", user_handler.me_command))
+    
+    # Handler pour le bouton "🏠 Menu Admin"
+    application.add_handler(MessageHandler(filters.Regex(r'^🏠 Menu Admin$'), handle_trigger_setup))
+    
+    # Handlers boutique
+    application.add_handler(CommandHandler("shop", shop_handler.shop_command))
+    application.add_handler(CommandHandler("buy", shop_handler.buy_command))
+    application.add_handler(CommandHandler("credits", shop_handler.credits_command))
+    
+    # Handlers abonnement
+    application.add_handler(CommandHandler("subscribe", subscription_handler.subscribe_command))
+    application.add_handler(CommandHandler("premium", subscription_handler.premium_command))
+    
+    # Handlers parrainage
+    application.add_handler(CommandHandler("referral", referral_handler.referral_command))
+    application.add_handler(CommandHandler("invite", referral_handler.invite_command))
+    application.add_handler(CommandHandler("filleuls", referral_handler.filleuls_command))
+    
+    # Handlers recherche
+    application.add_handler(CommandHandler("search", search_handler.search_command))
+    application.add_handler(CommandHandler("index", search_handler.index_command))
+    
+    # Handlers admin
+    application.add_handler(CommandHandler("admin", admin_handler.admin_panel))
+    application.add_handler(CommandHandler("stats", admin_handler.stats_command))
+    application.add_handler(CommandHandler("logs", admin_handler.logs_command))
+    
+    # Handlers de modération (uniquement en inbox)
+    def is_private_chat(update: Update):
+        return update.message.chat.type == 'private'
+    
+    application.add_handler(CommandHandler("kick", moderation_handler.kick_command, filters=is_private_chat))
+    application.add_handler(CommandHandler("ban", moderation_handler.ban_command, filters=is_private_chat))
+    application.add_handler(CommandHandler("mute", moderation_handler.mute_command, filters=is_private_chat))
+    application.add_handler(CommandHandler("unmute", moderation_handler.unmute_command, filters=is_private_chat))
+    application.add_handler(CommandHandler("warn", moderation_handler.warn_command, filters=is_private_chat))
+
+    # Handlers de menu
+    application.add_handler(CommandHandler("setup", handle_setup_request))
+    application.add_handler(CommandHandler("menu", handle_auth_request))
+    
+    # 4. Handler pour les callbacks - ESSENTIEL!
+    application.add_handler(CallbackQueryHandler(handle_callback))
+
+    # 5. Handler spécifique pour le setup
+    application.add_handler(CallbackQueryHandler(
+        handle_trigger_setup, 
+        pattern="^trigger_setup$"
+    ))
+    
+    # Handler pour les messages - DOIT ÊTRE EN DERNIER
+    application.add_handler(MessageHandler(filters.ALL, handle_message))
+    
+    # Intégration des handlers de groupe
+    setup_groups_handlers(application)
+    
+    # Enregistrement des extensions
+    register_bot_fils_extensions(application)
+    setup_admin_interfaces(application)
+    register_admin_handlers(application)
+
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     data = query.data
@@ -585,3 +583,6 @@ async def handle_trigger_setup(update: Update, context: ContextTypes.DEFAULT_TYP
     except Exception as e:
         logger.error(f"Erreur trigger_setup: {e}")
         await send_error_message(update, context, "setup_error")
+
+# Graphe de handlers partagé par référence entre toutes les Applications des bots fils
+child_handlers = HandlerBlueprint.record(register_child_handlers)
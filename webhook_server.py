@@ -0,0 +1,157 @@
+"""
+Serveur webhook unique pour tous les bots.
+
+Un seul serveur aiohttp reçoit les mises à jour de tous les bots. Chaque bot
+a un chemin secret dérivé de son identifiant ; le secret de l'en-tête
+X-Telegram-Bot-Api-Secret-Token est vérifié avant de placer la mise à jour
+dans l'update_queue de l'Application correspondante.
+
+Un bot en veille n'a plus d'Application : sa route est "garée", les mises à
+jour reçues sont gardées et son réveil est demandé ; elles sont transmises à
+la nouvelle Application dès son enregistrement. Son webhook peut tout de même
+être supprimé : deleteWebhook passe alors directement par le pool HTTP.
+"""
+
+import hashlib
+import hmac
+import logging
+import secrets
+from typing import Any, Callable, Dict, List, Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from utils.http_pool import http_pool
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+MAX_PARKED_UPDATES = 1000  # Mises à jour gardées par bot en veille
+
+
+class _Route:
+    __slots__ = ("application", "secret", "api_url", "pending", "on_update")
+
+    def __init__(self, application: Optional[Application], secret: str):
+        self.application = application
+        self.secret = secret
+        self.api_url = application.bot.base_url  # Gardée pour supprimer le webhook en veille
+        self.pending: List[Dict[str, Any]] = []
+        self.on_update: Optional[Callable[[], None]] = None
+
+
+class WebhookServer:
+    """Route les mises à jour reçues vers l'Application de chaque bot"""
+
+    def __init__(self, public_url: str, host: str = "0.0.0.0", port: int = 8443,
+                 secret: Optional[str] = None, path_prefix: str = "tg"):
+        self.public_url = public_url.rstrip('/')
+        self.host = host
+        self.port = port
+        self.path_prefix = path_prefix
+        self._secret = (secret or secrets.token_hex(32)).encode()
+        self.routes: Dict[str, _Route] = {}  # chemin -> route du bot
+        self.paths: Dict[str, str] = {}  # clé du bot -> chemin
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None
+
+    def _derive(self, label: str, value: str) -> str:
+        return hmac.new(self._secret, f"{label}:{value}".encode(), hashlib.sha256).hexdigest()
+
+    def bot_path(self, token: str) -> str:
+        """Chemin secret du bot (stable tant que le secret du serveur ne change pas)"""
+        return self._derive("path", token.split(':', 1)[0])[:32]
+
+    def bot_secret(self, token: str) -> str:
+        return self._derive("header", token)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post(f"/{self.path_prefix}/{{path}}", self._handle_update)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Serveur webhook à l'écoute sur {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def register(self, key: str, application: Application, **webhook_kwargs):
+        """Ouvre la route du bot puis déclare le webhook auprès de l'API Bot"""
+        token = application.bot.token
+        path = self.bot_path(token)
+        parked = self.routes.get(path)
+        if parked is not None and parked.application is None:
+            # Réveil : le webhook est toujours déclaré, on livre les mises à jour gardées
+            parked.application, parked.on_update = application, None
+            for data in parked.pending:
+                update = Update.de_json(data, application.bot)
+                if update is not None:
+                    await application.update_queue.put(update)
+            parked.pending.clear()
+            return
+
+        secret_token = self.bot_secret(token)
+        self.routes[path] = _Route(application, secret_token)
+        self.paths[key] = path
+        await application.bot.set_webhook(
+            url=f"{self.public_url}/{self.path_prefix}/{path}",
+            secret_token=secret_token,
+            **webhook_kwargs
+        )
+
+    def park(self, key: str, on_update: Callable[[], None]):
+        """Garde la route d'un bot mis en veille ; on_update est appelé à la réception"""
+        route = self.routes.get(self.paths.get(key))
+        if route is not None:
+            route.application, route.on_update = None, on_update
+
+    async def unregister(self, key: str, delete_webhook: bool = False):
+        """Ferme la route du bot (et supprime son webhook si demandé)"""
+        path = self.paths.pop(key, None)
+        route = self.routes.pop(path, None) if path else None
+        if route and delete_webhook:
+            try:
+                await self._delete_webhook(route.api_url)
+            except Exception as e:
+                logger.error(f"Erreur suppression webhook: {e}")
+
+    @staticmethod
+    async def _delete_webhook(api_url: str):
+        """deleteWebhook à partir de l'URL du bot, sans Application (bot en veille)"""
+        async with http_pool.semaphore:
+            response = await http_pool.client.post(f"{api_url}/deleteWebhook", timeout=10.0)
+        result = response.json()
+        if not result.get('ok'):
+            raise RuntimeError(result.get('description', response.status_code))
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        route = self.routes.get(request.match_info['path'])
+        if route is None:
+            return web.Response(status=404)
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ''), route.secret):
+            logger.warning("Webhook refusé: en-tête secret invalide")
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        if route.application is None:
+            if len(route.pending) < MAX_PARKED_UPDATES:
+                route.pending.append(data)
+            if route.on_update:
+                route.on_update()
+            return web.Response()
+
+        update = Update.de_json(data, route.application.bot)
+        if update is not None:
+            await route.application.update_queue.put(update)
+        return web.Response()